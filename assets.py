@@ -0,0 +1,141 @@
+import pygame
+import os
+from collections import OrderedDict
+
+# Gestor de assets compartido por todo el proceso.
+# Las Surfaces devueltas son compartidas: quien necesite modificarlas debe hacer .copy().
+
+MAX_VARIANTES_ESCALADAS = 256
+MAX_TEXTOS = 512
+
+_originales = {}                 # (ruta, alpha) -> [Surface o None, convertida]
+_escaladas = OrderedDict()       # (ruta, tamaño, alpha) -> [Surface, convertida] (LRU)
+_generadas = {}                  # clave -> objeto generado por una fábrica
+_fuentes = {}                    # (nombre, tamaño) -> pygame.font.Font
+_textos = OrderedDict()          # (nombre, tamaño, texto, antialias, color) -> Surface (LRU)
+
+stats = {
+    'cargas_disco': 0,
+    'aciertos': 0,
+    'fallos': 0
+}
+
+
+def _hay_pantalla():
+    return pygame.display.get_surface() is not None
+
+
+def _convertir(surface, alpha):
+    """Convierte al formato de la pantalla si ya existe una ventana"""
+    if not _hay_pantalla():
+        return surface, False
+    return (surface.convert_alpha() if alpha else surface.convert()), True
+
+
+def _cargar_original(ruta, alpha, opcional=False):
+    clave = (ruta, alpha)
+    entrada = _originales.get(clave)
+
+    if entrada is None:
+        surface = None
+        if os.path.exists(ruta):
+            try:
+                surface = pygame.image.load(ruta)
+                stats['cargas_disco'] += 1
+            except pygame.error as e:
+                print(f"⚠️ Error al cargar imagen {ruta}: {e}")
+        else:
+            if not opcional:
+                print(f"⚠️ Imagen {ruta} no encontrada.")
+            stats['fallos'] += 1
+
+        entrada = [surface, False]
+        _originales[clave] = entrada
+
+    # Imágenes cargadas antes de crear la ventana se convierten en cuanto exista
+    if entrada[0] is not None and not entrada[1]:
+        entrada[0], entrada[1] = _convertir(entrada[0], alpha)
+
+    return entrada[0]
+
+
+def cargar_imagen(ruta, tamaño=None, alpha=True, opcional=False):
+    """Retorna la imagen (escalada a tamaño si se indica) o None si no se pudo cargar.
+
+    Los fallos también se cachean: una imagen inexistente no vuelve a buscarse en disco.
+    Con opcional=True no se avisa si el archivo no existe.
+    """
+    if tamaño is None:
+        return _cargar_original(ruta, alpha, opcional)
+
+    tamaño = (int(tamaño[0]), int(tamaño[1]))
+    clave = (ruta, tamaño, alpha)
+    entrada = _escaladas.get(clave)
+    if entrada is not None and (entrada[1] or not _hay_pantalla()):
+        _escaladas.move_to_end(clave)
+        stats['aciertos'] += 1
+        return entrada[0]
+
+    original = _cargar_original(ruta, alpha, opcional)
+    if original is None:
+        return None
+
+    surface = pygame.transform.scale(original, tamaño)
+    _escaladas[clave] = [surface, _hay_pantalla()]
+    _escaladas.move_to_end(clave)
+    if len(_escaladas) > MAX_VARIANTES_ESCALADAS:
+        _escaladas.popitem(last=False)
+    return surface
+
+
+def obtener_generado(clave, fabrica):
+    """Retorna un asset generado por código, creándolo con fabrica() la primera vez"""
+    if clave not in _generadas:
+        _generadas[clave] = fabrica()
+    else:
+        stats['aciertos'] += 1
+    return _generadas[clave]
+
+
+def obtener_fuente(tamaño, nombre=None):
+    """Retorna la fuente registrada para (nombre, tamaño), creándola una sola vez"""
+    clave = (nombre, tamaño)
+    fuente = _fuentes.get(clave)
+    if fuente is None:
+        fuente = pygame.font.Font(nombre, tamaño)
+        _fuentes[clave] = fuente
+    return fuente
+
+
+def renderizar_texto(texto, tamaño, color, antialias=True, nombre=None):
+    """Retorna el texto renderizado; solo se rasteriza de nuevo si cambia el texto o el color"""
+    clave = (nombre, tamaño, texto, antialias, tuple(color))
+    surface = _textos.get(clave)
+    if surface is not None:
+        _textos.move_to_end(clave)
+        stats['aciertos'] += 1
+        return surface
+
+    surface = obtener_fuente(tamaño, nombre).render(texto, antialias, color)
+    _textos[clave] = surface
+    if len(_textos) > MAX_TEXTOS:
+        _textos.popitem(last=False)
+    return surface
+
+
+def obtener_panel(tamaño, color):
+    """Retorna una Surface translúcida de un color (fondos de HUD y paneles)"""
+    def crear():
+        panel = pygame.Surface(tamaño, pygame.SRCALPHA)
+        panel.fill(color)
+        return panel
+    return obtener_generado(('panel', tuple(tamaño), tuple(color)), crear)
+
+
+def limpiar():
+    """Libera todas las imágenes, fuentes y textos cacheados"""
+    _originales.clear()
+    _escaladas.clear()
+    _generadas.clear()
+    _fuentes.clear()
+    _textos.clear()
@@ -0,0 +1,222 @@
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import contextlib
+import multiprocessing
+from map import Map
+from simulacion import (Simulacion, TICK, EVENTO_VICTORIA, EVENTO_ENEMIGO_ELIMINADO,
+                        EVENTO_POWERUP_RECOGIDO, EVENTO_BOMBA_COLOCADA)
+from bots import POLITICAS, crear_bot
+
+# Ejecuta partidas de un jugador sin ventana, repartidas entre todos los núcleos,
+# y resume los resultados en un JSON. Ejemplo:
+#
+#   python batch_runner.py -n 200 --politicas cazador,aleatoria \
+#       --ajuste probabilidad_spawn=0.5 --ajuste velocidad_enemigo_base=1.5
+
+NIVELES_BASE = ["level1", "level2"]
+
+
+def mapas_disponibles():
+    """level1/level2 más los PNG de Maps/ que no sean ya uno de ellos"""
+    mapa = Map(Simulacion.LARGURA, Simulacion.ALTURA, Simulacion.TILE_SIZE,
+               Simulacion.COR_CLARA, Simulacion.COR_ESCURA)
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        mapa.scan_maps_folder()
+
+    nombres = []
+    archivos_vistos = set()
+    for nombre in NIVELES_BASE + sorted(mapa.levels):
+        archivo = mapa.levels.get(nombre)
+        if archivo is None or archivo in archivos_vistos:
+            continue
+        archivos_vistos.add(archivo)
+        nombres.append(nombre)
+    return nombres
+
+
+def jugar_partida(trabajo):
+    """Juega una partida completa sobre un mapa y retorna sus métricas"""
+    mapa, politica, semilla, max_ticks, ajustes = trabajo
+
+    resultado = {
+        'mapa': mapa,
+        'politica': politica,
+        'semilla': semilla,
+        'resultado': 'tiempo_agotado',
+        'tiempo_despeje': None,
+        'enemigos_eliminados': 0,
+        'powerups_recogidos': 0,
+        'bombas_colocadas': 0
+    }
+
+    # Los print del juego no aportan nada aquí y frenan cada partida
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        sim = Simulacion(niveles=[mapa], semilla=semilla, ajustes=ajustes, escanear_mapas=True)
+        bot = crear_bot(politica, random.Random(semilla))
+        sim.tomar_eventos()
+
+        while not sim.terminado and sim.ticks < max_ticks:
+            sim.paso(bot.decidir(sim))
+            for tipo, datos in sim.tomar_eventos():
+                if tipo == EVENTO_ENEMIGO_ELIMINADO:
+                    resultado['enemigos_eliminados'] += 1
+                elif tipo == EVENTO_POWERUP_RECOGIDO:
+                    resultado['powerups_recogidos'] += 1
+                elif tipo == EVENTO_BOMBA_COLOCADA:
+                    resultado['bombas_colocadas'] += 1
+                elif tipo == EVENTO_VICTORIA:
+                    resultado['tiempo_despeje'] = sim.ahora()
+
+    if sim.victoria:
+        resultado['resultado'] = 'victoria'
+    elif sim.terminado:
+        resultado['resultado'] = 'derrota'
+    resultado['ticks'] = sim.ticks
+    resultado['vida_restante'] = sim.jugador.life
+    return resultado
+
+
+def _estadisticas(valores):
+    if not valores:
+        return None
+    return {
+        'media': statistics.fmean(valores),
+        'mediana': statistics.median(valores),
+        'min': min(valores),
+        'max': max(valores)
+    }
+
+
+def _formato(valor, spec):
+    """Formatea un valor del resumen, o 'n/a' si el grupo no lo tiene"""
+    return 'n/a' if valor is None else format(valor, spec)
+
+
+def resumir(partidas):
+    """Agrega las métricas de un grupo de partidas"""
+    n = len(partidas)
+    victorias = [p for p in partidas if p['resultado'] == 'victoria']
+    conteo = {}
+    for p in partidas:
+        conteo[p['resultado']] = conteo.get(p['resultado'], 0) + 1
+
+    return {
+        'partidas': n,
+        'resultados': conteo,
+        'tasa_victoria': len(victorias) / n if n else 0.0,
+        'tiempo_despeje': _estadisticas([p['tiempo_despeje'] for p in victorias]),
+        'enemigos_eliminados': _estadisticas([p['enemigos_eliminados'] for p in partidas]),
+        'powerups_recogidos': _estadisticas([p['powerups_recogidos'] for p in partidas]),
+        'bombas_colocadas': _estadisticas([p['bombas_colocadas'] for p in partidas])
+    }
+
+
+def ejecutar_lote(mapas, politicas, partidas_por_grupo, semilla=0, max_segundos=180,
+                  ajustes=None, procesos=None, detalle=False):
+    """Juega partidas_por_grupo partidas por cada (mapa, política) y retorna el resumen"""
+    max_ticks = int(max_segundos / TICK)
+    trabajos = [(mapa, politica, semilla + i, max_ticks, ajustes)
+                for mapa in mapas
+                for politica in politicas
+                for i in range(partidas_por_grupo)]
+
+    procesos = procesos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    partidas = []
+    with multiprocessing.Pool(procesos) as pool:
+        chunksize = max(1, len(trabajos) // (procesos * 8))
+        for i, partida in enumerate(pool.imap_unordered(jugar_partida, trabajos, chunksize), 1):
+            partidas.append(partida)
+            if i % max(1, len(trabajos) // 10) == 0 or i == len(trabajos):
+                print(f"⏱️ {i}/{len(trabajos)} partidas")
+    duracion = time.perf_counter() - inicio
+
+    partidas.sort(key=lambda p: (p['mapa'], p['politica'], p['semilla']))
+    grupos = {}
+    for mapa in mapas:
+        for politica in politicas:
+            grupo = [p for p in partidas if p['mapa'] == mapa and p['politica'] == politica]
+            grupos[f"{mapa}/{politica}"] = resumir(grupo)
+
+    resumen = {
+        'configuracion': {
+            'mapas': mapas,
+            'politicas': politicas,
+            'partidas_por_grupo': partidas_por_grupo,
+            'semilla': semilla,
+            'max_segundos': max_segundos,
+            'ajustes': ajustes or {},
+            'procesos': procesos
+        },
+        'duracion_segundos': duracion,
+        'partidas_por_minuto': len(partidas) / duracion * 60 if duracion else None,
+        'total': resumir(partidas),
+        'grupos': grupos
+    }
+    if detalle:
+        resumen['partidas'] = partidas
+    return resumen
+
+
+def _parsear_ajuste(texto):
+    nombre, _, valor = texto.partition('=')
+    if not valor:
+        raise argparse.ArgumentTypeError(f"Ajuste inválido '{texto}' (usa nombre=valor)")
+    try:
+        return nombre, json.loads(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Valor inválido en '{texto}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partidas por lotes con bots, sin ventana")
+    parser.add_argument('-n', '--partidas', type=int, default=50,
+                        help="partidas por cada combinación de mapa y política")
+    parser.add_argument('--politicas', default=','.join(POLITICAS),
+                        help="políticas separadas por comas")
+    parser.add_argument('--mapas', default=None,
+                        help="mapas separados por comas (por defecto todos los disponibles)")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--max-segundos', type=float, default=180,
+                        help="tiempo de juego simulado máximo por partida")
+    parser.add_argument('--ajuste', action='append', type=_parsear_ajuste, default=[],
+                        help="parámetro de balance nombre=valor (repetible)")
+    parser.add_argument('--procesos', type=int, default=None)
+    parser.add_argument('--detalle', action='store_true', help="incluir cada partida en el JSON")
+    parser.add_argument('-o', '--salida', default='resultados_lote.json')
+    args = parser.parse_args(argv)
+
+    politicas = [p for p in args.politicas.split(',') if p]
+    for politica in politicas:
+        if politica not in POLITICAS:
+            parser.error(f"política desconocida: {politica}")
+    mapas = args.mapas.split(',') if args.mapas else mapas_disponibles()
+
+    resumen = ejecutar_lote(mapas, politicas, args.partidas, semilla=args.semilla,
+                            max_segundos=args.max_segundos, ajustes=dict(args.ajuste),
+                            procesos=args.procesos, detalle=args.detalle)
+
+    with open(args.salida, 'w') as f:
+        json.dump(resumen, f, indent=2, ensure_ascii=False)
+
+    total = resumen['total']
+    print(f"✅ {total['partidas']} partidas en {resumen['duracion_segundos']:.1f}s "
+          f"({_formato(resumen['partidas_por_minuto'], '.0f')}/min) - victorias: {total['tasa_victoria']:.0%}")
+    for nombre, grupo in resumen['grupos'].items():
+        enemigos = grupo['enemigos_eliminados'] or {}
+        powerups = grupo['powerups_recogidos'] or {}
+        print(f"   {nombre}: victorias {grupo['tasa_victoria']:.0%}, "
+              f"enemigos {_formato(enemigos.get('media'), '.1f')}, "
+              f"power-ups {_formato(powerups.get('media'), '.1f')}")
+    print(f"📄 Resumen guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+import os
+# Sin ventana ni audio: los benchmarks corren igual en CI que en local
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import contextlib
+import pygame
+from object import Object
+from bomba import Bomba
+from enemy import Enemy
+from grid import GridOcupacion
+from simulacion import Simulacion, EntradaJugador
+from network import MessageType, codificar_mensaje, decodificar_mensaje
+
+# Benchmarks de los caminos calientes del juego. Ejemplos:
+#
+#   python benchmarks.py -o base.json                  # guardar una línea base
+#   python benchmarks.py --comparar base.json          # falla (código 1) si algo empeoró
+#   python benchmarks.py --filtro game_render --escala 2
+
+FORMATO = 1  # Versión del formato del JSON de resultados
+
+
+@contextlib.contextmanager
+def _silencio():
+    """Los print del juego distorsionan las mediciones"""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        yield
+
+
+def medir(funcion, repeticiones, preparar=None, calentamiento=5, operaciones=1):
+    """Mide funcion() repeticiones veces y retorna estadísticas en microsegundos.
+
+    preparar() se ejecuta fuera de la medición y su resultado se pasa a funcion.
+    operaciones indica cuántas operaciones hace cada llamada (para throughput).
+    """
+    tiempos = []
+    for i in range(calentamiento + repeticiones):
+        argumento = preparar() if preparar else None
+        inicio = time.perf_counter_ns()
+        if preparar:
+            funcion(argumento)
+        else:
+            funcion()
+        duracion = time.perf_counter_ns() - inicio
+        if i >= calentamiento:
+            tiempos.append(duracion / 1000 / operaciones)
+
+    tiempos.sort()
+    mediana = statistics.median(tiempos)
+    return {
+        'repeticiones': repeticiones,
+        'media_us': statistics.fmean(tiempos),
+        'mediana_us': mediana,
+        'p95_us': tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))],
+        'min_us': tiempos[0],
+        'max_us': tiempos[-1],
+        'desviacion_us': statistics.pstdev(tiempos),
+        'ops_por_segundo': 1e6 / mediana if mediana else None
+    }
+
+
+def _repeticiones(base, escala):
+    return max(5, int(base * escala))
+
+
+# Benchmarks ==========================================================================
+# Cada uno recibe la escala de repeticiones y produce pares (nombre, medición), donde
+# medición() ejecuta la medida; así el filtro evita medir lo que no se pidió.
+
+def bench_crear_obstaculos(escala):
+    sim = Simulacion(semilla=0)
+    for nivel in ("level1", "level2"):
+        yield f"map_crear_obstaculos[{nivel}]", lambda: medir(
+            lambda: sim.mapa.crear_obstaculos(nivel), _repeticiones(100, escala))
+
+
+def _tablero_con_bloques(cantidad, semilla=0):
+    """Tablero vacío con bloques destructibles en celdas aleatorias (menos la del centro)"""
+    tamaño = Simulacion.TILE_SIZE * Simulacion.PLAYER_TILES
+    Object.limpar(GridOcupacion(Simulacion.LARGURA, Simulacion.ALTURA, tamaño))
+    rng = random.Random(semilla)
+    centro = (Simulacion.LARGURA // tamaño // 2, Simulacion.ALTURA // tamaño // 2)
+    celdas = [(cx, cy)
+              for cx in range(Simulacion.LARGURA // tamaño)
+              for cy in range(Simulacion.ALTURA // tamaño)
+              if (cx, cy) != centro]
+    for cx, cy in rng.sample(celdas, cantidad):
+        Object(cx * tamaño, cy * tamaño, tamaño, tamaño,
+               "Object&Bomb_Sprites/OBJ_D.png", destrutivel=True)
+    return centro[0] * tamaño, centro[1] * tamaño, tamaño
+
+
+def bench_bomba_explotar(escala):
+    for bloques in (0, 60, 150):
+        x, y, tamaño = _tablero_con_bloques(bloques)
+        for rango in (1, 3, 6, 10):
+            yield f"bomba_explotar[rango={rango},bloques={bloques}]", lambda: medir(
+                lambda bomba: bomba.explotar(Object.objects), _repeticiones(2000, escala),
+                preparar=lambda: Bomba(x, y, tamaño, rango_explosion=rango))
+    Object.limpar()
+
+
+def bench_player_movimiento(escala):
+    sim = Simulacion(semilla=0)
+    jugador = sim.jugador
+    # Bombas repartidas por el mapa para que la colisión con bombas también cuente
+    bombas = [Bomba(x, 360, sim.player_size, jugador_id=1) for x in range(120, 1200, 120)]
+
+    yield "player_actualizar_movimiento", lambda: medir(
+        lambda: jugador.actualizar_movimiento(sim.LARGURA, sim.ALTURA, bombas),
+        _repeticiones(5000, escala))
+
+    direcciones = ['right', 'left', 'down', 'up']
+    contador = iter(range(10 ** 9))
+    yield "player_mover", lambda: medir(
+        lambda: jugador.mover(direcciones[next(contador) % 4], sim.LARGURA, sim.ALTURA, bombas),
+        _repeticiones(5000, escala))
+
+
+def bench_enemy_actualizar(escala):
+    for cantidad in (8, 50, 200):
+        sim = Simulacion(semilla=0, ajustes={'num_enemigos_base': 0})
+        rng = random.Random(cantidad)
+        while len(sim.enemigos) < cantidad:
+            x = rng.randrange(sim.LARGURA // sim.player_size) * sim.player_size
+            y = rng.randrange(sim.ALTURA // sim.player_size) * sim.player_size
+            if Object.objeto_em_rect(pygame.Rect(x, y, sim.player_size, sim.player_size)) is None:
+                sim.enemigos.append(Enemy(x, y, sim.player_size, reloj=sim.reloj, rng=rng))
+
+        def actualizar_todos():
+            sim.reloj.avanzar()
+            for enemigo in sim.enemigos:
+                enemigo.actualizar(Object.objects, sim.bombas, sim.LARGURA, sim.ALTURA)
+
+        yield f"enemy_actualizar[enemigos={cantidad}]", lambda: medir(
+            actualizar_todos, _repeticiones(max(50, 20000 // cantidad), escala))
+
+
+def bench_game_render(escala):
+    from game import Game
+
+    for dirty_rects in (False, True):
+        game = Game(dirty_rects=dirty_rects, semilla=0)
+        entrada = EntradaJugador()
+
+        def avanzar():
+            # Un tick de simulación fuera de la medición para que haya algo que redibujar
+            game.sim.paso(entrada)
+            game.sim.tomar_eventos()
+
+        modo = "dirty_rects" if dirty_rects else "completo"
+        yield f"game_render[{modo}]", lambda: medir(
+            lambda _: game.render(), _repeticiones(300, escala), preparar=avanzar)
+
+
+def bench_network_codec(escala):
+    mensajes = {
+        'player_state': {
+            'type': MessageType.PLAYER_STATE.value,
+            'player_id': 1,
+            'keyframe': 7,
+            'data': {
+                'x': 120, 'y': 240, 'direction': 'left', 'frame': 1, 'life': 3, 'moving': True,
+                'powerup_state': {'max_bombas': 2, 'rango_explosion': 3, 'velocidad_boost': 1.0,
+                                  'tiene_escudo': False, 'tiene_control_remoto': True,
+                                  'escudo_tiempo': 0},
+                'timestamp': 1700000000.0
+            },
+            'timestamp': 1700000000.0
+        },
+        'player_state_delta': {
+            'type': MessageType.PLAYER_STATE_DELTA.value,
+            'player_id': 1,
+            'keyframe': 7,
+            'data': {'x': 150, 'frame': 2},
+            'timestamp': 1700000000.0
+        },
+        'bomb_placed': {
+            'type': MessageType.BOMB_PLACED.value,
+            'data': {'x': 300, 'y': 420, 'player_id': 2, 'time': 1700000000.0, 'rango_explosion': 2},
+            'timestamp': 1700000000.0
+        },
+        'heartbeat': {
+            'type': MessageType.HEARTBEAT.value,
+            'timestamp': 1700000000.0,
+            'seq': 42
+        }
+    }
+    lote = 1000
+    for nombre, mensaje in mensajes.items():
+        frame = codificar_mensaje(mensaje)
+        cuerpo = frame[4:]
+
+        yield f"network_codificar[{nombre}]", lambda: dict(
+            medir(lambda: [codificar_mensaje(mensaje) for _ in range(lote)],
+                  _repeticiones(50, escala), operaciones=lote), bytes=len(frame))
+        yield f"network_decodificar[{nombre}]", lambda: dict(
+            medir(lambda: [decodificar_mensaje(cuerpo) for _ in range(lote)],
+                  _repeticiones(50, escala), operaciones=lote), bytes=len(frame))
+
+
+BENCHMARKS = [
+    bench_crear_obstaculos,
+    bench_bomba_explotar,
+    bench_player_movimiento,
+    bench_enemy_actualizar,
+    bench_game_render,
+    bench_network_codec
+]
+
+
+def ejecutar(filtro=None, escala=1.0):
+    """Ejecuta los benchmarks cuyo nombre contiene filtro y retorna el informe"""
+    pygame.init()
+    pygame.display.set_mode((Simulacion.LARGURA, Simulacion.ALTURA))
+
+    resultados = {}
+    for benchmark in BENCHMARKS:
+        generador = benchmark(escala)
+        while True:
+            with _silencio():
+                try:
+                    nombre, medicion = next(generador)
+                except StopIteration:
+                    break
+                if filtro and filtro not in nombre:
+                    continue
+                resultado = medicion()
+            resultados[nombre] = resultado
+            print(f"   {nombre:<45} mediana {resultado['mediana_us']:>10.2f} µs"
+                  f"   p95 {resultado['p95_us']:>10.2f} µs")
+
+    pygame.quit()
+    return {
+        'formato': FORMATO,
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'entorno': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'sdl': '.'.join(map(str, pygame.get_sdl_version())),
+            'plataforma': platform.platform(),
+            'procesador': platform.processor() or platform.machine(),
+            'video': os.environ.get('SDL_VIDEODRIVER')
+        },
+        'resultados': resultados
+    }
+
+
+def comparar(actual, base, umbral=0.15, umbral_p95=0.30):
+    """Compara dos informes; retorna la lista de regresiones (nombre, métrica, base, actual)"""
+    regresiones = []
+    print(f"\n{'benchmark':<45} {'base':>10} {'actual':>10} {'cambio':>8}")
+    for nombre, resultado in actual['resultados'].items():
+        anterior = base['resultados'].get(nombre)
+        if anterior is None:
+            print(f"{nombre:<45} {'-':>10} {resultado['mediana_us']:>10.2f}    nuevo")
+            continue
+
+        cambio = resultado['mediana_us'] / anterior['mediana_us'] - 1
+        marca = ""
+        for metrica, limite in (('mediana_us', umbral), ('p95_us', umbral_p95)):
+            if resultado[metrica] > anterior[metrica] * (1 + limite):
+                regresiones.append((nombre, metrica, anterior[metrica], resultado[metrica]))
+                marca = " ❌"
+        print(f"{nombre:<45} {anterior['mediana_us']:>10.2f} {resultado['mediana_us']:>10.2f} "
+              f"{cambio:>+7.1%}{marca}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del juego (driver de vídeo dummy)")
+    parser.add_argument('-o', '--salida', default='benchmarks.json')
+    parser.add_argument('--comparar', metavar='BASE', help="JSON de una ejecución anterior")
+    parser.add_argument('--filtro', help="solo los benchmarks cuyo nombre contiene este texto")
+    parser.add_argument('--escala', type=float, default=1.0, help="multiplicador de repeticiones")
+    parser.add_argument('--umbral', type=float, default=0.15,
+                        help="empeoramiento máximo tolerado de la mediana (0.15 = 15%%)")
+    parser.add_argument('--umbral-p95', type=float, default=0.30,
+                        help="empeoramiento máximo tolerado del p95")
+    args = parser.parse_args(argv)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+
+    print("⏱️ Ejecutando benchmarks...")
+    informe = ejecutar(args.filtro, args.escala)
+
+    with open(args.salida, 'w') as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"📄 Resultados guardados en {args.salida}")
+
+    if base is not None:
+        regresiones = comparar(informe, base, args.umbral, args.umbral_p95)
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones:")
+            for nombre, metrica, anterior, actual in regresiones:
+                print(f"   {nombre} ({metrica}): {anterior:.2f} → {actual:.2f} µs")
+            return 1
+        print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
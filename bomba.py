@@ -1,17 +1,20 @@
 import pygame
 import time
 import os
+import assets
 from object import Object
 
 class Bomba:
-    def __init__(self, x, y, tamaño_jogador, duracion=3, tile_size=20, jugador_id=0, rango_explosion=1):
+    def __init__(self, x, y, tamaño_jogador, duracion=3, tile_size=20, jugador_id=0, rango_explosion=1,
+                 reloj=None):
         self.x = x
         self.y = y
         self.tamaño_jogador = tamaño_jogador
         self.tile_size = tile_size
         self.duracion = duracion
         self.rango_explosion = rango_explosion  # Nuevo: rango de la explosión
-        self.tiempo_creacion = time.time()
+        self.reloj = reloj or time.time  # Reloj inyectable (segundos)
+        self.tiempo_creacion = self.reloj()
         self.explotada = False
         self.recien_explotada = False
         self.color = (0, 0, 0)
@@ -31,12 +34,8 @@ class Bomba:
         # Para bombas remotas: por defecto, son sólidas para todos excepto su dueño
         self.es_remota = False
         
-        # Carregar a imagem da bomba
-        try:
-            self.imagem_bomba = pygame.image.load(os.path.join('Object&Bomb_Sprites', 'bomb.png'))
-        except:
-            print("⚠️ Advertencia: No se pudo cargar bomb.png. Usando gráfico por defecto.")
-            self.imagem_bomba = None
+        # Imagen de la bomba compartida (se carga una sola vez; None usa el gráfico por defecto)
+        self.imagem_bomba = assets.cargar_imagen(os.path.join('Object&Bomb_Sprites', 'bomb.png'))
     
     def danar_enemigos(self, enemigos):
         """Verifica si la explosión daña a los enemigos"""
@@ -53,8 +52,8 @@ class Bomba:
 
     def actualizar_colision(self, jugador_x, jugador_y, jugador_id, grid_size):
         """Actualiza el estado de colisión basado en la posición del jugador"""
-        # Solo actualizar si es bomba local (del jugador actual)
-        if self.jugador_id == jugador_id and not self.es_remota:
+        # Solo actualizar con la posición del dueño
+        if self.jugador_id == jugador_id:
             # Calcular si el jugador está completamente FUERA del rectángulo de la bomba
             jugador_rect = pygame.Rect(jugador_x, jugador_y, grid_size, grid_size)
             
@@ -83,10 +82,11 @@ class Bomba:
         return self.es_solida_para_otros
 
     def dibujar(self, superficie):
-        """Desenha a bomba ou a área da explosão"""
+        """Desenha a bomba ou a área da explosão e retorna a área modificada"""
+        area = self.rect.copy()
         if not self.explotada:
             if self.imagem_bomba:
-                superficie.blit(self.imagem_bomba, (self.x, self.y))
+                area.union_ip(superficie.blit(self.imagem_bomba, (self.x, self.y)))
             else:
                 # Fallback: dibujo original
                 centro_x = self.x + self.tamaño_jogador // 2
@@ -118,24 +118,32 @@ class Bomba:
                 
                 # Efecto de brillo en los bordes
                 pygame.draw.rect(superficie, (255, 255, 200), rect, 1)
+            
+            if self.explosion_tiles:
+                area = area.unionall(self.explosion_tiles)
+        
+        return area
 
     def debe_explotar(self):
         """Verifica se debe explodir"""
-        return time.time() - self.tiempo_creacion >= self.duracion and not self.explotada
+        return self.reloj() - self.tiempo_creacion >= self.duracion and not self.explotada
 
     def explotar(self, objetos):
         """Calcula la área de la explosión y marca el flag"""
         self.explotada = True
         self.recien_explotada = True
-        self.tiempo_explosion = time.time()
+        self.tiempo_explosion = self.reloj()
         self.es_solida_para_otros = False  # Deja de ser sólida al explotar
+        self.explosion_tiles = self.calcular_explosion(objetos)
 
+    def calcular_explosion(self, objetos):
+        """Retorna los tiles que alcanzaría la explosión, sin modificar la bomba"""
         p = self.tamaño_jogador
-        self.explosion_tiles = []
+        tiles = []
         
         # Crear rectángulo de la bomba (centro)
         bomba_rect = pygame.Rect(self.x, self.y, p, p)
-        self.explosion_tiles.append(bomba_rect)
+        tiles.append(bomba_rect)
         
         # Verificar explosión en cada dirección
         direcciones = [
@@ -156,8 +164,13 @@ class Bomba:
                 colision_indestrutivel = False
                 objeto_destrutivel_encontrado = None
                 
-                # Verificar colisión con objetos
-                for obj in objetos:
+                # Verificar colisión con objetos (consulta al grid si existe)
+                if Object.grid is not None:
+                    candidatos = Object.grid.objetos_en_rect(explosion_rect)
+                else:
+                    candidatos = objetos
+                
+                for obj in candidatos:
                     if obj.destruido: 
                         continue
                         
@@ -171,15 +184,17 @@ class Bomba:
                 if colision_indestrutivel:
                     break
                 
-                self.explosion_tiles.append(explosion_rect)
+                tiles.append(explosion_rect)
                 
                 if objeto_destrutivel_encontrado:
                     # Si encontramos un objeto destructible, paramos en esa dirección
                     # pero incluimos el tile con el objeto
                     break
+        
+        return tiles
 
     def explosion_activa(self):
         """Retorna True mientras la explosión esté visible"""
         if not self.explotada:
             return False
-        return time.time() - self.tiempo_explosion < self.explosion_dur
\ No newline at end of file
+        return self.reloj() - self.tiempo_explosion < self.explosion_dur
\ No newline at end of file
@@ -0,0 +1,194 @@
+import pygame
+from collections import deque
+from object import Object
+from bomba import Bomba
+from player import DIRECCIONES
+from simulacion import EntradaJugador
+
+# Políticas de bot para la simulación sin ventana (partidas por lotes y pruebas).
+# Cada bot expone decidir(sim) -> EntradaJugador y solo usa el rng que recibe,
+# así que una partida sigue siendo reproducible a partir de su semilla.
+
+
+class BotAleatorio:
+    """Camina al azar y suelta bombas de vez en cuando"""
+
+    def __init__(self, rng, prob_bomba=0.02, prob_cambio=0.1):
+        self.rng = rng
+        self.prob_bomba = prob_bomba
+        self.prob_cambio = prob_cambio
+        self.direccion = rng.choice(list(DIRECCIONES))
+
+    def decidir(self, sim):
+        if self.rng.random() < self.prob_cambio:
+            self.direccion = self.rng.choice(list(DIRECCIONES) + [None])
+        return EntradaJugador(
+            direccion=self.direccion,
+            bomba=self.rng.random() < self.prob_bomba,
+            detonar=sim.jugador.tiene_control_remoto and self.rng.random() < self.prob_bomba
+        )
+
+
+class BotCazador:
+    """Bot con búsqueda en anchura sobre las posiciones alcanzables del jugador.
+
+    Prioridades: salir de las zonas de explosión, ir a la salida si está abierta,
+    poner una bomba si alcanza bloques o enemigos y hay escapatoria, y si no,
+    acercarse al sitio más cercano desde el que valga la pena ponerla.
+    """
+
+    def __init__(self, rng, max_nodos=2000):
+        self.rng = rng
+        self.max_nodos = max_nodos
+
+    # Geometría ==================================================================
+
+    def _rect(self, sim, x, y):
+        return pygame.Rect(x, y, sim.player_size, sim.player_size)
+
+    def _libre(self, sim, x, y, enemigos):
+        """Posición a la que el jugador podría moverse (mismas reglas que Player.mover)"""
+        if x < 0 or y < 0 or x > sim.LARGURA - sim.player_size or y > sim.ALTURA - sim.player_size:
+            return False
+        rect = self._rect(sim, x, y)
+        if Object.objeto_em_rect(rect) is not None:
+            return False
+        for bomba in sim.bombas:
+            if bomba.es_colision_solida(sim.jugador.id) and rect.colliderect(bomba.rect):
+                return False
+        return rect.collidelist(enemigos) == -1
+
+    def _zona_peligro(self, sim):
+        """Tiles alcanzados por explosiones activas o por las bombas que aún no estallaron"""
+        tiles = []
+        for bomba in sim.bombas:
+            if bomba.explotada:
+                if bomba.explosion_activa():
+                    tiles.extend(bomba.explosion_tiles)
+            else:
+                tiles.extend(bomba.calcular_explosion(Object.objects))
+        return tiles
+
+    def _explosion_desde(self, sim, x, y, cache):
+        """Tiles de una bomba hipotética del jugador puesta desde (x, y)"""
+        celda = sim.ajustar_a_grid(x, y)
+        if celda not in cache:
+            bomba = Bomba(celda[0], celda[1], sim.player_size,
+                          rango_explosion=sim.jugador.rango_explosion, reloj=sim.reloj)
+            cache[celda] = bomba.calcular_explosion(Object.objects)
+        return cache[celda]
+
+    def _util(self, sim, tiles):
+        """La explosión alcanzaría algún bloque destructible o enemigo"""
+        for rect in tiles[1:]:
+            for obj in Object.objetos_em_rect(rect):
+                if obj.destrutivel:
+                    return True
+        for enemigo in sim.enemigos:
+            if enemigo.activo and enemigo.rect.collidelist(tiles) != -1:
+                return True
+        return False
+
+    # Búsqueda ===================================================================
+
+    def _buscar(self, sim, objetivo, peligro, evitar_peligro, enemigos):
+        """BFS desde la posición del jugador; retorna la primera dirección hacia objetivo"""
+        paso = int(sim.jugador.velocidad)
+        inicio = (int(sim.jugador.x), int(sim.jugador.y))
+        if objetivo(*inicio):
+            return None, inicio
+
+        primera = {inicio: None}
+        cola = deque([inicio])
+        while cola and len(primera) < self.max_nodos:
+            x, y = cola.popleft()
+            for direccion, (dx, dy) in DIRECCIONES.items():
+                vecino = (x + dx * paso, y + dy * paso)
+                if vecino in primera or not self._libre(sim, vecino[0], vecino[1], enemigos):
+                    continue
+                if evitar_peligro and self._rect(sim, *vecino).collidelist(peligro) != -1:
+                    continue
+                primera[vecino] = primera[(x, y)] or direccion
+                if objetivo(*vecino):
+                    return primera[vecino], vecino
+                cola.append(vecino)
+        return None, None
+
+    def decidir(self, sim):
+        jugador = sim.jugador
+        entrada = EntradaJugador()
+
+        # Solo se decide cuando el movimiento está disponible
+        if sim.ahora() - sim.ultimo_movimiento < sim.move_cooldown:
+            return entrada
+
+        peligro = self._zona_peligro(sim)
+        propio = self._rect(sim, jugador.x, jugador.y)
+        margen = sim.player_size // 2
+        enemigos = [e.rect.inflate(margen, margen) for e in sim.enemigos if e.activo]
+
+        def seguro(x, y):
+            return self._rect(sim, x, y).collidelist(peligro) == -1
+
+        # 1. Huir de las explosiones
+        if propio.collidelist(peligro) != -1:
+            entrada.direccion, _ = self._buscar(sim, seguro, peligro, False, enemigos)
+            return entrada
+
+        # Control remoto: detonar si el jugador no está en la zona de sus bombas
+        if jugador.tiene_control_remoto and any(not b.explotada for b in sim.bombas):
+            entrada.detonar = True
+
+        # 2. Ir a la salida
+        salida = sim.exit_point
+        if salida and salida.activado:
+            entrada.direccion, _ = self._buscar(
+                sim, lambda x, y: self._rect(sim, x, y).colliderect(salida.rect),
+                peligro, True, enemigos)
+            if entrada.direccion:
+                return entrada
+
+        cache = {}
+
+        # 3. Poner bomba si sirve y hay escapatoria
+        if jugador.puede_colocar_bomba():
+            tiles = self._explosion_desde(sim, jugador.x, jugador.y, cache)
+            if self._util(sim, tiles):
+                peligro_futuro = peligro + tiles
+                escape, _ = self._buscar(
+                    sim, lambda x, y: self._rect(sim, x, y).collidelist(peligro_futuro) == -1,
+                    peligro_futuro, False, enemigos)
+                if escape:
+                    entrada.bomba = True
+                    entrada.direccion = escape
+                    return entrada
+
+        # 4. Acercarse a una posición útil para poner bomba
+        if jugador.puede_colocar_bomba():
+            entrada.direccion, _ = self._buscar(
+                sim, lambda x, y: self._util(sim, self._explosion_desde(sim, x, y, cache)),
+                peligro, True, enemigos)
+            if entrada.direccion:
+                return entrada
+
+        # 5. Sin nada que hacer: paso aleatorio seguro
+        opciones = [d for d, (dx, dy) in DIRECCIONES.items()
+                    if self._libre(sim, jugador.x + dx * jugador.velocidad,
+                                   jugador.y + dy * jugador.velocidad, enemigos)
+                    and seguro(jugador.x + dx * jugador.velocidad, jugador.y + dy * jugador.velocidad)]
+        if opciones:
+            entrada.direccion = self.rng.choice(opciones)
+        return entrada
+
+
+POLITICAS = {
+    'aleatoria': BotAleatorio,
+    'cazador': BotCazador
+}
+
+
+def crear_bot(politica, rng):
+    """Crea el bot de la política indicada"""
+    if politica not in POLITICAS:
+        raise ValueError(f"Política desconocida: {politica} (disponibles: {', '.join(POLITICAS)})")
+    return POLITICAS[politica](rng)
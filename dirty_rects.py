@@ -0,0 +1,103 @@
+import pygame
+
+class DirtyRects:
+    """Renderizado por rectángulos sucios: solo se restauran y presentan las áreas que cambiaron.
+
+    Uso por frame:
+        hud_sucio = dirty.comenzar_frame(superficie, fondo, parcheados, clave_hud)
+        ... dibujar entidades y pasar sus áreas a dirty.agregar(...)
+        if hud_sucio: dibujar HUD y dirty.agregar(area_hud)
+        dirty.presentar(superficie)
+    """
+
+    def __init__(self, ancho, alto, area_hud):
+        self.pantalla = pygame.Rect(0, 0, ancho, alto)
+        self.area_hud = pygame.Rect(area_hud)
+        # Zona de juego (debajo del HUD) para recortar cuando el HUD no se redibuja
+        self.area_juego = pygame.Rect(0, self.area_hud.bottom, ancho, alto - self.area_hud.bottom)
+
+        self.anteriores = []   # Áreas dibujadas en el frame anterior (se restauran)
+        self.dibujadas = []    # Áreas dibujadas en este frame
+        self.actuales = []     # Áreas a presentar en este frame
+        self.redibujo_completo = True
+        self.ultima_clave_hud = None
+
+    def invalidar(self):
+        """Fuerza un redibujo y presentación completos en el próximo frame"""
+        self.redibujo_completo = True
+
+    def _recortar(self, areas):
+        if areas is None:
+            return []
+        if isinstance(areas, pygame.Rect):
+            areas = [areas]
+        recortadas = []
+        for area in areas:
+            if area:
+                area = self.pantalla.clip(area)
+                if area.width and area.height:
+                    recortadas.append(area)
+        return recortadas
+
+    def agregar(self, areas):
+        """Registra una o varias áreas dibujadas en este frame (None se ignora)"""
+        recortadas = self._recortar(areas)
+        self.actuales.extend(recortadas)
+        # El HUD permanece en pantalla: no hace falta restaurarlo en el siguiente frame
+        self.dibujadas.extend(area for area in recortadas if area != self.area_hud)
+
+    def comenzar_frame(self, superficie, fondo, parcheados, clave_hud):
+        """Restaura el fondo bajo las áreas del frame anterior.
+
+        Retorna True si el HUD debe redibujarse este frame.
+        """
+        if self.redibujo_completo:
+            superficie.set_clip(None)
+            superficie.blit(fondo, (0, 0))
+            self.ultima_clave_hud = clave_hud
+            return True
+
+        restaurar = self.anteriores + list(parcheados)
+        hud_sucio = clave_hud != self.ultima_clave_hud or \
+            any(area.colliderect(self.area_hud) for area in restaurar)
+        if hud_sucio:
+            restaurar.append(self.area_hud)
+        self.ultima_clave_hud = clave_hud
+
+        for area in restaurar:
+            superficie.blit(fondo, area, area)
+        self.actuales.extend(self._recortar(restaurar))
+
+        # Si el HUD no se redibuja, las entidades no pueden pintar encima de él
+        if not hud_sucio:
+            superficie.set_clip(self.area_juego)
+        return hud_sucio
+
+    def _fusionar(self, areas):
+        """Une las áreas que se superponen para presentar menos rectángulos"""
+        fusionadas = []
+        for area in areas:
+            area = area.copy()
+            i = 0
+            while i < len(fusionadas):
+                if area.colliderect(fusionadas[i]):
+                    area.union_ip(fusionadas.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            fusionadas.append(area)
+        return fusionadas
+
+    def presentar(self, superficie):
+        """Envía a la pantalla solo la unión de las áreas modificadas"""
+        superficie.set_clip(None)
+        if self.redibujo_completo:
+            pygame.display.update()
+            self.redibujo_completo = False
+        elif self.actuales:
+            pygame.display.update(self._fusionar(self.actuales))
+
+        # Lo dibujado este frame se restaura en el siguiente
+        self.anteriores = self.dibujadas
+        self.dibujadas = []
+        self.actuales = []
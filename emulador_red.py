@@ -0,0 +1,335 @@
+import sys
+import csv
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from protocolo import MessageType, BufferRecepcion, LONGITUD, SECUENCIA
+
+# Emulador de red para pruebas por loopback: un proxy TCP+UDP que se pone entre
+# los clientes y el host (o servidor dedicado) y aplica retardo con jitter,
+# pérdida, desorden y un límite de ancho de banda, en cada sentido por separado.
+#
+#   python servidor.py --puerto 4040
+#   python emulador_red.py --escuchar 4141 --destino 127.0.0.1:4040 \
+#       --retardo 60 --jitter 15 --perdida 0.02 --ancho-banda 256 --log tiempos.csv
+#
+# y los clientes se conectan a 127.0.0.1:4141 (en el menú: IP "127.0.0.1:4141").
+#
+# El flujo TCP se separa en tramas del protocolo, así cada mensaje se retrasa y
+# registra por separado. En TCP no se pierde nada: una "pérdida" es una
+# retransmisión que retrasa esa trama rto segundos y, como TCP entrega en orden,
+# también a todas las que vienen detrás. En UDP los datagramas perdidos se
+# descartan y los retrasados pueden adelantarse unos a otros.
+
+DISTRIBUCIONES = ('constante', 'uniforme', 'normal', 'pareto')
+
+
+class CondicionesRed:
+    """Condiciones de un sentido del enlace; los tiempos van en segundos"""
+
+    def __init__(self, retardo=0.0, jitter=0.0, distribucion='normal', perdida=0.0, desorden=0.0,
+                 ancho_banda=None, rto=0.2, retraso_desorden=0.05, rng=None):
+        if distribucion not in DISTRIBUCIONES:
+            raise ValueError(f"Distribución desconocida: {distribucion}")
+        self.retardo = retardo
+        self.jitter = jitter
+        self.distribucion = distribucion
+        self.perdida = perdida
+        self.desorden = desorden
+        self.ancho_banda = ancho_banda          # Bytes por segundo (None: sin límite)
+        self.rto = rto                          # Espera de una retransmisión TCP
+        self.retraso_desorden = retraso_desorden
+        self.rng = rng or random.Random()
+
+    def muestrear_retardo(self):
+        """Retardo de propagación de un mensaje según la distribución elegida"""
+        if self.distribucion == 'constante' or not self.jitter:
+            return self.retardo
+        if self.distribucion == 'uniforme':
+            return max(0.0, self.rng.uniform(self.retardo - self.jitter, self.retardo + self.jitter))
+        if self.distribucion == 'normal':
+            return max(0.0, self.rng.gauss(self.retardo, self.jitter))
+        # Pareto: casi siempre cerca del retardo base, con una cola larga de picos
+        # (alfa 3; la media del exceso coincide con jitter)
+        return self.retardo + self.jitter * 2 * (self.rng.paretovariate(3) - 1)
+
+
+class RegistroTiempos:
+    """Tiempos de cada mensaje (CSV opcional) y resumen por sentido y canal"""
+
+    COLUMNAS = ('envio', 'entrega', 'sentido', 'canal', 'tipo', 'bytes', 'retardo_ms', 'perdido')
+
+    def __init__(self, archivo=None):
+        self.inicio = None
+        self.retardos = {}      # (sentido, canal) -> [segundos]
+        self.perdidos = {}      # (sentido, canal) -> cantidad
+        self.bytes = {}
+        self.salida = open(archivo, 'w', newline='') if archivo else None
+        self.csv = csv.writer(self.salida) if self.salida else None
+        if self.csv:
+            self.csv.writerow(self.COLUMNAS)
+
+    def anotar(self, envio, entrega, sentido, canal, tipo, tamaño, perdido):
+        if self.inicio is None:
+            self.inicio = envio
+        clave = (sentido, canal)
+        self.bytes[clave] = self.bytes.get(clave, 0) + tamaño
+        if perdido and entrega is None:
+            self.perdidos[clave] = self.perdidos.get(clave, 0) + 1
+        else:
+            self.retardos.setdefault(clave, []).append(entrega - envio)
+        if self.csv:
+            self.csv.writerow((
+                f"{envio - self.inicio:.6f}",
+                '' if entrega is None else f"{entrega - self.inicio:.6f}",
+                sentido, canal, nombre_tipo(tipo), tamaño,
+                '' if entrega is None else f"{(entrega - envio) * 1000:.3f}",
+                int(perdido)
+            ))
+
+    def resumen(self):
+        """Líneas de texto con cantidad, pérdidas y percentiles de retardo"""
+        lineas = []
+        for clave in sorted(set(self.retardos) | set(self.perdidos)):
+            retardos = sorted(self.retardos.get(clave, []))
+            perdidos = self.perdidos.get(clave, 0)
+            linea = f"{clave[0]:>6} {clave[1]}: {len(retardos)} entregados, {perdidos} perdidos, {self.bytes[clave]} bytes"
+            if len(retardos) >= 2:
+                p50, p95, p99 = (statistics.quantiles(retardos, n=100, method='inclusive')[i] for i in (49, 94, 98))
+                linea += (f" | retardo ms: media {statistics.fmean(retardos) * 1000:.1f}, p50 {p50 * 1000:.1f},"
+                          f" p95 {p95 * 1000:.1f}, p99 {p99 * 1000:.1f}, máx {retardos[-1] * 1000:.1f}")
+            lineas.append(linea)
+        return lineas
+
+    def cerrar(self):
+        if self.salida:
+            self.salida.close()
+            self.salida = None
+
+
+def nombre_tipo(tipo):
+    try:
+        return MessageType(tipo).name
+    except ValueError:
+        return str(tipo)
+
+
+class Enlace:
+    """Un sentido de una conexión: decide cuándo se entrega cada mensaje y lo programa"""
+
+    def __init__(self, loop, condiciones, sentido, registro):
+        self.loop = loop
+        self.condiciones = condiciones
+        self.sentido = sentido
+        self.registro = registro
+        self.libre = 0.0            # Instante en que el enlace termina de transmitir lo anterior
+        self.ultima_entrega = 0.0   # TCP entrega en orden: nada sale antes que lo anterior
+
+    def programar(self, datos, entregar, canal, tipo):
+        c = self.condiciones
+        ordenado = canal == 'tcp'
+        ahora = self.loop.time()
+        envio = time.time()
+
+        perdido = c.perdida and c.rng.random() < c.perdida
+        if perdido and not ordenado:
+            self.registro.anotar(envio, None, self.sentido, canal, tipo, len(datos), True)
+            return
+
+        # Límite de ancho de banda: el enlace serializa un mensaje detrás de otro
+        salida = max(ahora, self.libre)
+        if c.ancho_banda:
+            salida += len(datos) / c.ancho_banda
+        self.libre = salida
+
+        entrega = salida + c.muestrear_retardo()
+        if perdido:
+            entrega += c.rto
+        if ordenado:
+            entrega = max(entrega, self.ultima_entrega)
+            self.ultima_entrega = entrega
+        elif c.desorden and c.rng.random() < c.desorden:
+            entrega += c.retraso_desorden
+
+        self.registro.anotar(envio, envio + (entrega - ahora), self.sentido, canal, tipo, len(datos), perdido)
+        self.loop.call_at(entrega, entregar, datos)
+
+
+class ProtocoloUDPEmulado(asyncio.DatagramProtocol):
+    def __init__(self, al_recibir):
+        self.al_recibir = al_recibir
+        self.transporte = None
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def datagram_received(self, datos, origen):
+        self.al_recibir(datos, origen)
+
+
+class EmuladorRed:
+    """Proxy TCP y UDP en puerto que reenvía a destino con las condiciones dadas"""
+
+    def __init__(self, puerto, destino, subida, bajada, registro=None):
+        self.puerto = puerto
+        self.destino = destino
+        self.subida = subida        # Condiciones cliente -> destino
+        self.bajada = bajada        # Condiciones destino -> cliente
+        self.registro = registro or RegistroTiempos()
+        self.loop = None
+        self.servidor = None
+        self.udp = None
+        self.udp_clientes = {}      # Dirección del cliente -> (transporte hacia destino, enlaces)
+        self.conexiones = 0
+
+    async def iniciar(self):
+        self.loop = asyncio.get_running_loop()
+        self.servidor = await asyncio.start_server(self._atender, '127.0.0.1', self.puerto, reuse_address=True)
+        self.udp, _ = await self.loop.create_datagram_endpoint(
+            lambda: ProtocoloUDPEmulado(self._datagrama_de_cliente), local_addr=('127.0.0.1', self.puerto))
+        print(f"🐢 Emulador de red en 127.0.0.1:{self.puerto} -> {self.destino[0]}:{self.destino[1]}")
+
+    def cerrar(self):
+        if self.servidor:
+            self.servidor.close()
+        if self.udp:
+            self.udp.close()
+        for transporte, _ in self.udp_clientes.values():
+            transporte.close()
+
+    # TCP ===========================================================================
+
+    async def _atender(self, lector_cliente, escritor_cliente):
+        self.conexiones += 1
+        origen = escritor_cliente.get_extra_info('peername')
+        try:
+            lector_destino, escritor_destino = await asyncio.open_connection(*self.destino)
+        except OSError as e:
+            print(f"❌ Emulador: no se pudo conectar a {self.destino[0]}:{self.destino[1]} ({e})")
+            escritor_cliente.close()
+            return
+        print(f"🔗 Emulador: {origen[0]}:{origen[1]} conectado")
+
+        subida = Enlace(self.loop, self.subida, 'subida', self.registro)
+        bajada = Enlace(self.loop, self.bajada, 'bajada', self.registro)
+        await asyncio.gather(
+            self._bombear(lector_cliente, escritor_destino, subida),
+            self._bombear(lector_destino, escritor_cliente, bajada))
+        print(f"🔌 Emulador: {origen[0]}:{origen[1]} desconectado")
+
+    async def _bombear(self, lector, escritor, enlace):
+        """Separa el flujo en tramas y programa la entrega de cada una"""
+        buffer = BufferRecepcion()
+
+        def entregar(datos):
+            if not escritor.is_closing():
+                escritor.write(datos)
+
+        try:
+            while True:
+                datos = await lector.read(65536)
+                if not datos:
+                    break
+                vista = memoryview(datos)
+                while vista:
+                    libre = buffer.espacio_libre()
+                    n = min(len(libre), len(vista))
+                    libre[:n] = vista[:n]
+                    buffer.recibido(n)
+                    vista = vista[n:]
+                    for trama in buffer.tramas():
+                        enlace.programar(LONGITUD.pack(len(trama)) + trama, entregar, 'tcp', trama[1])
+        except OSError:
+            pass
+        # Cerrar cuando haya salido lo que ya estaba en camino
+        self.loop.call_at(max(self.loop.time(), enlace.ultima_entrega), escritor.close)
+
+    # UDP ===========================================================================
+
+    def _datagrama_de_cliente(self, datos, origen):
+        if origen not in self.udp_clientes:
+            # Un socket hacia el destino por cliente: así el destino ve remitentes distintos
+            self.udp_clientes[origen] = None
+            self.loop.create_task(self._abrir_udp_cliente(origen, datos))
+            return
+        if self.udp_clientes[origen] is None:
+            return  # Aún se está abriendo su socket
+        transporte, (subida, _) = self.udp_clientes[origen]
+        subida.programar(datos, transporte.sendto, 'udp', self._tipo_datagrama(datos))
+
+    async def _abrir_udp_cliente(self, origen, primero):
+        bajada = Enlace(self.loop, self.bajada, 'bajada', self.registro)
+        subida = Enlace(self.loop, self.subida, 'subida', self.registro)
+
+        def al_recibir(datos, _):
+            bajada.programar(datos, lambda d: self.udp.sendto(d, origen), 'udp', self._tipo_datagrama(datos))
+
+        transporte, _ = await self.loop.create_datagram_endpoint(
+            lambda: ProtocoloUDPEmulado(al_recibir), remote_addr=self.destino)
+        self.udp_clientes[origen] = (transporte, (subida, bajada))
+        subida.programar(primero, transporte.sendto, 'udp', self._tipo_datagrama(primero))
+
+    @staticmethod
+    def _tipo_datagrama(datos):
+        return datos[SECUENCIA.size + 1] if len(datos) > SECUENCIA.size + 1 else 0
+
+
+def _direccion(texto):
+    host, _, puerto = texto.rpartition(':')
+    try:
+        return host or '127.0.0.1', int(puerto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Dirección inválida '{texto}' (usa ip:puerto)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proxy de loopback que emula latencia, pérdida y ancho de banda")
+    parser.add_argument('--escuchar', type=int, default=4141, help="puerto local al que se conectan los clientes")
+    parser.add_argument('--destino', type=_direccion, default=('127.0.0.1', 4040), help="host o servidor (ip:puerto)")
+    parser.add_argument('--retardo', type=float, default=50, help="retardo de un sentido en ms")
+    parser.add_argument('--jitter', type=float, default=10, help="variación del retardo en ms")
+    parser.add_argument('--distribucion', choices=DISTRIBUCIONES, default='normal')
+    parser.add_argument('--perdida', type=float, default=0.0, help="fracción de mensajes perdidos (0 a 1)")
+    parser.add_argument('--desorden', type=float, default=0.0, help="fracción de datagramas UDP retrasados")
+    parser.add_argument('--ancho-banda', type=float, default=None, help="límite por sentido en kbit/s")
+    parser.add_argument('--rto', type=float, default=200, help="retraso de una retransmisión TCP en ms")
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--log', default=None, help="CSV con los tiempos de cada mensaje")
+    parser.add_argument('--duracion', type=float, default=None, help="segundos hasta terminar (por defecto, Ctrl+C)")
+    args = parser.parse_args(argv)
+
+    def condiciones(semilla):
+        return CondicionesRed(
+            retardo=args.retardo / 1000, jitter=args.jitter / 1000, distribucion=args.distribucion,
+            perdida=args.perdida, desorden=args.desorden,
+            ancho_banda=args.ancho_banda * 1000 / 8 if args.ancho_banda else None,
+            rto=args.rto / 1000, rng=random.Random(semilla))
+
+    semilla = args.semilla if args.semilla is not None else random.randrange(2 ** 32)
+    registro = RegistroTiempos(args.log)
+    emulador = EmuladorRed(args.escuchar, args.destino, condiciones(semilla), condiciones(semilla + 1), registro)
+
+    async def ejecutar():
+        await emulador.iniciar()
+        try:
+            if args.duracion is None:
+                await asyncio.Event().wait()
+            await asyncio.sleep(args.duracion)
+        finally:
+            emulador.cerrar()
+
+    try:
+        asyncio.run(ejecutar())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        registro.cerrar()
+        print(f"📊 Emulador (semilla {semilla}):")
+        for linea in registro.resumen():
+            print(f"   {linea}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
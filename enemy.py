@@ -2,18 +2,24 @@ import pygame
 import random
 import time
 import os
+import assets
+from object import Object
 
 class Enemy:
-    def __init__(self, x, y, tamaño, velocidad=2, vida=1):
+    def __init__(self, x, y, tamaño, velocidad=2, vida=1, reloj=None, rng=None):
+        # Reloj (segundos) y generador aleatorio inyectables para simulación determinista
+        self.reloj = reloj or time.time
+        self.rng = rng or random
+        
         self.x = x
         self.y = y
         self.tamaño = tamaño
         self.velocidad = velocidad
         self.vida = vida
         self.vida_max = vida
-        self.direccion = random.choice(['up', 'down', 'left', 'right'])
-        self.tiempo_ultimo_cambio = time.time()
-        self.tiempo_cambio_direccion = random.uniform(1.0, 3.0)  # Cambia dirección cada 1-3 segundos
+        self.direccion = self.rng.choice(['up', 'down', 'left', 'right'])
+        self.tiempo_ultimo_cambio = self.reloj()
+        self.tiempo_cambio_direccion = self.rng.uniform(1.0, 3.0)  # Cambia dirección cada 1-3 segundos
         
         # Rectángulo para colisiones
         self.rect = pygame.Rect(x, y, tamaño, tamaño)
@@ -31,8 +37,12 @@ class Enemy:
         self.tiempo_invencibilidad = 0
     
     def cargar_sprites(self):
-        """Carga los sprites del enemigo"""
-        self.sprites = {
+        """Obtiene los sprites del enemigo (compartidos entre todos los enemigos del mismo tamaño)"""
+        self.sprites = assets.obtener_generado(('enemigo', self.tamaño), self._crear_sprites)
+    
+    def _crear_sprites(self):
+        """Carga los sprites personalizados o crea los sprites por defecto"""
+        sprites = {
             'down': [],
             'up': [],
             'left': [],
@@ -40,34 +50,37 @@ class Enemy:
         }
         
         # Intentar cargar sprites personalizados, sino usar sprites por defecto
-        try:
-            carpeta = 'enemySprites'
-            if os.path.exists(carpeta):
-                for direccion in self.sprites.keys():
-                    for i in range(1, 4):
-                        nombre_archivo = f'enemy_{direccion}_{i}.png'
-                        ruta_imagen = os.path.join(carpeta, nombre_archivo)
-                        if os.path.exists(ruta_imagen):
-                            sprite = pygame.image.load(ruta_imagen).convert_alpha()
-                            sprite = pygame.transform.scale(sprite, (self.tamaño, self.tamaño))
-                            self.sprites[direccion].append(sprite)
-                        else:
-                            raise FileNotFoundError
-            else:
-                raise FileNotFoundError
-        except:
-            # Crear sprites por defecto (círculos rojos)
-            for direccion in self.sprites.keys():
-                for i in range(3):
-                    surf = pygame.Surface((self.tamaño, self.tamaño), pygame.SRCALPHA)
-                    color = (255, 50, 50) if i == 0 else (220, 40, 40) if i == 1 else (200, 30, 30)
-                    pygame.draw.circle(surf, color, (self.tamaño//2, self.tamaño//2), self.tamaño//2 - 2)
-                    # Ojos
-                    pygame.draw.circle(surf, (255, 255, 255), (self.tamaño//3, self.tamaño//3), 4)
-                    pygame.draw.circle(surf, (255, 255, 255), (2*self.tamaño//3, self.tamaño//3), 4)
-                    pygame.draw.circle(surf, (0, 0, 0), (self.tamaño//3, self.tamaño//3), 2)
-                    pygame.draw.circle(surf, (0, 0, 0), (2*self.tamaño//3, self.tamaño//3), 2)
-                    self.sprites[direccion].append(surf)
+        carpeta = 'enemySprites'
+        if os.path.exists(carpeta):
+            completos = True
+            for direccion in sprites.keys():
+                for i in range(1, 4):
+                    nombre_archivo = f'enemy_{direccion}_{i}.png'
+                    ruta_imagen = os.path.join(carpeta, nombre_archivo)
+                    sprite = assets.cargar_imagen(ruta_imagen, (self.tamaño, self.tamaño), opcional=True)
+                    if sprite is None:
+                        completos = False
+                        break
+                    sprites[direccion].append(sprite)
+                if not completos:
+                    break
+            if completos:
+                return sprites
+        
+        # Crear sprites por defecto (círculos rojos)
+        for direccion in sprites.keys():
+            sprites[direccion] = []
+            for i in range(3):
+                surf = pygame.Surface((self.tamaño, self.tamaño), pygame.SRCALPHA)
+                color = (255, 50, 50) if i == 0 else (220, 40, 40) if i == 1 else (200, 30, 30)
+                pygame.draw.circle(surf, color, (self.tamaño//2, self.tamaño//2), self.tamaño//2 - 2)
+                # Ojos
+                pygame.draw.circle(surf, (255, 255, 255), (self.tamaño//3, self.tamaño//3), 4)
+                pygame.draw.circle(surf, (255, 255, 255), (2*self.tamaño//3, self.tamaño//3), 4)
+                pygame.draw.circle(surf, (0, 0, 0), (self.tamaño//3, self.tamaño//3), 2)
+                pygame.draw.circle(surf, (0, 0, 0), (2*self.tamaño//3, self.tamaño//3), 2)
+                sprites[direccion].append(surf)
+        return sprites
     
     def actualizar(self, objetos, bombas, ancho_ventana, alto_ventana):
         """Actualiza el movimiento y estado del enemigo"""
@@ -75,15 +88,15 @@ class Enemy:
             return
         
         # Actualizar invencibilidad
-        if self.invencible and time.time() > self.tiempo_invencibilidad:
+        if self.invencible and self.reloj() > self.tiempo_invencibilidad:
             self.invencible = False
         
         # Cambiar dirección aleatoriamente
-        tiempo_actual = time.time()
+        tiempo_actual = self.reloj()
         if tiempo_actual - self.tiempo_ultimo_cambio > self.tiempo_cambio_direccion:
-            self.direccion = random.choice(['up', 'down', 'left', 'right'])
+            self.direccion = self.rng.choice(['up', 'down', 'left', 'right'])
             self.tiempo_ultimo_cambio = tiempo_actual
-            self.tiempo_cambio_direccion = random.uniform(1.0, 3.0)
+            self.tiempo_cambio_direccion = self.rng.uniform(1.0, 3.0)
         
         # Calcular movimiento futuro
         futuro_x = self.x
@@ -106,12 +119,16 @@ class Enemy:
         futuro_rect = pygame.Rect(futuro_x, futuro_y, self.tamaño, self.tamaño)
         colision_objeto = False
         
-        for obj in objetos:
-            if not obj.destruido and futuro_rect.colliderect(obj.rect):
-                colision_objeto = True
-                # Cambiar dirección al chocar
-                self.direccion = random.choice(['up', 'down', 'left', 'right'])
-                break
+        if objetos is Object.objects:
+            obstaculo = Object.objeto_em_rect(futuro_rect)
+        else:
+            obstaculo = next((obj for obj in objetos
+                              if not obj.destruido and futuro_rect.colliderect(obj.rect)), None)
+        
+        if obstaculo:
+            colision_objeto = True
+            # Cambiar dirección al chocar
+            self.direccion = self.rng.choice(['up', 'down', 'left', 'right'])
         
         # Verificar colisiones con bombas
         colision_bomba = False
@@ -119,7 +136,7 @@ class Enemy:
             if not bomba.explotada and bomba.es_colision_solida(-1):  # -1 para enemigos
                 if futuro_rect.colliderect(bomba.rect):
                     colision_bomba = True
-                    self.direccion = random.choice(['up', 'down', 'left', 'right'])
+                    self.direccion = self.rng.choice(['up', 'down', 'left', 'right'])
                     break
         
         # Mover si no hay colisión
@@ -130,7 +147,7 @@ class Enemy:
             self.rect.y = self.y
         else:
             # Si hay colisión, cambiar dirección inmediatamente
-            self.tiempo_ultimo_cambio = 0
+            self.tiempo_ultimo_cambio = float('-inf')
         
         # Mantener dentro de los límites
         self.x = max(0, min(self.x, ancho_ventana - self.tamaño))
@@ -145,15 +162,16 @@ class Enemy:
             self.ultimo_cambio_animacion = tiempo_actual
     
     def dibujar(self, superficie, tiempo_actual):
-        """Dibuja el enemigo"""
+        """Dibuja el enemigo y retorna el área modificada (incluye la barra de vida)"""
         if not self.activo:
-            return
+            return None
         
         self.actualizar_animacion(tiempo_actual)
+        area = pygame.Rect(self.x, self.y - 7, self.tamaño, self.tamaño + 7)
         
         # Efecto de parpadeo si es invencible
         if self.invencible and (tiempo_actual // 100) % 2 == 0:
-            return
+            return area
         
         try:
             sprite = self.sprites[self.direccion_actual][self.frame_actual]
@@ -179,6 +197,8 @@ class Enemy:
             centro_x = self.x + self.tamaño // 2
             centro_y = self.y + self.tamaño // 2
             pygame.draw.circle(superficie, (255, 0, 0), (centro_x, centro_y), self.tamaño // 2)
+        
+        return area
     
     def recibir_dano(self, cantidad=1):
         """El enemigo recibe daño"""
@@ -187,7 +207,7 @@ class Enemy:
         
         self.vida -= cantidad
         self.invencible = True
-        self.tiempo_invencibilidad = time.time() + 0.5  # 0.5 segundos de invencibilidad
+        self.tiempo_invencibilidad = self.reloj() + 0.5  # 0.5 segundos de invencibilidad
         
         if self.vida <= 0:
             self.activo = False
@@ -1,5 +1,6 @@
 import pygame
 import os
+import assets
 
 class ExitPoint:
     def __init__(self, x, y, tamaño):
@@ -10,13 +11,8 @@ class ExitPoint:
         self.activado = False
         self.tiempo_activacion = 0
         
-        # Cargar sprites
-        self.sprites = {
-            'inactivo': None,
-            'activo': None,
-            'animacion': []
-        }
-        self.cargar_sprites()
+        # Cargar sprites (compartidos entre salidas del mismo tamaño)
+        self.sprites = assets.obtener_generado(('salida', tamaño), self.cargar_sprites)
         
         # Animación
         self.frame_actual = 0
@@ -25,33 +21,30 @@ class ExitPoint:
     
     def cargar_sprites(self):
         """Carga los sprites de la salida"""
-        try:
-            # Intentar cargar sprites personalizados
-            carpeta = 'Object&Bomb_Sprites'
-            
-            # Sprite inactivo
-            ruta_inactivo = os.path.join(carpeta, 'exit_inactive.png')
-            if os.path.exists(ruta_inactivo):
-                self.sprites['inactivo'] = pygame.image.load(ruta_inactivo).convert_alpha()
-                self.sprites['inactivo'] = pygame.transform.scale(self.sprites['inactivo'], 
-                                                                (self.tamaño, self.tamaño))
-            
-            # Sprite activo
-            ruta_activo = os.path.join(carpeta, 'exit_active.png')
-            if os.path.exists(ruta_activo):
-                self.sprites['activo'] = pygame.image.load(ruta_activo).convert_alpha()
-                self.sprites['activo'] = pygame.transform.scale(self.sprites['activo'], 
-                                                               (self.tamaño, self.tamaño))
-            
-            # Sprites de animación
-            for i in range(1, 5):
-                ruta_anim = os.path.join(carpeta, f'exit_anim_{i}.png')
-                if os.path.exists(ruta_anim):
-                    sprite = pygame.image.load(ruta_anim).convert_alpha()
-                    sprite = pygame.transform.scale(sprite, (self.tamaño, self.tamaño))
-                    self.sprites['animacion'].append(sprite)
-        except:
-            pass
+        self.sprites = {
+            'inactivo': None,
+            'activo': None,
+            'animacion': []
+        }
+        
+        # Intentar cargar sprites personalizados
+        carpeta = 'Object&Bomb_Sprites'
+        tamaño = (self.tamaño, self.tamaño)
+        
+        # Sprite inactivo
+        ruta_inactivo = os.path.join(carpeta, 'exit_inactive.png')
+        self.sprites['inactivo'] = assets.cargar_imagen(ruta_inactivo, tamaño, opcional=True)
+        
+        # Sprite activo
+        ruta_activo = os.path.join(carpeta, 'exit_active.png')
+        self.sprites['activo'] = assets.cargar_imagen(ruta_activo, tamaño, opcional=True)
+        
+        # Sprites de animación
+        for i in range(1, 5):
+            ruta_anim = os.path.join(carpeta, f'exit_anim_{i}.png')
+            sprite = assets.cargar_imagen(ruta_anim, tamaño, opcional=True)
+            if sprite:
+                self.sprites['animacion'].append(sprite)
         
         # Crear sprites por defecto si no hay imágenes
         if not self.sprites['inactivo']:
@@ -76,6 +69,8 @@ class ExitPoint:
                 pygame.draw.rect(surf, color, (0, 0, self.tamaño, self.tamaño), 3)
                 pygame.draw.circle(surf, color, (self.tamaño//2, self.tamaño//2), self.tamaño//4 + i*2)
                 self.sprites['animacion'].append(surf)
+        
+        return self.sprites
     
     def activar(self):
         """Activa el punto de salida"""
@@ -94,7 +89,7 @@ class ExitPoint:
                 self.ultimo_cambio_animacion = tiempo_actual
     
     def dibujar(self, superficie, tiempo_actual):
-        """Dibuja el punto de salida"""
+        """Dibuja el punto de salida y retorna el área modificada"""
         self.actualizar_animacion(tiempo_actual)
         
         if self.activado:
@@ -113,6 +108,8 @@ class ExitPoint:
             alpha = 100 + (tiempo_actual // 50) % 155
             brillo.fill((255, 255, 200, alpha))
             superficie.blit(brillo, (self.x, self.y), special_flags=pygame.BLEND_ALPHA_SDL2)
+        
+        return self.rect.copy()
     
     def colisiona_con(self, rect):
         """Verifica colisión con un rectángulo"""
@@ -1,236 +1,83 @@
 import pygame
 import sys
-import time
-import random
-from map import Map
-from player import Player
-from object import Object
-from bomba import Bomba
-from powerup import PowerUpSystem, PowerUpType
-from enemy import Enemy
-from exit_point import ExitPoint
+from player import direccion_desde_teclas
+from dirty_rects import DirtyRects
+from profiler import PerfilFrames
+from simulacion import Simulacion, EntradaJugador, EVENTO_NIVEL_INICIADO, EVENTO_NIVEL_COMPLETADO
+import assets
 
 class Game:
-    def __init__(self):
-        # Configurações da janela
-        self.LARGURA = 1260
-        self.ALTURA = 720
+    # Ticks de simulación como máximo por frame (evita la espiral tras un frame muy lento)
+    MAX_PASOS_POR_FRAME = 5
+
+    def __init__(self, dirty_rects=False, semilla=None):
+        # Configurações da janela (antes de cargar sprites, para que se conviertan al formato de pantalla)
+        self.LARGURA = Simulacion.LARGURA
+        self.ALTURA = Simulacion.ALTURA
         self.JANELA = pygame.display.set_mode((self.LARGURA, self.ALTURA))
-        pygame.display.set_caption("Protótipo Bomber - Nivel 1")
-        
-        # Configurações do tabuleiro
-        self.TILE_SIZE = 20
-        self.COR_CLARA = (0, 140, 0)
-        self.COR_ESCURA = (0, 120, 0)
-        
-        # Configurações do jogador
-        self.PLAYER_TILES = 3
-        self.player_size = self.TILE_SIZE * self.PLAYER_TILES
-        self.player_vel = self.TILE_SIZE * 1.5
-        
-        # NUEVO: Sistema de niveles
-        self.niveles = ["level1", "level2"]  # Puedes añadir más niveles
-        self.nivel_actual = 0
-        self.num_enemigos_base = 3  # Enemigos base por nivel
-        self.enemigos_extra_por_nivel = 1  # Enemigos extra que se añaden por nivel
-        
-        # Inicializar componentes (se reinician en iniciar_nivel)
-        self.mapa = Map(self.LARGURA, self.ALTURA, self.TILE_SIZE, self.COR_CLARA, self.COR_ESCURA)
-        self.jugador = Player(self.LARGURA, self.ALTURA, self.player_size, self.player_vel, id=0)
-        self.jugador.life_max = 3
-        self.jugador.life = 3
-        self.bombas = []
-        
-        # Sistema de power-ups
-        self.powerup_system = PowerUpSystem(probabilidad_spawn=0.35)
-        
-        # NUEVO: Enemigos y punto de salida
-        self.enemigos = []
-        self.enemigos_eliminados = 0
-        self.exit_point = None
+        
+        # Toda la lógica vive en la simulación; Game lee el teclado y dibuja
+        self.sim = Simulacion(semilla=semilla)
+        pygame.display.set_caption(f"Bomberman - Nivel {self.sim.nivel_actual + 1}")
+        self.sim.tomar_eventos()
+        
+        self.player_size = self.sim.player_size
         self.nivel_completado = False
         
-        # Iniciar primer nivel
-        self.iniciar_nivel()
+        # Renderizado por rectángulos sucios (opcional, F5 para alternar)
+        self.modo_dirty_rects = dirty_rects
+        self.dirty = DirtyRects(self.LARGURA, self.ALTURA, (0, 0, self.LARGURA, 60))
+        
+        # Perfilador de frames por fases (F6 muestra el gráfico; CSV al salir si se usó)
+        self.perfil = PerfilFrames()
+        self.sim.perfil = self.perfil
         
         # Controladores de tempo
-        self.move_cooldown = 200  # Tiempo entre movimientos en ms
-        self.last_move_time = pygame.time.get_ticks()
         self.clock = pygame.time.Clock()
         self.tiempo_inicio = pygame.time.get_ticks()
+        self.acumulador = 0.0  # Tiempo real pendiente de simular (segundos)
         
-        # Control de teclas
+        # Entrada del jugador para el próximo tick
+        self.entrada = EntradaJugador()
         self.bomba_presionada = False
         self.tecla_r_presionada = False
-        
-        # Control de teclas para evitar movimiento continuo
-        self.key_pressed = {
-            'up': False,
-            'down': False,
-            'left': False,
-            'right': False
-        }
 
-    def iniciar_nivel(self):
-        """Inicia un nuevo nivel"""
-        print(f"\n=== NIVEL {self.nivel_actual + 1} ===")
-        
-        # Limpiar elementos del nivel anterior
-        self.bombas.clear()
-        self.enemigos.clear()
-        self.enemigos_eliminados = 0
-        self.powerup_system.limpiar()
-        Object.objects.clear()  # Limpiar objetos anteriores
-        
-        # Actualizar título
-        pygame.display.set_caption(f"Bomberman - Nivel {self.nivel_actual + 1}")
-        
-        # Cargar mapa del nivel actual
-        if self.nivel_actual < len(self.niveles):
-            nivel = self.niveles[self.nivel_actual]
-            self.mapa.crear_obstaculos(nivel)
-        else:
-            # Si no hay más niveles, repetir el último
-            nivel = self.niveles[-1]
-            self.mapa.crear_obstaculos(nivel)
-        
-        # Colocar jugador en posición inicial (esquina superior izquierda)
-        self.jugador.x = 60
-        self.jugador.y = 60
-        self.jugador.bomba_colocada = False
-        self.jugador.bomba_actual = None
-        self.jugador.bombas_colocadas_actual = 0
-        
-        # Crear enemigos (número fijo por nivel)
-        self.crear_enemigos()
-        
-        # Crear punto de salida
-        self.crear_punto_salida()
-        
-        # Resetear estado del nivel
-        self.nivel_completado = False
-        
-        print(f"Mapa: {nivel}")
-        print(f"Enemigos: {len(self.enemigos)}")
-        print(f"¡Comienza el nivel {self.nivel_actual + 1}!")
+    # Accesos al estado de la simulación (usados por el HUD y el dibujo)
+    @property
+    def jugador(self):
+        return self.sim.jugador
 
-    def crear_enemigos(self):
-        """Crea un número fijo de enemigos por nivel"""
-        # Calcular número de enemigos para este nivel
-        num_enemigos = self.num_enemigos_base + (self.nivel_actual * self.enemigos_extra_por_nivel)
-        num_enemigos = min(num_enemigos, 8)  # Máximo 8 enemigos
-        
-        for _ in range(num_enemigos):
-            self.spawn_enemigo_aleatorio()
-    
-    def spawn_enemigo_aleatorio(self):
-        """Crea un enemigo en una posición aleatoria válida"""
-        intentos = 0
-        while intentos < 100:
-            # Generar posición aleatoria en la cuadrícula
-            grid_x = random.randint(0, (self.LARGURA // self.player_size) - 1) * self.player_size
-            grid_y = random.randint(0, (self.ALTURA // self.player_size) - 1) * self.player_size
-            
-            # Verificar que no esté en la posición del jugador
-            if abs(grid_x - self.jugador.x) < self.player_size * 2 and abs(grid_y - self.jugador.y) < self.player_size * 2:
-                intentos += 1
-                continue
-            
-            # Verificar que no colisione con objetos no destruidos
-            enemigo_rect = pygame.Rect(grid_x, grid_y, self.player_size, self.player_size)
-            colision = False
-            
-            for obj in Object.objects:
-                if not obj.destruido and enemigo_rect.colliderect(obj.rect):
-                    colision = True
-                    break
-            
-            if not colision:
-                # Crear enemigo con vida progresiva (más difícil cada nivel)
-                vida_base = 1
-                vida_extra = min(self.nivel_actual // 2, 2)  # Máximo +2 de vida
-                vida = vida_base + vida_extra
-                
-                # Velocidad progresiva
-                velocidad_base = 1.0
-                velocidad_extra = min(self.nivel_actual * 0.2, 1.0)  # Máximo +1.0 de velocidad
-                velocidad = velocidad_base + velocidad_extra
-                
-                enemigo = Enemy(grid_x, grid_y, self.player_size, velocidad, vida)
-                self.enemigos.append(enemigo)
-                print(f"👾 Enemigo nivel {self.nivel_actual + 1} apareció en ({grid_x}, {grid_y}) - Vida: {vida}")
-                break
-            
-            intentos += 1
-    
-    def crear_punto_salida(self):
-        """Crea el punto de salida en una posición fija (esquina inferior derecha)"""
-        # Posición fija en esquina inferior derecha
-        grid_x = self.LARGURA - self.player_size * 2
-        grid_y = self.ALTURA - self.player_size * 2
-        
-        # Verificar que no colisione con objetos
-        exit_rect = pygame.Rect(grid_x, grid_y, self.player_size, self.player_size)
-        colision = False
-        
-        for obj in Object.objects:
-            if not obj.destruido and exit_rect.colliderect(obj.rect):
-                colision = True
-                break
-        
-        if not colision:
-            self.exit_point = ExitPoint(grid_x, grid_y, self.player_size)
-            print(f"🚪 Punto de salida en ({grid_x}, {grid_y})")
-        else:
-            # Si hay colisión, buscar posición alternativa cerca
-            print("⚠️ Buscando posición alternativa para la salida...")
-            posiciones_posibles = [
-                (self.player_size * 2, self.ALTURA - self.player_size * 2),  # Esquina inferior izquierda
-                (self.LARGURA // 2 - self.player_size, self.ALTURA - self.player_size * 2),  # Centro abajo
-                (self.player_size * 2, self.player_size * 2),  # Esquina superior izquierda
-            ]
-            
-            for pos_x, pos_y in posiciones_posibles:
-                exit_rect = pygame.Rect(pos_x, pos_y, self.player_size, self.player_size)
-                colision = False
-                
-                for obj in Object.objects:
-                    if not obj.destruido and exit_rect.colliderect(obj.rect):
-                        colision = True
-                        break
-                
-                if not colision:
-                    self.exit_point = ExitPoint(pos_x, pos_y, self.player_size)
-                    print(f"🚪 Punto de salida alternativo en ({pos_x}, {pos_y})")
-                    return
-            
-            # Si no se encontró posición, usar la del jugador
-            self.exit_point = ExitPoint(self.jugador.x, self.jugador.y, self.player_size)
-            print(f"⚠️ Punto de salida en posición del jugador ({self.jugador.x}, {self.jugador.y})")
+    @property
+    def bombas(self):
+        return self.sim.bombas
 
-    def siguiente_nivel(self):
-        """Pasa al siguiente nivel"""
-        print(f"\n🎉 ¡Nivel {self.nivel_actual + 1} completado!")
-        
-        # Estadísticas del nivel
-        enemigos_restantes = len([e for e in self.enemigos if e.activo])
-        print(f"Enemigos eliminados: {self.enemigos_eliminados}")
-        print(f"Enemigos restantes: {enemigos_restantes}")
-        
-        # Pequeña pausa para mostrar mensaje
-        pygame.time.delay(1000)
-        
-        # Pasar al siguiente nivel
-        self.nivel_actual += 1
-        
-        # Si hay más niveles, iniciar el siguiente
-        if self.nivel_actual < len(self.niveles):
-            print(f"\nCargando nivel {self.nivel_actual + 1}...")
-            self.iniciar_nivel()
-        else:
-            # Si no hay más niveles, victoria total
-            print("\n¡HAS COMPLETADO TODOS LOS NIVELES!")
-            self.mostrar_victoria_final()
+    @property
+    def enemigos(self):
+        return self.sim.enemigos
+
+    @property
+    def exit_point(self):
+        return self.sim.exit_point
+
+    @property
+    def powerup_system(self):
+        return self.sim.powerup_system
+
+    @property
+    def mapa(self):
+        return self.sim.mapa
+
+    @property
+    def niveles(self):
+        return self.sim.niveles
+
+    @property
+    def nivel_actual(self):
+        return self.sim.nivel_actual
+
+    @property
+    def enemigos_eliminados(self):
+        return self.sim.enemigos_eliminados
 
     def mostrar_victoria_final(self):
         """Muestra pantalla de victoria final"""
@@ -293,48 +140,21 @@ class Game:
         menu.executar()
 
     def handle_events(self):
-        """Maneja los eventos del juego"""
+        """Maneja los eventos del juego y prepara la entrada del próximo tick"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
             
             if event.type == pygame.KEYDOWN:
-                # Actualizar estado de teclas para movimiento
-                if event.key == pygame.K_w or event.key == pygame.K_UP:
-                    self.key_pressed['up'] = True
-                elif event.key == pygame.K_s or event.key == pygame.K_DOWN:
-                    self.key_pressed['down'] = True
-                elif event.key == pygame.K_a or event.key == pygame.K_LEFT:
-                    self.key_pressed['left'] = True
-                elif event.key == pygame.K_d or event.key == pygame.K_RIGHT:
-                    self.key_pressed['right'] = True
-                
                 # Colocar bomba
                 if event.key == pygame.K_SPACE and not self.bomba_presionada:
-                    if not self.jugador.puede_colocar_bomba():
-                        print("⚠️ Ya tienes una bomba activa - espera a que explote")
-                        return True
-                    
-                    grid_x, grid_y = self.ajustar_a_grid(self.jugador.x, self.jugador.y)
-                    bomba_en_posicion = False
-                    for b in self.bombas:
-                        if not b.explotada and b.x == grid_x and b.y == grid_y:
-                            bomba_en_posicion = True
-                            break
-                    
-                    if not bomba_en_posicion:
-                        nueva_bomba = Bomba(grid_x, grid_y, self.player_size, 
-                                          jugador_id=self.jugador.id,
-                                          rango_explosion=self.jugador.rango_explosion)
-                        self.bombas.append(nueva_bomba)
-                        self.jugador.colocar_bomba(nueva_bomba)
-                        self.bomba_presionada = True
-                        print(f"💣 Bomba colocada en ({grid_x}, {grid_y}) - Rango: {self.jugador.rango_explosion}")
+                    self.entrada.bomba = True
+                    self.bomba_presionada = True
                 
                 # Control remoto
                 if event.key == pygame.K_r and not self.tecla_r_presionada:
                     if self.jugador.tiene_control_remoto:
-                        self.detonar_bombas_remotamente()
+                        self.entrada.detonar = True
                         self.tecla_r_presionada = True
 
                 # Testing
@@ -346,6 +166,17 @@ class Game:
                     self.jugador.heal(self.jugador.life_max)
                     print(f"Player heald! Life: {self.jugador.life}/{self.jugador.life_max}")
                     
+                # Alternar renderizado por rectángulos sucios
+                if event.key == pygame.K_F5:
+                    self.modo_dirty_rects = not self.modo_dirty_rects
+                    self.dirty.invalidar()
+                    print(f"🖼️ Dirty rects: {'ON' if self.modo_dirty_rects else 'OFF'}")
+                
+                # Perfilador de frames
+                if event.key == pygame.K_F6:
+                    self.perfil.alternar()
+                    self.dirty.invalidar()
+                
                 # Debug
                 if event.key == pygame.K_p:
                     print("=== INFO DEL JUEGO ===")
@@ -355,235 +186,90 @@ class Game:
                     print(f"Salida activada: {self.exit_point.activado if self.exit_point else False}")
                     
             if event.type == pygame.KEYUP:
-                # Actualizar estado de teclas para movimiento
-                if event.key == pygame.K_w or event.key == pygame.K_UP:
-                    self.key_pressed['up'] = False
-                elif event.key == pygame.K_s or event.key == pygame.K_DOWN:
-                    self.key_pressed['down'] = False
-                elif event.key == pygame.K_a or event.key == pygame.K_LEFT:
-                    self.key_pressed['left'] = False
-                elif event.key == pygame.K_d or event.key == pygame.K_RIGHT:
-                    self.key_pressed['right'] = False
-                
                 if event.key == pygame.K_SPACE:
                     self.bomba_presionada = False
                 if event.key == pygame.K_r:
                     self.tecla_r_presionada = False
         
+        self.entrada.direccion = direccion_desde_teclas(pygame.key.get_pressed())
         return True
     
-    def ajustar_a_grid(self, x, y):
-        """Ajusta las coordenadas a la cuadrícula"""
-        grid_size = self.player_size
-        grid_x = (x // grid_size) * grid_size
-        grid_y = (y // grid_size) * grid_size
-        return grid_x, grid_y
-    
-    def detonar_bombas_remotamente(self):
-        """Detona todas las bombas del jugador remotamente"""
-        print("🎮 Activando control remoto...")
-        bombas_detonadas = 0
-        
-        for bomba in self.bombas:
-            if not bomba.explotada and bomba.jugador_id == self.jugador.id:
-                bomba.explotar(Object.objects)
-                bombas_detonadas += 1
-        
-        if bombas_detonadas > 0:
-            print(f"💥 ¡{bombas_detonadas} bombas detonadas remotamente!")
-        else:
-            print("⚠️ No hay bombas para detonar")
-    
     def update(self, tiempo_actual):
-        """Actualiza el estado del juego"""
+        """Avanza la simulación tantos ticks fijos como tiempo real haya pasado"""
         # Si el nivel está completado, no actualizar
         if self.nivel_completado:
             return
         
-        # Actualizar movimiento del jugador con cooldown
-        current_time = pygame.time.get_ticks()
-        
-        if current_time - self.last_move_time >= self.move_cooldown:
-            movimiento_solicitado = any([
-                self.key_pressed['up'],
-                self.key_pressed['down'], 
-                self.key_pressed['left'],
-                self.key_pressed['right']
-            ])
-            
-            if movimiento_solicitado:
-                self.jugador.actualizar_movimiento(self.LARGURA, self.ALTURA, self.bombas)
-                self.last_move_time = current_time
-        
-        # Actualizar animación del jugador
-        keys = pygame.key.get_pressed()
-        self.jugador.actualizar_animacion(tiempo_actual, keys)
-        
-        # Actualizar estado de colisión de las bombas
-        for bomba in self.bombas:
-            bomba.actualizar_colision(self.jugador.x, self.jugador.y, self.jugador.id, self.player_size)
-        
-        # Actualizar bombas
-        self.actualizar_bombas()
-        
-        # Verificar colisiones con power-ups
-        jugador_rect = pygame.Rect(self.jugador.x, self.jugador.y, 
-                                 self.player_size, self.player_size)
-        powerups_recogidos = self.powerup_system.verificar_colisiones(jugador_rect, self.jugador)
-        
-        # Aplicar power-ups recogidos
-        for tipo_powerup in powerups_recogidos:
-            self.jugador.aplicar_powerup(tipo_powerup)
-        
-        # Actualizar objetos destruibles
-        Object.atualizar_objetos_destrutiveis(self.bombas)
-        
-        # Actualizar enemigos
-        self.actualizar_enemigos(tiempo_actual)
-        
-        # Verificar colisión con enemigos
-        self.verificar_colision_enemigos()
-        
-        # Verificar si todos los enemigos fueron eliminados
-        if self.exit_point and not self.exit_point.activado:
-            enemigos_vivos = [e for e in self.enemigos if e.activo]
-            if len(enemigos_vivos) == 0:
-                self.exit_point.activar()
-                print("🎉 ¡Todos los enemigos eliminados! La salida está activada.")
-        
-        # Verificar si el jugador llega a la salida
-        if self.exit_point and self.exit_point.activado:
-            if self.exit_point.colisiona_con(jugador_rect):
-                print("🏁 ¡Has llegado a la salida! Pasando al siguiente nivel...")
-                self.siguiente_nivel()
-    
-    def actualizar_enemigos(self, tiempo_actual):
-        """Actualiza todos los enemigos"""
-        enemigos_a_remover = []
-        
-        for enemigo in self.enemigos:
-            if enemigo.activo:
-                enemigo.actualizar(Object.objects, self.bombas, self.LARGURA, self.ALTURA)
-                enemigo.actualizar_animacion(tiempo_actual)
-            else:
-                enemigos_a_remover.append(enemigo)
-        
-        # Remover enemigos inactivos
-        for enemigo in enemigos_a_remover:
-            self.enemigos.remove(enemigo)
-    
-    def verificar_colision_enemigos(self):
-        """Verifica colisiones entre jugador y enemigos"""
-        jugador_rect = pygame.Rect(self.jugador.x, self.jugador.y, 
-                                 self.player_size, self.player_size)
-        
-        for enemigo in self.enemigos:
-            if enemigo.activo and enemigo.colisiona_con(jugador_rect):
-                if self.jugador.take_damage(1):
-                    print(f"👾 ¡Enemigo golpeó al jugador! Vida: {self.jugador.life}")
+        self.acumulador += self.clock.get_time() / 1000
+        pasos = 0
+        while self.acumulador >= self.sim.tick and pasos < self.MAX_PASOS_POR_FRAME:
+            self.sim.paso(self.entrada)
+            self.entrada.limpiar_pulsaciones()
+            self.acumulador -= self.sim.tick
+            pasos += 1
+            with self.perfil.fase('eventos'):
+                self.procesar_eventos()
+            if self.nivel_completado or self.sim.terminado:
                 break
+        
+        if pasos == self.MAX_PASOS_POR_FRAME:
+            self.acumulador = 0.0
     
-    def actualizar_bombas(self):
-        """Actualiza el estado de las bombas"""
-        bombas_a_remover = []
-
-        for bomba in self.bombas:
-            if bomba.debe_explotar():
-                bomba.explotar(Object.objects)
-                bomba.causou_dano = False
-            
-            if bomba.recien_explotada:
-                bomba.recien_explotada = False
-                self.procesar_explosion_destruccion(bomba)
+    def procesar_eventos(self):
+        """Reacciona (en pantalla) a los eventos de la simulación"""
+        for tipo, datos in self.sim.tomar_eventos():
+            if tipo == EVENTO_NIVEL_COMPLETADO:
+                # Pequeña pausa para mostrar el último frame del nivel
+                pygame.time.delay(1000)
             
-            # Verificar daño a enemigos
-            if bomba.explotada and bomba.explosion_activa() and not bomba.causou_dano:
-                self.verificar_dano_enemigos(bomba)
-
-            if bomba.explosion_activa():
-                player_rect = pygame.Rect(self.jugador.x, self.jugador.y,
-                                        self.player_size, self.player_size)
-
-                if not getattr(bomba, "causou_dano", False):
-                    for rect in bomba.explosion_tiles:
-                        if player_rect.colliderect(rect):
-                            self.jugador.take_damage(1)
-                            bomba.causou_dano = True
-                            print(f"🔥 Jogador atingido pela explosão! Vida: {self.jugador.life}")
-                            break
-
-            if bomba.explotada and not bomba.explosion_activa():
-                bombas_a_remover.append(bomba)
-                # Notificar al jugador que su bomba fue destruida
-                self.jugador.bomba_destruida()
-
-        for bomba in bombas_a_remover:
-            self.bombas.remove(bomba)
-    
-    def verificar_dano_enemigos(self, bomba):
-        """Verifica si la explosión daña a los enemigos"""
-        for enemigo in self.enemigos:
-            if enemigo.activo:
-                for rect in bomba.explosion_tiles:
-                    if enemigo.rect.colliderect(rect):
-                        if enemigo.recibir_dano(1):
-                            print(f"💥 ¡Enemigo eliminado!")
-                            self.enemigos_eliminados += 1
-                        bomba.causou_dano = True
-                        break
+            elif tipo == EVENTO_NIVEL_INICIADO:
+                pygame.display.set_caption(f"Bomberman - Nivel {datos['nivel'] + 1}")
+                self.dirty.invalidar()
+        
+        if self.sim.victoria and not self.nivel_completado:
+            self.mostrar_victoria_final()
     
-    def procesar_explosion_destruccion(self, bomba):
-        """Procesa la destrucción de objetos por una explosión"""
-        objetos_destruidos = []
-        
-        for obj in Object.objects:
-            if obj.destrutivel and not obj.destruido:
-                for rect in bomba.explosion_tiles:
-                    if obj.rect.colliderect(rect):
-                        obj.destruido = True
-                        objetos_destruidos.append(obj)
-                        print(f"💥 Objeto destruido en ({obj.rect.x}, {obj.rect.y})")
-                        
-                        # Intentar spawnear power-up
-                        self.powerup_system.intentar_spawn(
-                            obj.rect.x, obj.rect.y, 
-                            self.player_size
-                        )
-                        break
-        
-        return objetos_destruidos
+    def clave_hud(self):
+        """Valores que muestra el HUD (si no cambian, no hace falta redibujarlo)"""
+        return (
+            self.jugador.life,
+            self.jugador.bombas_colocadas_actual,
+            self.jugador.max_bombas,
+            self.jugador.rango_explosion,
+            self.nivel_actual,
+            len([e for e in self.enemigos if e.activo]),
+            self.exit_point.activado if self.exit_point else None,
+            self.jugador.tiene_escudo,
+            self.jugador.tiene_control_remoto,
+            self.jugador.bomba_colocada
+        )
     
     def draw_lives(self):
         """Dibuja interfaz compacta en 60px de altura"""
         # Fondo semitransparente para toda la franja superior
-        hud_bg = pygame.Surface((self.LARGURA, 60), pygame.SRCALPHA)
-        hud_bg.fill((0, 0, 0, 180))
+        hud_bg = assets.obtener_panel((self.LARGURA, 60), (0, 0, 0, 180))
         self.JANELA.blit(hud_bg, (0, 0))
         
-        font = pygame.font.Font(None, 24)
-        font_small = pygame.font.Font(None, 20)
-        
         # Vida del jugador (izquierda)
-        vida_text = font.render(f"Lives {self.jugador.life}", True, (255, 100, 100))
+        vida_text = assets.renderizar_texto(f"Lives {self.jugador.life}", 24, (255, 100, 100))
         self.JANELA.blit(vida_text, (10, 10))
         
         # Bombas disponibles (debajo de vida)
-        bombas_text = font_small.render(f"Bombs {self.jugador.bombas_colocadas_actual}/{self.jugador.max_bombas}", 
-                                    True, (220, 220, 220))
+        bombas_text = assets.renderizar_texto(f"Bombs {self.jugador.bombas_colocadas_actual}/{self.jugador.max_bombas}", 20, (220, 220, 220))
         self.JANELA.blit(bombas_text, (10, 35))
         
         # Rango explosión (al lado de bombas)
-        rango_text = font_small.render(f"Lvl {self.jugador.rango_explosion}", True, (255, 150, 50))
+        rango_text = assets.renderizar_texto(f"Lvl {self.jugador.rango_explosion}", 20, (255, 150, 50))
         self.JANELA.blit(rango_text, (80, 35))
         
         # Nivel actual (centro superior)
-        nivel_text = font.render(f"Level {self.nivel_actual + 1}/{len(self.niveles)}", True, (255, 215, 0))
+        nivel_text = assets.renderizar_texto(f"Level {self.nivel_actual + 1}/{len(self.niveles)}", 24, (255, 215, 0))
         nivel_rect = nivel_text.get_rect(center=(self.LARGURA//2, 20))
         self.JANELA.blit(nivel_text, nivel_rect)
         
         # Enemigos restantes (centro inferior)
         enemigos_vivos = len([e for e in self.enemigos if e.activo])
-        enemigos_text = font_small.render(f"Enemies: {enemigos_vivos}", True, (255, 150, 150))
+        enemigos_text = assets.renderizar_texto(f"Enemies: {enemigos_vivos}", 20, (255, 150, 150))
         enemigos_rect = enemigos_text.get_rect(center=(self.LARGURA//2, 40))
         self.JANELA.blit(enemigos_text, enemigos_rect)
         
@@ -591,7 +277,7 @@ class Game:
         if self.exit_point:
             estado_icon = "Salida Abierta" if self.exit_point.activado else "Salida Cerrada"
             estado_color = (0, 255, 100) if self.exit_point.activado else (255, 100, 100)
-            estado_text = font.render(f" {estado_icon}", True, estado_color)
+            estado_text = assets.renderizar_texto(f" {estado_icon}", 24, estado_color)
             estado_rect = estado_text.get_rect(right=self.LARGURA - 10, top=10)
             self.JANELA.blit(estado_text, estado_rect)
         
@@ -600,62 +286,98 @@ class Game:
         icon_spacing = 30
         
         if self.jugador.tiene_escudo:
-            escudo_text = font_small.render("🛡️", True, (100, 180, 255))
+            escudo_text = assets.renderizar_texto("🛡️", 20, (100, 180, 255))
             escudo_rect = escudo_text.get_rect(right=self.LARGURA - 10, top=y_offset)
             self.JANELA.blit(escudo_text, escudo_rect)
             y_offset += icon_spacing
         
         if self.jugador.tiene_control_remoto:
-            control_text = font_small.render("🎮", True, (180, 50, 230))
+            control_text = assets.renderizar_texto("🎮", 20, (180, 50, 230))
             control_rect = control_text.get_rect(right=self.LARGURA - 10, top=y_offset)
             self.JANELA.blit(control_text, control_rect)
         
         # Indicador de bomba activa (solo cuando hay bomba)
         if self.jugador.bomba_colocada:
-            bomba_indicator = pygame.Surface((60, 4), pygame.SRCALPHA)
-            bomba_indicator.fill((255, 50, 0, 200))
+            bomba_indicator = assets.obtener_panel((60, 4), (255, 50, 0, 200))
             self.JANELA.blit(bomba_indicator, (self.LARGURA//2 - 30, 56))
-
-    def render(self):
-        """Renderiza todos los elementos del juego"""
-        # 1. Dibujar mapa
-        self.mapa.dibujar(self.JANELA)
         
-        # 2. Dibujar objetos no destruidos
-        for obj in Object.objects:
-            if not obj.destruido:
-                obj.draw(self.JANELA)
+        return pygame.Rect(0, 0, self.LARGURA, 60)
+
+    def dibujar_entidades(self):
+        """Dibuja todo lo que está sobre el mapa y retorna las áreas modificadas"""
+        areas = []
         
         # 3. Dibujar power-ups
-        self.powerup_system.dibujar_todos(self.JANELA)
+        areas.extend(self.powerup_system.dibujar_todos(self.JANELA))
         
         # 4. Dibujar bombas
         for bomba in self.bombas:
-            bomba.dibujar(self.JANELA)
+            areas.append(bomba.dibujar(self.JANELA))
         
         # 5. Dibujar enemigos
         tiempo_actual = pygame.time.get_ticks() - self.tiempo_inicio
         for enemigo in self.enemigos:
-            enemigo.dibujar(self.JANELA, tiempo_actual)
+            areas.append(enemigo.dibujar(self.JANELA, tiempo_actual))
         
         # 6. Dibujar punto de salida
         if self.exit_point:
-            self.exit_point.dibujar(self.JANELA, tiempo_actual)
+            areas.append(self.exit_point.dibujar(self.JANELA, tiempo_actual))
         
         # 7. Dibujar jugador
-        self.jugador.dibujar(self.JANELA, tiempo_actual)
-        
-        # 8. Dibujar HUD
-        self.draw_lives()
+        areas.append(self.jugador.dibujar(self.JANELA, tiempo_actual))
         
-        # 9. Indicador de bomba activa
+        # Indicador de bomba activa
         if self.jugador.bomba_colocada:
-            font = pygame.font.Font(None, 24)
-            text = font.render("¡Bomba activa!", True, (255, 255, 0))
+            text = assets.renderizar_texto("¡Bomba activa!", 24, (255, 255, 0))
             text_rect = text.get_rect(center=(self.LARGURA // 2, self.ALTURA - 70))
-            self.JANELA.blit(text, text_rect)
+            areas.append(self.JANELA.blit(text, text_rect))
         
-        pygame.display.update()
+        return areas
+
+    def render(self):
+        """Renderiza todos los elementos del juego"""
+        if self.modo_dirty_rects:
+            self.render_dirty_rects()
+            return
+        
+        # 1-2. Dibujar mapa y objetos (capas pre-renderizadas)
+        with self.perfil.fase('render_mapa'):
+            self.mapa.dibujar(self.JANELA)
+        
+        # 3-7. Power-ups, bombas, enemigos, salida y jugador
+        with self.perfil.fase('render_entidades'):
+            self.dibujar_entidades()
+        
+        # 8. Dibujar HUD
+        with self.perfil.fase('render_hud'):
+            self.draw_lives()
+            self.dibujar_perfil()
+        
+        with self.perfil.fase('presentar'):
+            pygame.display.update()
+    
+    def render_dirty_rects(self):
+        """Renderiza restaurando y presentando solo las áreas que cambiaron"""
+        with self.perfil.fase('render_mapa'):
+            parcheados = self.mapa.actualizar_capas()
+            hud_sucio = self.dirty.comenzar_frame(self.JANELA, self.mapa.capa_nivel,
+                                                  parcheados, self.clave_hud())
+        
+        with self.perfil.fase('render_entidades'):
+            self.dirty.agregar(self.dibujar_entidades())
+        
+        with self.perfil.fase('render_hud'):
+            if hud_sucio:
+                self.dirty.agregar(self.draw_lives())
+            self.dirty.agregar(self.dibujar_perfil())
+        
+        with self.perfil.fase('presentar'):
+            self.dirty.presentar(self.JANELA)
+    
+    def dibujar_perfil(self):
+        """Dibuja el overlay del perfilador (esquina inferior izquierda) si está visible"""
+        alto = self.perfil.TAMAÑO_OVERLAY[1]
+        return self.perfil.dibujar(self.JANELA, 10, self.ALTURA - alto - 10)
         
     def game_over(self, victoria=False):
         """Muestra pantalla de fin de juego compacta"""
@@ -713,6 +435,13 @@ class Game:
 
     def run(self):
         """Bucle principal del juego"""
+        try:
+            return self._bucle()
+        finally:
+            self.perfil.volcar_si_usado()
+    
+    def _bucle(self):
+        """Frames del juego hasta salir o perder"""
         running = True
         while running:
             tiempo_actual = pygame.time.get_ticks() - self.tiempo_inicio
@@ -725,9 +454,12 @@ class Game:
                         return False
                 continue
             
-            running = self.handle_events()
+            self.perfil.comenzar_frame()
+            with self.perfil.fase('entrada'):
+                running = self.handle_events()
             self.update(tiempo_actual)
             self.render()
+            self.perfil.terminar_frame()
             self.clock.tick(60)
             
             # **CORRECCIÓN: Verificar si el jugador murió**
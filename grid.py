@@ -0,0 +1,135 @@
+# Estados posibles de una celda del grid
+CELDA_VACIA = 0
+CELDA_SOLIDA = 1         # Objeto indestrutível
+CELDA_DESTRUCTIBLE = 2   # Objeto destrutível intacto
+CELDA_DESTRUIDA = 3      # Objeto destrutível ya destruido
+
+class GridOcupacion:
+    """Índice de ocupación por celdas para consultas de colisión en O(1)"""
+
+    def __init__(self, ancho, alto, tamaño_celda):
+        self.ancho = ancho
+        self.alto = alto
+        self.tamaño_celda = tamaño_celda
+        self.columnas = (ancho + tamaño_celda - 1) // tamaño_celda
+        self.filas = (alto + tamaño_celda - 1) // tamaño_celda
+
+        # Estado y objetos por celda (listas planas indexadas por fila * columnas + columna)
+        self.estados = bytearray(self.columnas * self.filas)
+        self.celdas = [None] * (self.columnas * self.filas)
+
+    def _indice(self, cx, cy):
+        return cy * self.columnas + cx
+
+    def en_limites(self, cx, cy):
+        """Verifica si la celda existe dentro del grid"""
+        return 0 <= cx < self.columnas and 0 <= cy < self.filas
+
+    def celda_de(self, x, y):
+        """Convierte coordenadas en píxeles a coordenadas de celda"""
+        return int(x) // self.tamaño_celda, int(y) // self.tamaño_celda
+
+    def _celdas_de_rect(self, rect):
+        """Rango de celdas que cubre un rectángulo (recortado a los límites)"""
+        t = self.tamaño_celda
+        cx0 = max(0, rect.left // t)
+        cy0 = max(0, rect.top // t)
+        cx1 = min(self.columnas - 1, (rect.right - 1) // t)
+        cy1 = min(self.filas - 1, (rect.bottom - 1) // t)
+        return cx0, cy0, cx1, cy1
+
+    def _recalcular_estado(self, indice):
+        """Recalcula el estado de una celda a partir de sus objetos"""
+        objetos = self.celdas[indice]
+        estado = CELDA_VACIA
+        if objetos:
+            for obj in objetos:
+                if not obj.destruido:
+                    if not obj.destrutivel:
+                        estado = CELDA_SOLIDA
+                        break
+                    estado = CELDA_DESTRUCTIBLE
+                elif estado == CELDA_VACIA:
+                    estado = CELDA_DESTRUIDA
+        self.estados[indice] = estado
+
+    def registrar(self, obj):
+        """Registra un objeto en todas las celdas que cubre"""
+        cx0, cy0, cx1, cy1 = self._celdas_de_rect(obj.rect)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                indice = self._indice(cx, cy)
+                if self.celdas[indice] is None:
+                    self.celdas[indice] = [obj]
+                else:
+                    self.celdas[indice].append(obj)
+                self._recalcular_estado(indice)
+
+    def marcar_destruido(self, obj):
+        """Actualiza de forma incremental las celdas de un objeto destruido"""
+        cx0, cy0, cx1, cy1 = self._celdas_de_rect(obj.rect)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                self._recalcular_estado(self._indice(cx, cy))
+
+    def marcar_restaurado(self, obj):
+        """Actualiza las celdas de un objeto que vuelve a estar intacto"""
+        cx0, cy0, cx1, cy1 = self._celdas_de_rect(obj.rect)
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                self._recalcular_estado(self._indice(cx, cy))
+
+    def estado_en(self, cx, cy):
+        """Retorna el estado de la celda (cx, cy)"""
+        if not self.en_limites(cx, cy):
+            return CELDA_VACIA
+        return self.estados[self._indice(cx, cy)]
+
+    def objeto_en(self, cx, cy):
+        """Retorna el objeto no destruido en la celda (cx, cy), o None"""
+        if not self.en_limites(cx, cy):
+            return None
+        objetos = self.celdas[self._indice(cx, cy)]
+        if objetos:
+            for obj in objetos:
+                if not obj.destruido:
+                    return obj
+        return None
+
+    def objeto_en_pixel(self, x, y):
+        """Retorna el objeto no destruido que contiene el píxel (x, y)"""
+        cx, cy = self.celda_de(x, y)
+        return self.objeto_en(cx, cy)
+
+    def objetos_en_rect(self, rect):
+        """Retorna los objetos no destruidos que se superponen con el rectángulo"""
+        encontrados = []
+        cx0, cy0, cx1, cy1 = self._celdas_de_rect(rect)
+        for cy in range(cy0, cy1 + 1):
+            fila = cy * self.columnas
+            for cx in range(cx0, cx1 + 1):
+                indice = fila + cx
+                if self.estados[indice] in (CELDA_VACIA, CELDA_DESTRUIDA):
+                    continue
+                for obj in self.celdas[indice]:
+                    if not obj.destruido and obj not in encontrados and obj.rect.colliderect(rect):
+                        encontrados.append(obj)
+        return encontrados
+
+    def colision(self, rect):
+        """Retorna el primer objeto no destruido que se superpone con el rectángulo, o None"""
+        cx0, cy0, cx1, cy1 = self._celdas_de_rect(rect)
+        for cy in range(cy0, cy1 + 1):
+            fila = cy * self.columnas
+            for cx in range(cx0, cx1 + 1):
+                indice = fila + cx
+                if self.estados[indice] in (CELDA_VACIA, CELDA_DESTRUIDA):
+                    continue
+                for obj in self.celdas[indice]:
+                    if not obj.destruido and obj.rect.colliderect(rect):
+                        return obj
+        return None
+
+    def hay_colision(self, rect):
+        """Verifica si el rectángulo se superpone con algún objeto no destruido"""
+        return self.colision(rect) is not None
@@ -0,0 +1,80 @@
+from collections import deque
+
+# Interpolación de entidades remotas: en lugar de saltar a cada posición que llega
+# por la red, se dibujan RETRASO segundos en el pasado, entre las dos instantáneas
+# que rodean ese instante. Si las instantáneas se retrasan se extrapola con la
+# última velocidad conocida, como mucho MAX_EXTRAPOLACION segundos.
+#
+# Las marcas de tiempo son del reloj del otro equipo; el desfase con el reloj local
+# se estima como el mínimo (llegada - marca) de las últimas instantáneas, que es la
+# muestra con menos retardo de red.
+
+
+class BufferInstantaneas:
+    """Instantáneas (t, x, y) de una entidad remota, ordenadas por su marca de tiempo"""
+
+    RETRASO = 0.1               # Segundos en el pasado a los que se dibuja
+    MAX_EXTRAPOLACION = 0.1     # Como mucho se adivina esto más allá de la última
+    DISTANCIA_TELEPORTE = 120   # Saltos mayores no se interpolan (reaparición, resync)
+    CAPACIDAD = 32
+    MUESTRAS_DESFASE = 64
+
+    def __init__(self, retraso=RETRASO, max_extrapolacion=MAX_EXTRAPOLACION):
+        self.retraso = retraso
+        self.max_extrapolacion = max_extrapolacion
+        self.instantaneas = deque(maxlen=self.CAPACIDAD)
+        self.muestras_desfase = deque(maxlen=self.MUESTRAS_DESFASE)
+        self.desfase = 0.0      # Reloj local - reloj remoto (incluye el retardo mínimo)
+
+    def __len__(self):
+        return len(self.instantaneas)
+
+    def agregar(self, timestamp, x, y, moviendose, llegada):
+        """Guarda una instantánea; las que llegan fuera de orden se descartan"""
+        if self.instantaneas and timestamp <= self.instantaneas[-1][0]:
+            return False
+        self.instantaneas.append((timestamp, x, y, moviendose))
+        self.muestras_desfase.append(llegada - timestamp)
+        self.desfase = min(self.muestras_desfase)
+        return True
+
+    def limpiar(self):
+        self.instantaneas.clear()
+        self.muestras_desfase.clear()
+
+    def posicion(self, ahora):
+        """Posición (x, y) a dibujar en el instante local ahora, o None si no hay datos"""
+        if not self.instantaneas:
+            return None
+
+        t = ahora - self.desfase - self.retraso
+        primera = self.instantaneas[0]
+        if t <= primera[0]:
+            return primera[1], primera[2]
+
+        ultima = self.instantaneas[-1]
+        if t >= ultima[0]:
+            return self._extrapolar(t)
+
+        # Buscar desde el final: el instante de render casi siempre está entre las últimas
+        for i in range(len(self.instantaneas) - 1, 0, -1):
+            t0, x0, y0, _ = self.instantaneas[i - 1]
+            t1, x1, y1, _ = self.instantaneas[i]
+            if t0 <= t <= t1:
+                if abs(x1 - x0) + abs(y1 - y0) > self.DISTANCIA_TELEPORTE:
+                    return x0, y0
+                f = (t - t0) / (t1 - t0)
+                return x0 + (x1 - x0) * f, y0 + (y1 - y0) * f
+        return ultima[1], ultima[2]
+
+    def _extrapolar(self, t):
+        t1, x1, y1, moviendose = self.instantaneas[-1]
+        if not moviendose or len(self.instantaneas) < 2:
+            return x1, y1
+
+        t0, x0, y0, _ = self.instantaneas[-2]
+        if t1 <= t0 or abs(x1 - x0) + abs(y1 - y0) > self.DISTANCIA_TELEPORTE:
+            return x1, y1
+        adelanto = min(t - t1, self.max_extrapolacion)
+        return (x1 + (x1 - x0) / (t1 - t0) * adelanto,
+                y1 + (y1 - y0) / (t1 - t0) * adelanto)
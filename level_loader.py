@@ -0,0 +1,114 @@
+import pygame
+import os
+import struct
+import hashlib
+from grid import CELDA_VACIA, CELDA_SOLIDA, CELDA_DESTRUCTIBLE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Cores do mapa (RGB) e o tipo de célula que representam
+COR_INDESTRUTIVEL = (0x00, 0x00, 0x00)  # Preto
+COR_DESTRUTIVEL = (0x68, 0xff, 0x00)    # Verde
+
+# Formato do nível compilado: magic, versão, colunas, linhas + 1 byte por célula
+CACHE_FOLDER = os.path.join("Maps", ".cache")
+CACHE_MAGIC = b"BMLV"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("!4sBHH")
+
+
+def _hash_nivel(image_path, ancho, alto, tamaño_celda):
+    """Gera a chave do cache a partir do conteúdo do PNG e da geometria do mapa"""
+    h = hashlib.sha1()
+    with open(image_path, "rb") as f:
+        h.update(f.read())
+    h.update(struct.pack("!HHH", ancho, alto, tamaño_celda))
+    return h.hexdigest()
+
+
+def _indices_amostra(tamaño_destino, tamaño_origem, tamaño_celda, n_celdas):
+    """Pixel da imagem original equivalente ao centro de cada célula na janela escalada"""
+    return [min(tamaño_origem - 1, ((c * tamaño_celda + tamaño_celda // 2) * tamaño_origem) // tamaño_destino)
+            for c in range(n_celdas)]
+
+
+def _classificar(map_image, ancho, alto, tamaño_celda, columnas, linhas):
+    """Classifica todas as células do mapa numa única passada"""
+    largura_img, altura_img = map_image.get_size()
+    xs = _indices_amostra(ancho, largura_img, tamaño_celda, columnas)
+    ys = _indices_amostra(alto, altura_img, tamaño_celda, linhas)
+
+    if numpy is not None:
+        # Passada vetorizada: amostra os centros e compara as cores de uma vez
+        pixels = pygame.surfarray.array3d(map_image)[numpy.ix_(xs, ys)]  # (colunas, linhas, 3)
+        celdas = numpy.full((columnas, linhas), CELDA_VACIA, dtype=numpy.uint8)
+        celdas[numpy.all(pixels == COR_INDESTRUTIVEL, axis=2)] = CELDA_SOLIDA
+        celdas[numpy.all(pixels == COR_DESTRUTIVEL, axis=2)] = CELDA_DESTRUCTIBLE
+        # Guardado por linhas (y, x)
+        return celdas.T.tobytes()
+
+    # Sem NumPy: lê apenas um pixel por célula da imagem na resolução original
+    celdas = bytearray(columnas * linhas)
+    for cy, py in enumerate(ys):
+        for cx, px in enumerate(xs):
+            cor = tuple(map_image.get_at((px, py)))[:3]
+            if cor == COR_INDESTRUTIVEL:
+                celdas[cy * columnas + cx] = CELDA_SOLIDA
+            elif cor == COR_DESTRUTIVEL:
+                celdas[cy * columnas + cx] = CELDA_DESTRUCTIBLE
+    return bytes(celdas)
+
+
+def _ler_cache(cache_path, columnas, linhas):
+    """Lê um nível compilado; retorna None se não existir ou for inválido"""
+    try:
+        with open(cache_path, "rb") as f:
+            dados = f.read()
+    except OSError:
+        return None
+
+    if len(dados) != CACHE_HEADER.size + columnas * linhas:
+        return None
+    magic, versao, cols, lins = CACHE_HEADER.unpack_from(dados)
+    if magic != CACHE_MAGIC or versao != CACHE_VERSION or (cols, lins) != (columnas, linhas):
+        return None
+    return dados[CACHE_HEADER.size:]
+
+
+def _escrever_cache(cache_path, columnas, linhas, celdas):
+    """Grava o nível compilado (falhas de escrita não impedem o jogo)"""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, columnas, linhas))
+            f.write(celdas)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o cache do nível: {e}")
+
+
+def carregar_nivel(image_path, ancho, alto, tamaño_celda, cache_folder=CACHE_FOLDER):
+    """Retorna (colunas, linhas, células) do nível, usando o cache compilado se existir.
+
+    As células vêm em bytes ordenados por linha com os valores CELDA_* do grid.
+    Lança pygame.error / OSError se a imagem não puder ser lida.
+    """
+    # Só entram células cujo centro fica dentro da janela
+    columnas = (ancho - tamaño_celda // 2 - 1) // tamaño_celda + 1
+    linhas = (alto - tamaño_celda // 2 - 1) // tamaño_celda + 1
+
+    chave = _hash_nivel(image_path, ancho, alto, tamaño_celda)
+    cache_path = os.path.join(cache_folder, f"{chave}.lvl")
+
+    celdas = _ler_cache(cache_path, columnas, linhas)
+    if celdas is not None:
+        return columnas, linhas, celdas
+
+    map_image = pygame.image.load(image_path)
+    celdas = _classificar(map_image, ancho, alto, tamaño_celda, columnas, linhas)
+    _escrever_cache(cache_path, columnas, linhas, celdas)
+    return columnas, linhas, celdas
@@ -1,6 +1,8 @@
 import pygame
 import os
 from object import Object
+from grid import GridOcupacion, CELDA_SOLIDA, CELDA_DESTRUCTIBLE
+from level_loader import carregar_nivel
 
 class Map:
     def __init__(self, ancho, alto, tile_size, cor_clara, cor_escura):
@@ -21,8 +23,13 @@ class Map:
             # "level3": "Map_4.png",
             # "level4": "Map_5.png",
         }
+        
+        # Capas pre-renderizadas (se construyen en el primer dibujar de cada nivel)
+        self.capa_estatica = None   # Tablero + bloques indestructibles
+        self.capa_nivel = None      # Capa estática + destructibles (se parchea al destruirlos)
+        self.en_capa = []           # Destructibles dibujados en capa_nivel y aún no borrados
     
-    def dibujar(self, superficie):
+    def dibujar_tablero(self, superficie):
         """Dibuja el mapa estilo ajedrez"""
         for linha in range(0, self.alto, self.tile_size):
             for coluna in range(0, self.ancho, self.tile_size):
@@ -32,9 +39,61 @@ class Map:
                     cor = self.cor_escura
                 pygame.draw.rect(superficie, cor, (coluna, linha, self.tile_size, self.tile_size))
     
+    def construir_capas(self):
+        """Pre-renderiza el tablero y los bloques del nivel actual"""
+        self.capa_estatica = pygame.Surface((self.ancho, self.alto))
+        if pygame.display.get_surface() is not None:
+            self.capa_estatica = self.capa_estatica.convert()
+        
+        self.dibujar_tablero(self.capa_estatica)
+        for obj in Object.objects:
+            if not obj.destruido and not obj.destrutivel:
+                obj.draw(self.capa_estatica)
+        
+        self.capa_nivel = self.capa_estatica.copy()
+        self.en_capa = [obj for obj in Object.objects if not obj.destruido and obj.destrutivel]
+        for obj in self.en_capa:
+            obj.draw(self.capa_nivel)
+    
+    def invalidar_capas(self):
+        """Fuerza la reconstrucción de las capas en el próximo dibujar"""
+        self.capa_estatica = None
+        self.capa_nivel = None
+        self.en_capa = []
+    
+    def actualizar_capas(self):
+        """Borra de la capa del nivel los bloques destruidos desde el último frame.
+        
+        Retorna los rectángulos parcheados.
+        """
+        if self.capa_nivel is None:
+            self.construir_capas()
+            return []
+        
+        # La capa es cosa del render: se comparan los bloques dibujados con su estado
+        # (unas decenas de atributos por frame) en lugar de que el grid lleve la cuenta
+        parcheados = []
+        quedan = []
+        for obj in self.en_capa:
+            if obj.destruido:
+                self.capa_nivel.blit(self.capa_estatica, obj.rect, obj.rect)
+                parcheados.append(obj.rect.copy())
+            else:
+                quedan.append(obj)
+        if parcheados:
+            self.en_capa = quedan
+        return parcheados
+    
+    def dibujar(self, superficie):
+        """Dibuja el tablero y los bloques usando la capa pre-renderizada"""
+        self.actualizar_capas()
+        superficie.blit(self.capa_nivel, (0, 0))
+    
     def crear_obstaculos(self, level_name="level1"):
         """Crea obstáculos a partir da imagem do mapa"""
-        Object.objects.clear()
+        # Novo grid de ocupação: os objetos se registram nele ao serem criados
+        Object.limpar(GridOcupacion(self.ancho, self.alto, self.tile_size * 3))
+        self.invalidar_capas()
         
         if level_name not in self.levels:
             print(f"❌ Nível {level_name} não encontrado! Usando 'level1'.")
@@ -44,40 +103,29 @@ class Map:
         image_path = os.path.join(self.maps_folder, image_filename)
         
         try:
-            # Carrega a imagem do mapa
-            map_image = pygame.image.load(image_path)
-            map_image = pygame.transform.scale(map_image, (self.ancho, self.alto))
+            # Carrega o nível compilado (ou classifica a imagem e grava o cache)
+            tamaño_bloque = self.tile_size * 3
+            columnas, linhas, celdas = carregar_nivel(image_path, self.ancho, self.alto, tamaño_bloque)
             
-            # Converte para uma superfície que podemos ler os pixels
-            map_surface = pygame.Surface((self.ancho, self.alto))
-            map_surface.blit(map_image, (0, 0))
-            
-            # Processa a imagem pixel a pixel (agrupado por tiles)
-            for y in range(0, self.alto, self.tile_size * 3):
-                for x in range(0, self.ancho, self.tile_size * 3):
-                    # Pega la cor del pixel en el centro del tile
-                    pixel_x = x + (self.tile_size * 3) // 2
-                    pixel_y = y + (self.tile_size * 3) // 2
+            for cy in range(linhas):
+                for cx in range(columnas):
+                    tipo = celdas[cy * columnas + cx]
+                    x = cx * tamaño_bloque
+                    y = cy * tamaño_bloque
                     
-                    if 0 <= pixel_x < self.ancho and 0 <= pixel_y < self.alto:
-                        color = map_surface.get_at((pixel_x, pixel_y))
-                        
-                        # Converte a cor para formato hexadecimal para comparação
-                        color_hex = "{:02x}{:02x}{:02x}".format(color.r, color.g, color.b)
-                        
-                        # Cria objetos baseado na cor
-                        if color_hex == "000000":  # Preto - indestrutível
-                            Object(x, y, self.tile_size * 3, self.tile_size * 3, 
-                                  "Object&Bomb_Sprites/OBJ_ND.png", destrutivel=False)
-                        elif color_hex == "68ff00":  # Verde - destrutível
-                            Object(x, y, self.tile_size * 3, self.tile_size * 3, 
-                                  "Object&Bomb_Sprites/OBJ_D.png", destrutivel=True)
+                    # Cria objetos baseado no tipo da célula
+                    if tipo == CELDA_SOLIDA:  # Preto - indestrutível
+                        Object(x, y, tamaño_bloque, tamaño_bloque, 
+                              "Object&Bomb_Sprites/OBJ_ND.png", destrutivel=False)
+                    elif tipo == CELDA_DESTRUCTIBLE:  # Verde - destrutível
+                        Object(x, y, tamaño_bloque, tamaño_bloque, 
+                              "Object&Bomb_Sprites/OBJ_D.png", destrutivel=True)
             
             print(f"✅ Nível '{level_name}' carregado a partir de {image_filename}:")
             print(f"   - {len([obj for obj in Object.objects if not obj.destrutivel])} objetos indestrutíveis")
             print(f"   - {len([obj for obj in Object.objects if obj.destrutivel])} objetos destrutíveis")
             
-        except pygame.error as e:
+        except (pygame.error, OSError) as e:
             print(f"❌ Erro ao carregar imagem do mapa: {e}")
             print(f"📁 Procurando em: {os.path.abspath(image_path)}")
             print("📋 Tentando criar mapa padrão como fallback...")
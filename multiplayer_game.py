@@ -1,65 +1,89 @@
 import pygame
 import sys
 import time
+import random
 import socket
-from map import Map
-from player import Player
+from player import direccion_desde_teclas
 from object import Object
-from bomba import Bomba
 from network import GameNetwork, MessageType
-from powerup import PowerUpSystem, PowerUpType
+from protocolo import aplicar_diferencia, secuencia_posterior
+from interpolacion import BufferInstantaneas
+from powerup import PowerUpType
+from dirty_rects import DirtyRects
+from profiler import PerfilFrames
+from panel_red import PanelRed
+from simulacion import (SimulacionMultijugador, EntradaJugador, EVENTO_BOMBA_COLOCADA,
+                        EVENTO_OBJETO_DESTRUIDO, EVENTO_POWERUP_SPAWNEADO, EVENTO_POWERUP_RECOGIDO)
+import assets
 
 class MultiplayerGame:
-    def __init__(self, is_host=False, host_ip='127.0.0.1'):
+    def __init__(self, is_host=False, host_ip='127.0.0.1', dirty_rects=False, host_autoritativo=True,
+                 telemetria_json=None):
         # Configuración de ventana
         self.LARGURA = 1260
         self.ALTURA = 720
         self.JANELA = pygame.display.set_mode((self.LARGURA, self.ALTURA))
         pygame.display.set_caption(f"Bomberman - {'Host' if is_host else 'Cliente'}")
         
-        # Configuración del tablero
-        self.TILE_SIZE = 20
-        self.COR_CLARA = (0, 140, 0)
-        self.COR_ESCURA = (0, 120, 0)
-        
-        # Configuración de jugadores
-        self.PLAYER_TILES = 3
-        self.player_size = self.TILE_SIZE * self.PLAYER_TILES
-        self.player_vel = self.TILE_SIZE * 1.5
-        
         # Red - MEJORADO: Con configuración optimizada
         self.is_host = is_host
         self.player_id = 1 if is_host else 2
+        
+        # "ip:puerto" elige el puerto (por ejemplo, el de emulador_red.py)
+        host_ip, _, puerto = host_ip.partition(':')
         self.host_ip = host_ip
         
-        # Intentar puertos alternativos si 4040 falla
-        port = self._get_available_port(4040)
-        self.network = GameNetwork(is_host=is_host, host_ip=host_ip, port=port)
+        # El host prueba puertos alternativos si 4040 está ocupado; el cliente no: el
+        # puerto libre en su equipo no dice nada del puerto en que escucha el host
+        if puerto:
+            port = int(puerto)
+        else:
+            port = self._get_available_port(4040) if is_host else 4040
+        self.network = GameNetwork(is_host=is_host, host_ip=host_ip, port=port,
+                                   telemetria_json=telemetria_json)
         self.network_initialized = False
         
-        # Mapa
-        self.mapa = Map(self.LARGURA, self.ALTURA, self.TILE_SIZE, self.COR_CLARA, self.COR_ESCURA)
-        
-        # Jugadores
-        self.local_player = self.create_player(is_local=True)
-        self.remote_player = self.create_player(is_local=False)
-        
-        # Posiciones iniciales
-        self.set_initial_positions()
-        
-        # Bombas
-        self.local_bombs = []
-        self.remote_bombs = []
-        
-        # Sistema de power-ups
-        self.powerup_system = PowerUpSystem(probabilidad_spawn=0.35)
-        
-        # Objetos (compartidos)
-        self.mapa.crear_obstaculos("level2")
-        
-        # Controladores - MEJORADO: Timing optimizado
-        self.move_delay = 100  # ms entre movimientos
-        self.last_move_time = 0
+        # Simulación compartida (mapa, jugadores, bombas y power-ups). Usa el reloj de la
+        # partida (el del host) porque los tiempos de las bombas viajan entre ambos equipos.
+        # El host elige nivel y semilla y los propone en el saludo; el cliente los adopta.
+        self.sim = SimulacionMultijugador(nivel="level2", reloj=self.network.reloj_partida,
+                                          semilla=random.getrandbits(32) if is_host else None)
+        self.network.nivel, self.network.semilla = self.sim.nivel, self.sim.semilla or 0
+        self.player_size = self.sim.player_size
+        self.mapa = self.sim.mapa
+        self.powerup_system = self.sim.powerup_system
+        
+        # Jugadores (la simulación los coloca en sus posiciones iniciales)
+        self.local_player = self.sim.jugadores[self.player_id]
+        self.remote_player = self.sim.jugadores[2 if is_host else 1]
+        self.aplicar_tinte_remoto(self.remote_player)
+        self.remote_players = {self.remote_player.id: self.remote_player}
+        
+        # Contra un servidor dedicado (servidor.py) hay hasta N jugadores remotos;
+        # remote_player sigue siendo uno de ellos para el HUD y el fin de partida
+        self.dedicado = False
+        
+        # Último keyframe del jugador remoto: los deltas se aplican sobre él
+        self.estado_remoto = None
+        self.keyframe_remoto = None
+        
+        # Los jugadores remotos se dibujan ~100 ms en el pasado, interpolados entre estados
+        self.interpolaciones = {self.remote_player.id: BufferInstantaneas()}
+        
+        # Modo autoritativo: el host simula a los dos jugadores (golpes, power-ups) y
+        # el cliente solo envía entradas numeradas, predice su movimiento y lo corrige
+        # con el estado del host reaplicando las entradas que este aún no confirmó
+        self.autoritativo = host_autoritativo
+        self.secuencia_entrada = 0
+        self.entradas_pendientes = []       # Cliente: (seq, dirección) sin confirmar
+        self.comandos_remotos = []          # Host: (seq, datos) recibidos del cliente
+        self.ack_remoto = 0                 # Host: última entrada del cliente aplicada
+        self.ultimo_estado_autoritativo = None
+        
+        # Entrada del jugador local para el próximo tick
+        self.entrada = EntradaJugador()
+        
+        # Controladores
         self.clock = pygame.time.Clock()
         self.tiempo_inicio = pygame.time.get_ticks()
         self.bomba_presionada = False
@@ -74,6 +98,7 @@ class MultiplayerGame:
         # Para throttling inteligente
         self.last_player_position = (0, 0)
         self.position_change_threshold = 5  # Píxeles mínimo para considerar movimiento
+        self.estaba_moviendose = False
         
         # Estado del juego
         self.game_running = True
@@ -81,6 +106,17 @@ class MultiplayerGame:
         self.connection_start_time = time.time()
         self.connection_timeout = 60  # 60 segundos máximo
         
+        # Renderizado por rectángulos sucios (opcional, F5 para alternar)
+        self.modo_dirty_rects = dirty_rects
+        self.dirty = DirtyRects(self.LARGURA, self.ALTURA, (0, 0, self.LARGURA, 60))
+        
+        # Perfilador de frames por fases (F6 muestra el gráfico; CSV al salir si se usó)
+        self.perfil = PerfilFrames()
+        self.sim.perfil = self.perfil
+        
+        # Panel de telemetría de red (F3)
+        self.panel_red = PanelRed(self.network)
+        
         # Estadísticas
         self.network_stats = {
             'player_states_sent': 0,
@@ -159,41 +195,29 @@ class MultiplayerGame:
         self.game_running = False
         return False
     
-    def set_initial_positions(self):
-        """Establece posiciones iniciales de los jugadores"""
-        if self.is_host:
-            self.local_player.x = 60
-            self.local_player.y = 60
-            self.remote_player.x = self.LARGURA - 120
-            self.remote_player.y = 60
-        else:
-            self.local_player.x = self.LARGURA - 120
-            self.local_player.y = 60
-            self.remote_player.x = 60
-            self.remote_player.y = 60
-    
-    def create_player(self, is_local=True):
-        """Crea un jugador local o remoto"""
-        player = Player(self.LARGURA, self.ALTURA, self.player_size, self.player_vel)
-        player.id = 1 if (is_local and self.is_host) or (not is_local and not self.is_host) else 2
-        
-        if not is_local:
-            # Crear copia de sprites con tinte azul para jugador remoto
-            remote_sprites = {}
-            for direction in self.local_player.sprites:
-                remote_sprites[direction] = []
-                for sprite in self.local_player.sprites[direction]:
-                    sprite_copy = sprite.copy()
-                    # Añadir overlay azul
-                    blue_overlay = pygame.Surface(sprite_copy.get_size())
-                    blue_overlay.fill((100, 100, 255))
-                    blue_overlay.set_alpha(100)
-                    sprite_copy.blit(blue_overlay, (0, 0))
-                    remote_sprites[direction].append(sprite_copy)
-            
-            player.sprites = remote_sprites
-        
-        return player
+    @property
+    def local_bombs(self):
+        return self.sim.bombas_de(remotas=False)
+    
+    @property
+    def remote_bombs(self):
+        return self.sim.bombas_de(remotas=True)
+    
+    def aplicar_tinte_remoto(self, player):
+        """Sustituye los sprites del jugador remoto por una copia con tinte azul"""
+        remote_sprites = {}
+        for direction in player.sprites:
+            remote_sprites[direction] = []
+            for sprite in player.sprites[direction]:
+                sprite_copy = sprite.copy()
+                # Añadir overlay azul
+                blue_overlay = pygame.Surface(sprite_copy.get_size())
+                blue_overlay.fill((100, 100, 255))
+                blue_overlay.set_alpha(100)
+                sprite_copy.blit(blue_overlay, (0, 0))
+                remote_sprites[direction].append(sprite_copy)
+        
+        player.sprites = remote_sprites
     
     def handle_events(self):
         """Maneja los eventos del juego"""
@@ -208,7 +232,7 @@ class MultiplayerGame:
                 # Control remoto - detonar bombas
                 if event.key == pygame.K_r and not self.tecla_r_presionada:
                     if self.local_player.tiene_control_remoto:
-                        self.detonar_bombas_remotamente()
+                        self.entrada.detonar = True
                         self.tecla_r_presionada = True
                 
                 # Testing (solo local)
@@ -222,7 +246,10 @@ class MultiplayerGame:
                     
                 # Debug: mostrar estadísticas de red
                 if event.key == pygame.K_F3:
-                    self._show_network_debug()
+                    self.panel_red.alternar()
+                    self.dirty.invalidar()
+                    if self.panel_red.visible:
+                        self._show_network_debug()
                     
                 # Debug: mostrar info de power-ups
                 if event.key == pygame.K_p:
@@ -232,6 +259,17 @@ class MultiplayerGame:
                 if event.key == pygame.K_F4:
                     self._show_game_stats()
                 
+                # Alternar renderizado por rectángulos sucios
+                if event.key == pygame.K_F5:
+                    self.modo_dirty_rects = not self.modo_dirty_rects
+                    self.dirty.invalidar()
+                    print(f"🖼️ Dirty rects: {'ON' if self.modo_dirty_rects else 'OFF'}")
+                
+                # Perfilador de frames
+                if event.key == pygame.K_F6:
+                    self.perfil.alternar()
+                    self.dirty.invalidar()
+                
                 # Salir durante espera
                 if event.key == pygame.K_ESCAPE:
                     if self.waiting_for_connection:
@@ -259,6 +297,14 @@ class MultiplayerGame:
         print(f"Mensajes recibidos: {self.network.stats['messages_received']}")
         print(f"Errores: {self.network.stats['connection_errors']}")
         print(f"Tiempo sin heartbeat: {time.time() - self.network.last_heartbeat_received:.1f}s")
+        reloj = self.network.reloj
+        if reloj.sincronizado:
+            print(f"RTT: {reloj.rtt * 1000:.1f} ms (mínimo {reloj.rtt_minimo * 1000:.1f} ms), "
+                  f"jitter: {reloj.jitter * 1000:.1f} ms")
+            print(f"Desfase de reloj con el otro equipo: {reloj.desfase * 1000:+.1f} ms "
+                  f"({len(reloj.muestras)} muestras)")
+        else:
+            print("RTT: sin muestras todavía")
         
         # Estadísticas propias
         print(f"Player states enviados: {self.network_stats['player_states_sent']}")
@@ -276,12 +322,13 @@ class MultiplayerGame:
         print(f"  Velocidad boost: {self.local_player.velocidad_boost:.1f}")
         print(f"  Escudo activo: {self.local_player.tiene_escudo}")
         print(f"  Control remoto: {self.local_player.tiene_control_remoto}")
-        print(f"Jugador Remoto (ID: {self.remote_player.id}):")
-        print(f"  Max bombas: {self.remote_player.max_bombas}")
-        print(f"  Rango explosión: {self.remote_player.rango_explosion}")
-        print(f"  Velocidad boost: {self.remote_player.velocidad_boost:.1f}")
-        print(f"  Escudo activo: {self.remote_player.tiene_escudo}")
-        print(f"  Control remoto: {self.remote_player.tiene_control_remoto}")
+        for jugador in self.remote_players.values():
+            print(f"Jugador Remoto (ID: {jugador.id}):")
+            print(f"  Max bombas: {jugador.max_bombas}")
+            print(f"  Rango explosión: {jugador.rango_explosion}")
+            print(f"  Velocidad boost: {jugador.velocidad_boost:.1f}")
+            print(f"  Escudo activo: {jugador.tiene_escudo}")
+            print(f"  Control remoto: {jugador.tiene_control_remoto}")
     
     def _show_game_stats(self):
         """Muestra estadísticas del juego"""
@@ -294,140 +341,58 @@ class MultiplayerGame:
         print(f"Tiempo jugado: {(pygame.time.get_ticks() - self.tiempo_inicio) / 1000:.1f}s")
     
     def place_bomb(self):
-        """Coloca una bomba en la posición actual"""
+        """Pide a la simulación colocar una bomba en el próximo tick"""
         if not self.network.is_connected():
             print("⚠️ No conectado - no se puede colocar bomba")
             return
         
-        # Verificar si el jugador ya tiene una bomba activa
-        if not self.local_player.puede_colocar_bomba():
-            print("⚠️ Ya tienes una bomba activa - espera a que explote")
-            return
-        
-        grid_x, grid_y = self.ajustar_a_grid(self.local_player.x, self.local_player.y)
-        
-        # Verificar si ya hay bomba en esa posición (de cualquier jugador)
-        bomba_existente = False
-        for bomba in self.local_bombs + self.remote_bombs:
-            if bomba.x == grid_x and bomba.y == grid_y and not bomba.explotada:
-                bomba_existente = True
-                break
-        
-        if not bomba_existente:
-            # Crear la bomba localmente
-            nueva_bomba = Bomba(grid_x, grid_y, self.player_size, 
-                              jugador_id=self.player_id,
-                              rango_explosion=self.local_player.rango_explosion)
-            nueva_bomba.es_remota = False
-            self.local_bombs.append(nueva_bomba)
-            
-            # Marcar que el jugador colocó una bomba con referencia
-            self.local_player.colocar_bomba(nueva_bomba)
-            
-            # Enviar a red
-            bomb_data = {
-                'x': grid_x,
-                'y': grid_y,
-                'player_id': self.player_id,
-                'time': nueva_bomba.tiempo_creacion,
-                'rango_explosion': nueva_bomba.rango_explosion
-            }
-            
-            if self.network.send_bomb_placed(bomb_data):
-                print(f"💣 Bomba colocada en ({grid_x}, {grid_y}) - Rango: {nueva_bomba.rango_explosion}")
-                self.network_stats['bombs_sent'] += 1
-            else:
-                print("⚠️ Error enviando bomba a la red")
-            
-            self.bomba_presionada = True
-    
-    def detonar_bombas_remotamente(self):
-        """Detona todas las bombas del jugador remotamente"""
-        print("🎮 Activando control remoto...")
-        bombas_detonadas = 0
-        
-        for bomba in self.local_bombs:
-            if not bomba.explotada:
-                bomba.explotar(Object.objects)
-                bombas_detonadas += 1
-        
-        if bombas_detonadas > 0:
-            print(f"💥 ¡{bombas_detonadas} bombas detonadas remotamente!")
-        else:
-            print("⚠️ No hay bombas para detonar")
-    
-    def ajustar_a_grid(self, x, y):
-        """Ajusta las coordenadas a la cuadrícula"""
-        grid_size = self.player_size
-        grid_x = (x // grid_size) * grid_size
-        grid_y = (y // grid_size) * grid_size
-        return grid_x, grid_y
+        self.entrada.bomba = True
+        self.bomba_presionada = True
     
     def update(self, tiempo_actual):
+        """Actualiza el estado del juego; los mensajes TCP del tick salen juntos al final"""
+        self.network.comenzar_lote()
+        try:
+            self.actualizar_tick(tiempo_actual)
+        finally:
+            with self.perfil.fase('red'):
+                self.network.enviar_lote()
+    
+    def actualizar_tick(self, tiempo_actual):
         """Actualiza el estado del juego - OPTIMIZADO"""
         # 1. Procesar mensajes de red (SIEMPRE primero)
-        self.process_network_messages()
-        
-        # 2. Actualizar movimiento local CON COLISIÓN DE BOMBAS
-        self.last_move_time += self.clock.get_time()
-        if self.last_move_time >= self.move_delay:
-            todas_bombas = self.local_bombs + self.remote_bombs
-            self.local_player.actualizar_movimiento(self.LARGURA, self.ALTURA, todas_bombas)
-            self.last_move_time = 0
+        with self.perfil.fase('red'):
+            self.process_network_messages()
+            self.actualizar_posicion_remota()
+        
+        # 2-6. Avanzar la simulación con la entrada local (movimiento, bombas, power-ups)
+        keys = pygame.key.get_pressed()
+        self.entrada.direccion = direccion_desde_teclas(keys)
+        if not self.autoritativo:
+            self.sim.paso({self.player_id: self.entrada})
+        elif self.is_host:
+            self.aplicar_comandos_remotos()
+            self.sim.paso({self.player_id: self.entrada, self.remote_player.id: EntradaJugador()})
+        else:
+            # El cliente no simula golpes ni power-ups: los decide el host
+            self.predecir_entrada()
+            self.sim.paso({})
+        self.entrada.limpiar_pulsaciones()
+        with self.perfil.fase('eventos'):
+            self.procesar_eventos_simulacion()
         
-        # 3. ACTUALIZAR COLISIÓN DE BOMBAS LOCALES
-        for bomba in self.local_bombs:
-            if not bomba.explotada:
-                bomba.actualizar_colision(self.local_player.x, self.local_player.y, 
-                                         self.player_id, self.player_size)
-        
-        # 4. Verificar colisiones con power-ups
-        jugador_rect = pygame.Rect(self.local_player.x, self.local_player.y, 
-                                 self.player_size, self.player_size)
-        powerups_recogidos = self.powerup_system.verificar_colisiones(jugador_rect, self.local_player)
-        
-        # Aplicar power-ups recogidos y sincronizar
-        for tipo_powerup in powerups_recogidos:
-            self.local_player.aplicar_powerup(tipo_powerup)
-            # Enviar a red
-            powerup_data = {
-                'x': int(jugador_rect.x),
-                'y': int(jugador_rect.y),
-                'type': tipo_powerup.value,
-                'player_id': self.player_id
-            }
-            if self.network.send_powerup_collected(powerup_data):
-                self.network_stats['powerups_synced'] += 1
-        
-        # 5. Actualizar animación local
-        self.local_player.actualizar_animacion(tiempo_actual, pygame.key.get_pressed())
-        
-        # 6. Actualizar bombas
-        self.update_bombs()
+        # Actualizar animación local
+        self.local_player.actualizar_animacion(tiempo_actual, keys)
         
         # 7. Enviar estado del jugador (CON THROTTLING INTELIGENTE)
-        current_time = time.time()
-        if current_time - self.last_player_state_sent >= self.player_state_min_interval:
-            # Verificar si realmente hay cambios significativos
-            current_pos = (self.local_player.x, self.local_player.y)
-            dx = abs(current_pos[0] - self.last_player_position[0])
-            dy = abs(current_pos[1] - self.last_player_position[1])
-            
-            # Enviar si se movió significativamente o si cambió estado importante
-            keys = pygame.key.get_pressed()
-            is_moving = any([
-                keys[pygame.K_w], keys[pygame.K_UP],
-                keys[pygame.K_s], keys[pygame.K_DOWN],
-                keys[pygame.K_a], keys[pygame.K_LEFT],
-                keys[pygame.K_d], keys[pygame.K_RIGHT]
-            ])
-            
-            if is_moving or dx > self.position_change_threshold or dy > self.position_change_threshold:
-                self.send_player_state()
-                self.last_player_position = current_pos
-                self.last_player_state_sent = current_time
+        with self.perfil.fase('red'):
+            if self.is_host or not self.autoritativo:
+                self.enviar_estado_si_cambio(keys)
+            if self.is_host and self.autoritativo:
+                self.enviar_estado_autoritativo()
         
         # 8. Verificar fin del juego
+        current_time = time.time()
         if not self.local_player.is_alive():
             self.game_running = False
             print("💀 ¡Has perdido!")
@@ -435,7 +400,7 @@ class MultiplayerGame:
                 game_over_msg = {
                     'type': MessageType.GAME_OVER.value,
                     'player_id': self.player_id,
-                    'timestamp': time.time()
+                    'timestamp': self.network.reloj_partida()
                 }
                 # Enviar mensaje de fin de juego
                 self.network._send_tcp_message(game_over_msg)
@@ -447,112 +412,128 @@ class MultiplayerGame:
                   f"Syncs: {self.network_stats['objects_synced']}+{self.network_stats['powerups_synced']}")
             self.network_stats['last_stats_display'] = current_time
     
-    def update_bombs(self):
-        """Actualiza todas las bombas (LOCALES Y REMOTAS)"""
-        # Actualizar bombas locales
-        bombas_a_remover_local = []
-        for bomba in self.local_bombs:
-            if bomba.debe_explotar():
-                bomba.explotar(Object.objects)
+    def enviar_estado_si_cambio(self, keys):
+        """Envía el estado del jugador local si se movió (con throttling)"""
+        current_time = time.time()
+        if current_time - self.last_player_state_sent >= self.player_state_min_interval:
+            # Verificar si realmente hay cambios significativos
+            current_pos = (self.local_player.x, self.local_player.y)
+            dx = abs(current_pos[0] - self.last_player_position[0])
+            dy = abs(current_pos[1] - self.last_player_position[1])
             
-            if bomba.recien_explotada:
-                bomba.recien_explotada = False
-                self.process_explosion_destruction(bomba, is_local=True)
+            # Enviar si se movió significativamente o si cambió estado importante
+            is_moving = any([
+                keys[pygame.K_w], keys[pygame.K_UP],
+                keys[pygame.K_s], keys[pygame.K_DOWN],
+                keys[pygame.K_a], keys[pygame.K_LEFT],
+                keys[pygame.K_d], keys[pygame.K_RIGHT]
+            ])
             
-            # Verificar daño al jugador local
-            if bomba.explotada and bomba.explosion_activa() and not bomba.causou_dano:
-                self.check_player_damage(bomba, self.local_player)
+            # También al soltar las teclas: el otro equipo deja de extrapolar el movimiento
+            se_detuvo = self.estaba_moviendose and not is_moving
             
-            # Limpiar bombas ya terminadas
-            if bomba.explotada and not bomba.explosion_activa():
-                bombas_a_remover_local.append(bomba)
-                # Liberar al jugador para colocar otra bomba
-                self.local_player.bomba_destruida()
-        
-        for bomba in bombas_a_remover_local:
-            self.local_bombs.remove(bomba)
+            if (is_moving or se_detuvo or dx > self.position_change_threshold
+                    or dy > self.position_change_threshold):
+                self.send_player_state()
+                self.last_player_position = current_pos
+                self.last_player_state_sent = current_time
+                self.estaba_moviendose = is_moving
+    
+    def predecir_entrada(self):
+        """Cliente: aplica ya el movimiento local y envía la entrada numerada al host"""
+        if not self.network.is_connected():
+            return  # Durante un corte el host no recibiría la entrada: no se predice
+        movio = self.sim.mover_jugador(self.local_player, self.entrada.direccion)
+        if not (movio or self.entrada.bomba or self.entrada.detonar):
+            return
         
-        # Actualizar bombas remotas
-        bombas_a_remover_remote = []
-        for bomba in self.remote_bombs:
-            if bomba.debe_explotar():
-                bomba.explotar(Object.objects)
-            
-            if bomba.recien_explotada:
-                bomba.recien_explotada = False
-                self.process_explosion_destruction(bomba, is_local=False)
-            
-            # Verificar daño al jugador local (por bombas remotas)
-            if bomba.explotada and bomba.explosion_activa() and not bomba.causou_dano:
-                self.check_player_damage(bomba, self.local_player)
-            
-            # Limpiar bombas ya terminadas
-            if bomba.explotada and not bomba.explosion_activa():
-                bombas_a_remover_remote.append(bomba)
-        
-        for bomba in bombas_a_remover_remote:
-            self.remote_bombs.remove(bomba)
-    
-    def process_explosion_destruction(self, bomba, is_local):
-        """Procesa la destrucción de objetos por una explosión"""
-        destroyed_objects = []
-        
-        for obj in Object.objects:
-            if obj.destrutivel and not obj.destruido:
-                for rect in bomba.explosion_tiles:
-                    if obj.rect.colliderect(rect):
-                        obj.destruido = True
-                        destroyed_objects.append((obj.rect.x, obj.rect.y))
-                        
-                        # Intentar spawnear power-up (solo si es bomba local)
-                        if is_local:
-                            powerup = self.powerup_system.intentar_spawn(
-                                obj.rect.x, obj.rect.y, 
-                                self.player_size
-                            )
-                            
-                            # Si se spawnear un power-up, sincronizar
-                            if powerup:
-                                powerup_data = {
-                                    'x': int(obj.rect.x),
-                                    'y': int(obj.rect.y),
-                                    'type': powerup.tipo.value
-                                }
-                                if self.network.send_powerup_spawned(powerup_data):
-                                    self.network_stats['powerups_synced'] += 1
-                        break
-        
-        # Sincronizar objetos destruidos (solo si es bomba local)
-        if is_local:
-            for x, y in destroyed_objects:
-                object_data = {'x': int(x), 'y': int(y)}
+        self.secuencia_entrada += 1
+        direccion = self.entrada.direccion if movio else None
+        self.entradas_pendientes.append((self.secuencia_entrada, direccion))
+        self.network.send_player_input(self.secuencia_entrada, {
+            'direccion': direccion,
+            'bomba': self.entrada.bomba,
+            'detonar': self.entrada.detonar
+        })
+    
+    def reconciliar(self, data, ack):
+        """Cliente: adopta el estado del host y reaplica las entradas posteriores a ack"""
+        self.entradas_pendientes = [(seq, direccion) for seq, direccion in self.entradas_pendientes
+                                    if secuencia_posterior(seq, ack)]
+        
+        self.local_player.x = data['x']
+        self.local_player.y = data['y']
+        self.local_player.life = data['life']
+        self.local_player.set_estado_powerups(data['powerup_state'])
+        for _, direccion in self.entradas_pendientes:
+            if direccion:
+                self.local_player.mover(direccion, self.LARGURA, self.ALTURA, self.sim.bombas)
+    
+    def aplicar_comandos_remotos(self):
+        """Host: aplica al jugador del cliente las entradas recibidas, en orden"""
+        for seq, datos in self.comandos_remotos:
+            if not secuencia_posterior(seq, self.ack_remoto):
+                continue  # Repetida
+            self.sim.aplicar_comando(self.remote_player, datos['direccion'], datos['bomba'], datos['detonar'])
+            self.ack_remoto = seq
+        self.comandos_remotos.clear()
+    
+    def enviar_estado_autoritativo(self):
+        """Host: envía el estado del jugador del cliente cuando cambia o confirma entradas"""
+        estado = self.remote_player.estado_red()
+        if (self.ack_remoto, estado) == self.ultimo_estado_autoritativo:
+            return
+        if self.network.send_authoritative_state(self.remote_player.id, estado, self.ack_remoto):
+            self.ultimo_estado_autoritativo = (self.ack_remoto, estado)
+    
+    def procesar_eventos_simulacion(self):
+        """Envía a la red los efectos de la simulación local"""
+        for tipo, datos in self.sim.tomar_eventos():
+            if tipo == EVENTO_BOMBA_COLOCADA:
+                bomba = datos['bomba']
+                bomb_data = {
+                    'x': bomba.x,
+                    'y': bomba.y,
+                    'player_id': bomba.jugador_id,
+                    'time': bomba.tiempo_creacion,
+                    'rango_explosion': bomba.rango_explosion
+                }
+                if self.network.send_bomb_placed(bomb_data):
+                    self.network_stats['bombs_sent'] += 1
+                else:
+                    print("⚠️ Error enviando bomba a la red")
+            
+            elif tipo == EVENTO_OBJETO_DESTRUIDO:
+                object_data = {'x': int(datos['x']), 'y': int(datos['y'])}
                 if self.network.send_object_destroyed(object_data):
                     self.network_stats['objects_synced'] += 1
-    
-    def check_player_damage(self, bomba, player):
-        """Verifica si una bomba daña al jugador"""
-        player_rect = pygame.Rect(player.x, player.y, self.player_size, self.player_size)
-        
-        for rect in bomba.explosion_tiles:
-            if player_rect.colliderect(rect):
-                if player.take_damage(1):
-                    print(f"🔥 Jugador {player.id} golpeado! Vida: {player.life}")
-                bomba.causou_dano = True
-                break
+            
+            elif tipo == EVENTO_POWERUP_SPAWNEADO:
+                powerup = datos['powerup']
+                powerup_data = {
+                    'x': int(powerup.x),
+                    'y': int(powerup.y),
+                    'type': powerup.tipo.value
+                }
+                if self.network.send_powerup_spawned(powerup_data):
+                    self.network_stats['powerups_synced'] += 1
+            
+            elif tipo == EVENTO_POWERUP_RECOGIDO:
+                # Se envía la posición del power-up, que es la que busca el otro equipo
+                powerup = datos['powerup']
+                powerup_data = {
+                    'x': int(powerup.x),
+                    'y': int(powerup.y),
+                    'type': powerup.tipo.value,
+                    'player_id': datos['jugador_id']
+                }
+                if self.network.send_powerup_collected(powerup_data):
+                    self.network_stats['powerups_synced'] += 1
     
     def send_player_state(self):
         """Envía el estado del jugador local a la red - OPTIMIZADO"""
         if self.network.is_connected():
-            player_data = {
-                'x': int(self.local_player.x),
-                'y': int(self.local_player.y),
-                'direction': self.local_player.direccion_actual,
-                'frame': self.local_player.frame_actual,
-                'life': self.local_player.life,
-                'moving': self.local_player.esta_moviendose,
-                'powerup_state': self.local_player.get_estado_powerups(),
-                'timestamp': time.time()
-            }
+            player_data = self.local_player.estado_red()
             
             if self.network.send_player_state(player_data):
                 self.network_stats['player_states_sent'] += 1
@@ -567,38 +548,66 @@ class MultiplayerGame:
             msg_type = message['type']
             data = message.get('data')
             
-            if msg_type == MessageType.PLAYER_STATE.value:
-                # Actualizar jugador remoto
-                self.remote_player.x = data['x']
-                self.remote_player.y = data['y']
-                self.remote_player.direccion_actual = data['direction']
-                self.remote_player.frame_actual = data['frame']
-                self.remote_player.life = data['life']
-                self.remote_player.esta_moviendose = data['moving']
-                
-                # Actualizar power-ups del jugador remoto
-                if 'powerup_state' in data:
-                    self.remote_player.set_estado_powerups(data['powerup_state'])
+            if msg_type == MessageType.PLAYER_STATE.value and message.get('player_id') == self.player_id:
+                # Estado autoritativo de nuestro propio jugador (modo autoritativo, cliente)
+                if self.autoritativo and not self.is_host:
+                    self.reconciliar(data, message.get('ack', 0))
+            
+            elif self.autoritativo and self.is_host and msg_type in (
+                    MessageType.PLAYER_STATE.value, MessageType.PLAYER_STATE_DELTA.value):
+                pass  # El host ya simula al jugador del cliente; su estado no manda
+            
+            elif msg_type == MessageType.PLAYER_STATE.value:
+                # Keyframe: estado completo y nueva base para los deltas
+                self.estado_remoto = data
+                self.keyframe_remoto = message.get('keyframe')
+                self.aplicar_estado_remoto(data, message['timestamp'])
+            
+            elif msg_type == MessageType.PLAYER_STATE_DELTA.value:
+                # Los deltas de un keyframe que aún no llegó (o ya reemplazado) se ignoran
+                if self.estado_remoto is not None and message.get('keyframe') == self.keyframe_remoto:
+                    self.aplicar_estado_remoto(aplicar_diferencia(self.estado_remoto, data),
+                                               message['timestamp'])
+            
+            elif msg_type == MessageType.CONNECTION_ACCEPTED.value and not message.get('rechazo'):
+                if message.get('dedicado'):
+                    # Al reconectar con el mismo id la partida sigue; el WORLD_STATE la pone al día
+                    if not (self.dedicado and message['player_id'] == self.player_id):
+                        self.configurar_dedicado(message['player_id'], message['max_jugadores'],
+                                                 message['nivel'], message['semilla'])
+                elif not self.is_host:
+                    self.acordar_partida(message['nivel'], message['semilla'])
+            
+            elif msg_type == MessageType.CONNECTION_REQUEST.value:
+                # El otro equipo se conectó (o se reconectó tras un corte): el mundo completo
+                if self.is_host and self.network.connection_established:
+                    self.enviar_estado_mundo()
+            
+            elif msg_type == MessageType.WORLD_STATE.value:
+                if not self.is_host:
+                    self.aplicar_estado_mundo(message)
+            
+            elif msg_type == MessageType.WORLD_SNAPSHOT.value:
+                # Servidor dedicado: el estado de todos los jugadores en un mensaje
+                for estado in message['jugadores']:
+                    if estado['player_id'] == self.player_id:
+                        self.reconciliar(estado['data'], estado['ack'])
+                    else:
+                        jugador = self.jugador_remoto(estado['player_id'])
+                        if jugador:
+                            self.aplicar_estado_remoto(estado['data'], message['timestamp'], jugador)
+            
+            elif msg_type == MessageType.PLAYER_INPUT.value:
+                if self.autoritativo and self.is_host:
+                    self.comandos_remotos.append((message['seq'], data))
             
             elif msg_type == MessageType.BOMB_PLACED.value:
-                # Solo procesar si no es nuestra bomba
-                if data.get('player_id') != self.player_id:
-                    # Verificar si ya existe
-                    bomba_existente = False
-                    for bomba in self.remote_bombs:
-                        if bomba.x == data['x'] and bomba.y == data['y']:
-                            bomba_existente = True
-                            break
-                    
-                    if not bomba_existente:
-                        rango = data.get('rango_explosion', 1)
-                        bomba = Bomba(data['x'], data['y'], self.player_size, 
-                                     jugador_id=data['player_id'],
-                                     rango_explosion=rango)
-                        bomba.tiempo_creacion = data.get('time', time.time())
-                        bomba.es_remota = True
-                        bomba.es_solida_para_otros = True
-                        self.remote_bombs.append(bomba)
+                # Solo procesar si no es nuestra bomba (en modo autoritativo el host
+                # coloca también las del cliente)
+                if data.get('player_id') != self.player_id or (self.autoritativo and not self.is_host):
+                    self.sim.agregar_bomba_remota(data['x'], data['y'], data['player_id'],
+                                                  tiempo_creacion=data.get('time'),
+                                                  rango_explosion=data.get('rango_explosion', 1))
             
             elif msg_type == MessageType.OBJECT_DESTROYED.value:
                 # Sincronizar objeto destruido
@@ -623,25 +632,185 @@ class MultiplayerGame:
                 if powerup:
                     powerup.recoger()
             
+            elif msg_type == MessageType.GAME_OVER.value and self.dedicado and message.get('player_id'):
+                self.eliminar_jugador_remoto(message['player_id'])
+            
             elif msg_type == MessageType.GAME_OVER.value:
                 print("⚠️ El otro jugador se desconectó")
                 self.game_running = False
                 self.network.connected = False
                 self.network.connection_established = False
     
+    def enviar_estado_mundo(self):
+        """Host: envía bloques, bombas, power-ups y jugadores a quien acaba de conectarse"""
+        self.ultimo_estado_autoritativo = None  # El estado autoritativo vuelve a salir
+        estado = self.sim.estado_completo(acks={self.remote_player.id: self.ack_remoto})
+        if self.network.send_world_state(estado):
+            print(f"🌍 Estado del mundo enviado ({len(estado['bombas'])} bombas, "
+                  f"{len(estado['powerups'])} power-ups)")
+    
+    def aplicar_estado_mundo(self, message):
+        """Cliente: adopta de una vez el mundo que envía el host (o el servidor) al
+        conectarse o reconectarse, en lugar de seguir con lo que quedó del corte"""
+        propio = None if self.autoritativo else self.player_id
+        if not self.sim.aplicar_estado_completo(message, propio):
+            print("⚠️ El estado del mundo recibido no corresponde a este mapa")
+            return
+        
+        for estado in message['jugadores']:
+            id = estado['player_id']
+            if id == self.player_id:
+                # Sin autoridad, el jugador propio lo simula este equipo
+                if self.autoritativo:
+                    self.reconciliar(estado['data'], estado['ack'])
+                continue
+            jugador = self.jugador_remoto(id) if self.dedicado else self.remote_players.get(id)
+            if jugador:
+                self.interpolaciones[id].limpiar()
+                self.aplicar_estado_remoto(estado['data'], message['timestamp'], jugador)
+        
+        # Los deltas pendientes se refieren a keyframes anteriores al corte
+        self.estado_remoto = None
+        self.keyframe_remoto = None
+        self.dirty.invalidar()
+        print(f"🌍 Mundo sincronizado ({len(message['bombas'])} bombas, "
+              f"{len(message['powerups'])} power-ups)")
+    
+    def aplicar_estado_remoto(self, data, timestamp, jugador=None):
+        """Actualiza un jugador remoto con un estado completo; la posición pasa por
+        el buffer de interpolación y se aplica en actualizar_posicion_remota"""
+        jugador = jugador or self.remote_player
+        self.interpolaciones[jugador.id].agregar(timestamp, data['x'], data['y'], data['moving'], time.time())
+        jugador.direccion_actual = data['direction']
+        jugador.frame_actual = data['frame']
+        jugador.life = data['life']
+        jugador.esta_moviendose = data['moving']
+        
+        # Actualizar power-ups del jugador remoto
+        if 'powerup_state' in data:
+            jugador.set_estado_powerups(data['powerup_state'])
+    
+    def actualizar_posicion_remota(self):
+        """Coloca a los jugadores remotos en su posición interpolada para este frame"""
+        ahora = time.time()
+        for id, jugador in self.remote_players.items():
+            posicion = self.interpolaciones[id].posicion(ahora)
+            if posicion is not None:
+                jugador.x = round(posicion[0])
+                jugador.y = round(posicion[1])
+    
+    def acordar_partida(self, nivel, semilla):
+        """Cliente: adopta el nivel y la semilla que propone el host en el saludo"""
+        self.sim.semilla = semilla
+        self.sim.rng.seed(semilla)
+        if nivel == self.sim.nivel:
+            return
+        
+        print(f"🗺️ El host juega en {nivel}")
+        self.sim = SimulacionMultijugador(nivel=nivel, reloj=self.network.reloj_partida, semilla=semilla)
+        self.sim.perfil = self.perfil
+        self.mapa = self.sim.mapa
+        self.powerup_system = self.sim.powerup_system
+        self.local_player = self.sim.jugadores[self.player_id]
+        self.remote_player = self.sim.jugadores[1]
+        self.aplicar_tinte_remoto(self.remote_player)
+        self.remote_players = {self.remote_player.id: self.remote_player}
+        self.interpolaciones = {self.remote_player.id: BufferInstantaneas()}
+        self.dirty.invalidar()
+    
+    def configurar_dedicado(self, player_id, max_jugadores, nivel="level2", semilla=None):
+        """Rehace la partida para un servidor dedicado: N jugadores, el local con el id
+        asignado, y este equipo como cliente del modo autoritativo"""
+        self.dedicado = True
+        self.autoritativo = True
+        self.player_id = player_id
+        
+        self.sim = SimulacionMultijugador(nivel=nivel, ids=range(1, max_jugadores + 1),
+                                          reloj=self.network.reloj_partida, semilla=semilla)
+        self.sim.perfil = self.perfil
+        self.mapa = self.sim.mapa
+        self.powerup_system = self.sim.powerup_system
+        self.local_player = self.sim.jugadores[player_id]
+        
+        # Los remotos se agregan al aparecer en un snapshot (el servidor solo envía los conectados)
+        self.remote_players = {}
+        self.interpolaciones = {}
+        self.remote_player = next(jugador for id, jugador in self.sim.jugadores.items() if id != player_id)
+        self.secuencia_entrada = 0
+        self.entradas_pendientes = []
+        self.dirty.invalidar()
+        pygame.display.set_caption(f"Bomberman - Jugador {player_id}/{max_jugadores} (servidor dedicado)")
+    
+    def jugador_remoto(self, id):
+        """Jugador remoto con ese id; se agrega (con tinte) la primera vez que aparece"""
+        jugador = self.remote_players.get(id)
+        if jugador is None and id in self.sim.jugadores and id != self.player_id:
+            jugador = self.sim.jugadores[id]
+            self.aplicar_tinte_remoto(jugador)
+            self.remote_players[id] = jugador
+            self.interpolaciones[id] = BufferInstantaneas()
+            self.remote_player = jugador
+        return jugador
+    
+    def eliminar_jugador_remoto(self, id):
+        """Servidor dedicado: un jugador salió de la partida; gana el último que queda"""
+        jugador = self.remote_players.pop(id, None)
+        if jugador is None:
+            return
+        print(f"💀 El jugador {id} quedó fuera de la partida")
+        jugador.life = 0
+        self.interpolaciones.pop(id, None)
+        self.dirty.invalidar()
+        if self.remote_players:
+            self.remote_player = next(iter(self.remote_players.values()))
+        else:
+            self.remote_player = jugador
+            self.game_running = False
+    
     def sync_object_destruction(self, x, y):
         """Sincroniza la destrucción de un objeto"""
-        for obj in Object.objects:
-            if obj.rect.x == x and obj.rect.y == y and not obj.destruido:
-                obj.destruido = True
-                break
+        self.sim.destruir_objeto_en(x, y)
     
-    def draw_waiting_screen(self):
-        """Dibuja pantalla de espera de conexión mejorada"""
-        # Fondo con gradiente
+    def _crear_fondo_espera(self):
+        """Genera el fondo con gradiente de la pantalla de espera"""
+        fondo = pygame.Surface((self.LARGURA, self.ALTURA))
         for y in range(self.ALTURA):
             color_value = int(20 + (y / self.ALTURA) * 30)
-            pygame.draw.line(self.JANELA, (0, 0, color_value), (0, y), (self.LARGURA, y))
+            pygame.draw.line(fondo, (0, 0, color_value), (0, y), (self.LARGURA, y))
+        return fondo
+    
+    def _crear_panel_borde(self, tamaño, color, color_borde, grosor=2):
+        """Genera un panel translúcido con borde"""
+        panel = pygame.Surface(tamaño, pygame.SRCALPHA)
+        panel.fill(color)
+        pygame.draw.rect(panel, color_borde, (0, 0, tamaño[0], tamaño[1]), grosor)
+        return panel
+    
+    def _crear_panel_conexion(self, conectado):
+        """Genera el panel pequeño de estado de conexión"""
+        status_panel = pygame.Surface((180, 25), pygame.SRCALPHA)
+        status_panel.fill((0, 0, 0, 180))
+        
+        if conectado:
+            status_icon = "🟢"
+            status_color = (0, 255, 0)
+            status_text = f"{status_icon} ONLINE"
+        else:
+            status_icon = "🔴"
+            status_color = (255, 0, 0)
+            status_text = f"{status_icon} OFFLINE"
+        
+        # Solo mostrar estado básico
+        status = assets.renderizar_texto(status_text, 20, status_color)
+        status_rect = status.get_rect(center=(90, 12))
+        status_panel.blit(status, status_rect)
+        return status_panel
+    
+    def draw_waiting_screen(self):
+        """Dibuja pantalla de espera de conexión mejorada"""
+        # Fondo con gradiente (se genera una sola vez)
+        fondo = assets.obtener_generado(('fondo_espera', self.LARGURA, self.ALTURA), self._crear_fondo_espera)
+        self.JANELA.blit(fondo, (0, 0))
         
         # Panel central
         panel_width = 600
@@ -649,47 +818,41 @@ class MultiplayerGame:
         panel_x = self.LARGURA // 2 - panel_width // 2
         panel_y = self.ALTURA // 2 - panel_height // 2
         
-        panel = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
-        panel.fill((0, 0, 40, 220))
-        pygame.draw.rect(panel, (0, 150, 255), (0, 0, panel_width, panel_height), 5)
+        panel = assets.obtener_generado(
+            ('panel_espera', panel_width, panel_height),
+            lambda: self._crear_panel_borde((panel_width, panel_height), (0, 0, 40, 220), (0, 150, 255), 5)
+        )
         self.JANELA.blit(panel, (panel_x, panel_y))
         
-        font_large = pygame.font.Font(None, 60)
-        font_medium = pygame.font.Font(None, 36)
-        font_small = pygame.font.Font(None, 28)
-        
         # Título
-        title = font_large.render("⚡ ESPERANDO CONEXIÓN ⚡", True, (255, 215, 0))
+        title = assets.renderizar_texto("⚡ ESPERANDO CONEXIÓN ⚡", 60, (255, 215, 0))
         title_rect = title.get_rect(center=(self.LARGURA//2, panel_y + 60))
         self.JANELA.blit(title, title_rect)
         
         # Información de conexión
         if self.is_host:
             local_ip = self.get_local_ip()
-            ip_text = font_medium.render(f"🌐 TU IP: {local_ip}", True, (100, 200, 255))
+            ip_text = assets.renderizar_texto(f"🌐 TU IP: {local_ip}", 36, (100, 200, 255))
             ip_rect = ip_text.get_rect(center=(self.LARGURA//2, panel_y + 120))
             self.JANELA.blit(ip_text, ip_rect)
             
-            port_text = font_medium.render(f"🔌 PUERTO: {self.network.port}", True, (100, 200, 255))
+            port_text = assets.renderizar_texto(f"🔌 PUERTO: {self.network.port}", 36, (100, 200, 255))
             port_rect = port_text.get_rect(center=(self.LARGURA//2, panel_y + 160))
             self.JANELA.blit(port_text, port_rect)
             
-            instruction = font_small.render("Comparte estos datos con el otro jugador", True, (180, 180, 255))
+            instruction = assets.renderizar_texto("Comparte estos datos con el otro jugador", 28, (180, 180, 255))
             instr_rect = instruction.get_rect(center=(self.LARGURA//2, panel_y + 200))
             self.JANELA.blit(instruction, instr_rect)
         else:
-            host_text = font_medium.render(f"🔗 CONECTANDO A: {self.host_ip}", True, (100, 200, 255))
+            host_text = assets.renderizar_texto(f"🔗 CONECTANDO A: {self.host_ip}", 36, (100, 200, 255))
             host_rect = host_text.get_rect(center=(self.LARGURA//2, panel_y + 120))
             self.JANELA.blit(host_text, host_rect)
             
-            port_text = font_medium.render(f"🔌 PUERTO: {self.network.port}", True, (100, 200, 255))
+            port_text = assets.renderizar_texto(f"🔌 PUERTO: {self.network.port}", 36, (100, 200, 255))
             port_rect = port_text.get_rect(center=(self.LARGURA//2, panel_y + 160))
             self.JANELA.blit(port_text, port_rect)
         
         # Estado de conexión
-        status_panel = pygame.Surface((400, 50), pygame.SRCALPHA)
-        status_panel.fill((0, 0, 0, 150))
-        
         if self.network.connection_established:
             status_color = (0, 255, 0)
             status_text = "🟢 CONECTADO - INICIANDO JUEGO..."
@@ -700,10 +863,13 @@ class MultiplayerGame:
             status_color = (255, 50, 50)
             status_text = "🔴 SIN CONEXIÓN"
         
-        pygame.draw.rect(status_panel, status_color, (0, 0, 400, 50), 3)
+        status_panel = assets.obtener_generado(
+            ('panel_estado_espera', status_color),
+            lambda: self._crear_panel_borde((400, 50), (0, 0, 0, 150), status_color, 3)
+        )
         self.JANELA.blit(status_panel, (self.LARGURA//2 - 200, panel_y + 220))
         
-        status = font_medium.render(status_text, True, status_color)
+        status = assets.renderizar_texto(status_text, 36, status_color)
         status_rect = status.get_rect(center=(self.LARGURA//2, panel_y + 245))
         self.JANELA.blit(status, status_rect)
         
@@ -723,24 +889,21 @@ class MultiplayerGame:
         
         # Efecto de brillo en la barra
         if bar_width > 10:
-            shine = pygame.Surface((bar_width, 5), pygame.SRCALPHA)
-            shine.fill((255, 255, 255, 100))
-            self.JANELA.blit(shine, (self.LARGURA//2 - 190, panel_y + 295))
+            shine = assets.obtener_panel((380, 5), (255, 255, 255, 100))
+            self.JANELA.blit(shine, (self.LARGURA//2 - 190, panel_y + 295), (0, 0, bar_width, 5))
         
         # Porcentaje
-        percent_text = font_small.render(f"{int(progress * 100)}%", True, (255, 255, 255))
+        percent_text = assets.renderizar_texto(f"{int(progress * 100)}%", 28, (255, 255, 255))
         percent_rect = percent_text.get_rect(center=(self.LARGURA//2, panel_y + 307))
         self.JANELA.blit(percent_text, percent_rect)
         
         # Tiempo
-        time_text = font_small.render(f"Tiempo: {wait_time}s / {self.connection_timeout}s", 
-                                    True, (200, 200, 200))
+        time_text = assets.renderizar_texto(f"Tiempo: {wait_time}s / {self.connection_timeout}s", 28, (200, 200, 200))
         time_rect = time_text.get_rect(center=(self.LARGURA//2, panel_y + 330))
         self.JANELA.blit(time_text, time_rect)
         
         # Instrucciones
-        keys_text = font_small.render("Presiona ESC para cancelar  |  F3 para información de red", 
-                                    True, (150, 150, 200))
+        keys_text = assets.renderizar_texto("Presiona ESC para cancelar  |  F3 para información de red", 28, (150, 150, 200))
         keys_rect = keys_text.get_rect(center=(self.LARGURA//2, self.ALTURA - 30))
         self.JANELA.blit(keys_text, keys_rect)
         
@@ -750,90 +913,145 @@ class MultiplayerGame:
         if dot_time > 0:
             dots = "." + "   "[:dot_time-1]
         
-        connecting_text = font_small.render(f"Conectando{dots}", True, (255, 255, 200))
+        connecting_text = assets.renderizar_texto(f"Conectando{dots}", 28, (255, 255, 200))
         connecting_rect = connecting_text.get_rect(center=(self.LARGURA//2, panel_y + 270))
         self.JANELA.blit(connecting_text, connecting_rect)
         
         pygame.display.update()
     
-    def render(self):
-        """Renderiza todos los elementos del juego"""
-        # 1. Dibujar mapa (directamente en la ventana)
-        self.mapa.dibujar(self.JANELA)
-        
-        # 2. Dibujar objetos no destruidos
-        for obj in Object.objects:
-            if not obj.destruido:
-                obj.draw(self.JANELA)
+    def dibujar_entidades(self):
+        """Dibuja todo lo que está sobre el mapa y retorna las áreas modificadas"""
+        areas = []
         
         # 3. Dibujar power-ups
-        self.powerup_system.dibujar_todos(self.JANELA)
+        areas.extend(self.powerup_system.dibujar_todos(self.JANELA))
         
         # 4. Dibujar bombas remotas
         for bomba in self.remote_bombs:
-            bomba.dibujar(self.JANELA)
+            areas.append(bomba.dibujar(self.JANELA))
         
         # 5. Dibujar bombas locales
         for bomba in self.local_bombs:
-            bomba.dibujar(self.JANELA)
+            areas.append(bomba.dibujar(self.JANELA))
         
-        # 6. Dibujar jugador remoto
-        self.remote_player.dibujar(self.JANELA, pygame.time.get_ticks() - self.tiempo_inicio)
+        # 6. Dibujar jugadores remotos
+        for jugador in self.remote_players.values():
+            areas.append(jugador.dibujar(self.JANELA, pygame.time.get_ticks() - self.tiempo_inicio))
         
         # 7. Dibujar jugador local (encima)
-        self.local_player.dibujar(self.JANELA, pygame.time.get_ticks() - self.tiempo_inicio)
+        areas.append(self.local_player.dibujar(self.JANELA, pygame.time.get_ticks() - self.tiempo_inicio))
         
-        # 8. Dibujar HUD (en los primeros 60px)
-        self.draw_hud()
+        return areas
+    
+    def render(self):
+        """Renderiza todos los elementos del juego"""
+        if self.modo_dirty_rects:
+            self.render_dirty_rects()
+            return
         
-        # 9. Dibujar estado de conexión
-        self.draw_connection_status()
+        # 1-2. Dibujar mapa y objetos no destruidos (capas pre-renderizadas)
+        with self.perfil.fase('render_mapa'):
+            self.mapa.dibujar(self.JANELA)
         
-        pygame.display.update()
+        # 3-7. Power-ups, bombas y jugadores
+        with self.perfil.fase('render_entidades'):
+            self.dibujar_entidades()
+        
+        with self.perfil.fase('render_hud'):
+            # 8. Dibujar HUD (en los primeros 60px)
+            self.draw_hud()
+            
+            # 9. Dibujar estado de conexión
+            self.draw_connection_status()
+            self.dibujar_perfil()
+            self.dibujar_panel_red()
+        
+        with self.perfil.fase('presentar'):
+            pygame.display.update()
+    
+    def render_dirty_rects(self):
+        """Renderiza restaurando y presentando solo las áreas que cambiaron"""
+        with self.perfil.fase('render_mapa'):
+            parcheados = self.mapa.actualizar_capas()
+            hud_sucio = self.dirty.comenzar_frame(self.JANELA, self.mapa.capa_nivel,
+                                                  parcheados, self.clave_hud())
+        
+        with self.perfil.fase('render_entidades'):
+            self.dirty.agregar(self.dibujar_entidades())
+        
+        with self.perfil.fase('render_hud'):
+            if hud_sucio:
+                self.dirty.agregar(self.draw_hud())
+                self.draw_connection_status()
+            self.dirty.agregar(self.dibujar_perfil())
+            self.dirty.agregar(self.dibujar_panel_red())
+        
+        with self.perfil.fase('presentar'):
+            self.dirty.presentar(self.JANELA)
+    
+    def dibujar_perfil(self):
+        """Dibuja el overlay del perfilador (esquina inferior izquierda) si está visible"""
+        alto = self.perfil.TAMAÑO_OVERLAY[1]
+        return self.perfil.dibujar(self.JANELA, 10, self.ALTURA - alto - 10)
+    
+    def dibujar_panel_red(self):
+        """Dibuja el panel de red (esquina inferior derecha) si está visible"""
+        ancho, alto = self.panel_red.TAMAÑO
+        return self.panel_red.dibujar(self.JANELA, self.LARGURA - ancho - 10, self.ALTURA - alto - 10)
+    
+    def clave_hud(self):
+        """Valores que muestra el HUD (si no cambian, no hace falta redibujarlo)"""
+        return (
+            self.local_player.life,
+            self.local_player.bombas_colocadas_actual,
+            self.local_player.max_bombas,
+            self.local_player.rango_explosion,
+            self.local_player.tiene_escudo,
+            self.local_player.tiene_control_remoto,
+            self.local_player.bomba_colocada,
+            tuple(jugador.life for jugador in self.remote_players.values()),
+            self.remote_player.max_bombas,
+            self.network.is_connected()
+        )
     
     def draw_hud(self):
         """Dibuja la interfaz de usuario - AHORA 60px de altura"""
         # Fondo general del HUD - REDUCIDO A 60px
-        hud_bg = pygame.Surface((self.LARGURA, 60), pygame.SRCALPHA)
-        hud_bg.fill((20, 20, 40, 200))
+        hud_bg = assets.obtener_panel((self.LARGURA, 60), (20, 20, 40, 200))
         self.JANELA.blit(hud_bg, (0, 0))
         
-        font = pygame.font.Font(None, 32)  # Reducido de 36
-        font_small = pygame.font.Font(None, 24)  # Reducido de 28
-        
         # Panel jugador local (izquierda) - AJUSTADO
-        local_panel = pygame.Surface((250, 50), pygame.SRCALPHA)
-        local_panel.fill((0, 40, 80, 180))
-        pygame.draw.rect(local_panel, (0, 150, 255), (0, 0, 250, 50), 2)
+        local_panel = assets.obtener_generado(
+            ('panel_local', 250, 50),
+            lambda: self._crear_panel_borde((250, 50), (0, 40, 80, 180), (0, 150, 255))
+        )
         self.JANELA.blit(local_panel, (10, 5))
         
         # Vida local
-        local_life = font.render(f"❤️ {self.local_player.life}", True, (100, 200, 255))
+        local_life = assets.renderizar_texto(f"❤️ {self.local_player.life}", 32, (100, 200, 255))
         self.JANELA.blit(local_life, (20, 10))
         
         # Stats locales
-        local_stats = font_small.render(
-            f"💣 {self.local_player.bombas_colocadas_actual}/{self.local_player.max_bombas}",
-            True, (200, 220, 255)
-        )
+        local_stats = assets.renderizar_texto(
+            f"💣 {self.local_player.bombas_colocadas_actual}/{self.local_player.max_bombas}", 24, (200, 220, 255))
         self.JANELA.blit(local_stats, (20, 40))
         
         # Panel jugador remoto (derecha) - AJUSTADO
-        remote_panel = pygame.Surface((250, 50), pygame.SRCALPHA)
-        remote_panel.fill((80, 0, 40, 180))
-        pygame.draw.rect(remote_panel, (255, 50, 100), (0, 0, 250, 50), 2)
+        remote_panel = assets.obtener_generado(
+            ('panel_remoto', 250, 50),
+            lambda: self._crear_panel_borde((250, 50), (80, 0, 40, 180), (255, 50, 100))
+        )
         self.JANELA.blit(remote_panel, (self.LARGURA - 260, 5))
         
         # Vida remota
-        remote_life = font.render(f"💀 {self.remote_player.life}", True, (255, 150, 150))
+        vidas_remotas = " ".join(str(jugador.life) for jugador in self.remote_players.values())
+        remote_life = assets.renderizar_texto(f"💀 {vidas_remotas or '-'}", 32, (255, 150, 150))
         remote_rect = remote_life.get_rect(right=self.LARGURA - 20, top=10)
         self.JANELA.blit(remote_life, remote_rect)
         
         # Stats remotos
-        remote_stats = font_small.render(
-            f"💣 ?/{self.remote_player.max_bombas}",
-            True, (255, 200, 200)
-        )
+        remote_stats = assets.renderizar_texto(
+            f"💣 ?/{self.remote_player.max_bombas}", 24, (255, 200, 200))
         remote_stats_rect = remote_stats.get_rect(right=self.LARGURA - 20, top=40)
         self.JANELA.blit(remote_stats, remote_stats_rect)
         
@@ -843,48 +1061,38 @@ class MultiplayerGame:
         
         # Escudo
         if self.local_player.tiene_escudo:
-            escudo_icon = font_small.render("🛡️", True, (150, 220, 255))
+            escudo_icon = assets.renderizar_texto("🛡️", 24, (150, 220, 255))
             escudo_rect = escudo_icon.get_rect(center=(center_x - 30, y_offset + 20))
             self.JANELA.blit(escudo_icon, escudo_rect)
         
         # Control remoto
         if self.local_player.tiene_control_remoto:
-            control_icon = font_small.render("🎮", True, (220, 150, 255))
+            control_icon = assets.renderizar_texto("🎮", 24, (220, 150, 255))
             control_rect = control_icon.get_rect(center=(center_x + 30, y_offset + 20))
             self.JANELA.blit(control_icon, control_rect)
         
         # Indicador de rango (debajo de los iconos)
-        range_text = font_small.render(f"🔥{self.local_player.rango_explosion}", True, (255, 200, 100))
+        range_text = assets.renderizar_texto(f"🔥{self.local_player.rango_explosion}", 24, (255, 200, 100))
         range_rect = range_text.get_rect(center=(center_x, y_offset + 40))
         self.JANELA.blit(range_text, range_rect)
         
         # Indicador de bomba activa (arriba del centro)
         if self.local_player.bomba_colocada:
-            bomba_indicator = font_small.render("💣 ACTIVA", True, (255, 100, 100))
+            bomba_indicator = assets.renderizar_texto("💣 ACTIVA", 24, (255, 100, 100))
             bomba_rect = bomba_indicator.get_rect(center=(center_x, y_offset))
             self.JANELA.blit(bomba_indicator, bomba_rect)
+        
+        return pygame.Rect(0, 0, self.LARGURA, 60)
     
     def draw_connection_status(self):
         """Dibuja el estado de la conexión - AJUSTADO para 60px"""
         # Panel de estado de conexión (esquina superior derecha) - MÁS PEQUEÑO
-        status_panel = pygame.Surface((180, 25), pygame.SRCALPHA)
-        status_panel.fill((0, 0, 0, 180))
-        
-        font_small = pygame.font.Font(None, 20)  # Más pequeño
-        
-        if self.network.is_connected():
-            status_icon = "🟢"
-            status_color = (0, 255, 0)
-            status_text = f"{status_icon} ONLINE"
-        else:
-            status_icon = "🔴"
-            status_color = (255, 0, 0)
-            status_text = f"{status_icon} OFFLINE"
-        
-        # Solo mostrar estado básico
-        status = font_small.render(status_text, True, status_color)
-        status_rect = status.get_rect(center=(90, 12))
-        status_panel.blit(status, status_rect)
+        # Solo hay dos estados posibles: cada panel se compone una única vez
+        conectado = self.network.is_connected()
+        status_panel = assets.obtener_generado(
+            ('panel_conexion', conectado),
+            lambda: self._crear_panel_conexion(conectado)
+        )
         
         # Posicionar en esquina superior derecha
         self.JANELA.blit(status_panel, (self.LARGURA - 185, 30))
@@ -896,8 +1104,10 @@ class MultiplayerGame:
             tiempo_actual = pygame.time.get_ticks() - self.tiempo_inicio
             
             # Manejar eventos
-            if not self.handle_events():
-                break
+            self.perfil.comenzar_frame()
+            with self.perfil.fase('entrada'):
+                if not self.handle_events():
+                    break
             
             # Si estamos esperando conexión
             if self.waiting_for_connection:
@@ -907,9 +1117,8 @@ class MultiplayerGame:
                 # Verificar si ya estamos conectados
                 if self.network.is_connected() and self.network.connection_established:
                     self.waiting_for_connection = False
+                    self.dirty.invalidar()
                     print("✅ ¡Conexión establecida! Comenzando juego...")
-                    # Pequeña pausa para sincronizar
-                    pygame.time.delay(1000)
                     continue
                 
                 # Verificar timeout
@@ -917,20 +1126,26 @@ class MultiplayerGame:
                     print("❌ Tiempo de espera agotado para conexión")
                     self.game_running = False
                     break
+                if self.network.rechazo:
+                    self.game_running = False
+                    break
                 
-                # Dibujar pantalla de espera
+                # Dibujar pantalla de espera; en lugar de dormir el frame completo se
+                # espera el saludo, así el juego arranca en cuanto se completa
                 self.draw_waiting_screen()
-                self.clock.tick(30)
+                self.network.lista.wait(1 / 30)
                 continue
             
             # Juego normal - ya conectados
             self.update(tiempo_actual)
             self.render()
+            self.perfil.terminar_frame()
             self.clock.tick(60)  # 60 FPS máximo
         
         # Pantalla de fin de juego
         if self.network_initialized:
             self.network.disconnect()
+        self.perfil.volcar_si_usado()
         
         self.show_game_over()
     
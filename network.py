@@ -1,418 +1,800 @@
+import asyncio
 import socket
 import threading
-import pickle
 import time
-import struct
-from enum import Enum
-
-class MessageType(Enum):
-    """Tipos de mensajes para el protocol del juego"""
-    CONNECTION_REQUEST = 1
-    CONNECTION_ACCEPTED = 2
-    PLAYER_STATE = 3
-    BOMB_PLACED = 4
-    BOMB_EXPLODED = 5
-    OBJECT_DESTROYED = 6
-    PLAYER_HIT = 7
-    GAME_OVER = 8
-    HEARTBEAT = 9
-    POWERUP_SPAWNED = 10
-    POWERUP_COLLECTED = 11
-    PLAYER_POWERUP_STATE = 12
-    CONNECTION_CHECK = 13
+import random
+from collections import deque
+from protocolo import (MessageType, ErrorProtocolo, MAX_TAMAÑO_MENSAJE, BufferRecepcion,
+                       VERSION_PROTOCOLO, MAGIA_PROTOCOLO, RECHAZO_VERSION, MOTIVOS_RECHAZO,
+                       codificar_mensaje, decodificar_mensaje,
+                       codificar_datagrama, decodificar_datagrama, secuencia_posterior,
+                       diferencia_estado)
+from reloj_red import EstimadorReloj
+from telemetria import TelemetriaRed, volcar_json
+
+
+# Mensajes de cada tick que no se anuncian en la consola
+TIPOS_FRECUENTES = frozenset({
+    MessageType.PLAYER_STATE.value, MessageType.PLAYER_STATE_DELTA.value,
+    MessageType.PLAYER_INPUT.value, MessageType.WORLD_SNAPSHOT.value,
+    MessageType.HEARTBEAT.value
+})
+
+# Mensajes TCP de los que solo importa el más nuevo: mientras esperan en la cola de
+# salida, uno nuevo con la misma clave (tipo, jugador) reemplaza al anterior
+TIPOS_COMBINABLES = frozenset({
+    MessageType.PLAYER_STATE.value, MessageType.PLAYER_STATE_DELTA.value,
+    MessageType.WORLD_SNAPSHOT.value, MessageType.HEARTBEAT.value
+})
+
+
+class CanalUDP:
+    """Canal no fiable para el estado de alta frecuencia: cada datagrama lleva un
+    número de secuencia y el receptor se queda solo con el más nuevo, así que un
+    paquete perdido no retrasa a los siguientes como pasa en TCP.
+
+    perdida y desorden simulan una red mala en las pruebas por loopback: la
+    fracción de datagramas que se descartan al enviar y la de los que se
+    retienen para salir detrás del siguiente.
+    """
+
+    def __init__(self, transporte, perdida=0.0, desorden=0.0, rng=None):
+        self.transporte = transporte    # Cualquier objeto con sendto (socket o transporte asyncio)
+        self.secuencia = 0
+        self.ultima_recibida = None
+
+        self.perdida = perdida
+        self.desorden = desorden
+        self.rng = rng or random.Random()
+        self.retenido = None
+
+        self.stats = {
+            'datagrams_sent': 0,
+            'datagrams_received': 0,
+            'datagrams_stale': 0,
+            'datagrams_dropped': 0   # Descartados por la simulación de pérdida
+        }
+
+    def enviar(self, message, destino):
+        """Envía el mensaje; retorna (bytes, ns que llevó codificarlo) para la telemetría"""
+        self.secuencia = (self.secuencia + 1) & 0xFFFFFFFF
+        inicio = time.perf_counter_ns()
+        datagrama = codificar_datagrama(message, self.secuencia)
+        resultado = (len(datagrama), time.perf_counter_ns() - inicio)
+
+        if self.perdida and self.rng.random() < self.perdida:
+            self.stats['datagrams_dropped'] += 1
+            return resultado
+        if self.desorden and self.retenido is None and self.rng.random() < self.desorden:
+            self.retenido = (datagrama, destino)
+            return resultado
+
+        self.transporte.sendto(datagrama, destino)
+        self.stats['datagrams_sent'] += 1
+        if self.retenido:
+            self.transporte.sendto(*self.retenido)
+            self.stats['datagrams_sent'] += 1
+            self.retenido = None
+        return resultado
+
+    def leer(self, datos):
+        """Decodifica un datagrama recibido; retorna (secuencia, mensaje)"""
+        secuencia, message = decodificar_datagrama(datos)
+        self.stats['datagrams_received'] += 1
+        return secuencia, message
+
+    def es_nuevo(self, secuencia):
+        """Acepta la secuencia si es posterior a la última aceptada (descarta viejos y duplicados)"""
+        if self.ultima_recibida is not None and not secuencia_posterior(secuencia, self.ultima_recibida):
+            self.stats['datagrams_stale'] += 1
+            return False
+        self.ultima_recibida = secuencia
+        return True
+
+    def reiniciar(self):
+        """Olvida la secuencia del otro extremo (nueva conexión)"""
+        self.ultima_recibida = None
+
+
+class ColaSalida:
+    """Cola de salida acotada de una conexión TCP (solo la usa el thread de red).
+
+    Las tramas esperan aquí mientras el transporte tiene su buffer lleno y salen
+    todas en una escritura cuando se vacía. Mientras esperan, los mensajes
+    combinables se reemplazan por el más nuevo; los eventos fiables (bombas,
+    objetos, power-ups, entradas) nunca se descartan: si pasan de LIMITE_BYTES es
+    que el otro equipo no está leyendo, y la conexión se da por perdida.
+    """
+
+    LIMITE_BYTES = 256 * 1024
+
+    def __init__(self):
+        self.tramas = deque()   # [clave, trama, envío]; clave None si no es combinable
+        self.por_clave = {}
+        self.bytes = 0
+        self.maximo = 0         # Mayor cantidad de tramas en espera
+        self.combinadas = 0     # Tramas reemplazadas por una más nueva
+
+    def __len__(self):
+        return len(self.tramas)
+
+    def agregar(self, clave, trama, envio):
+        """Encola la trama; retorna el envío que reemplazó (o None)"""
+        if clave is not None:
+            entrada = self.por_clave.get(clave)
+            if entrada:
+                reemplazado = entrada[2]
+                self.bytes += len(trama) - len(entrada[1])
+                entrada[1], entrada[2] = trama, envio
+                self.combinadas += 1
+                return reemplazado
+
+        entrada = [clave, trama, envio]
+        self.tramas.append(entrada)
+        if clave is not None:
+            self.por_clave[clave] = entrada
+        self.bytes += len(trama)
+        self.maximo = max(self.maximo, len(self.tramas))
+        return None
+
+    def excedida(self):
+        return self.bytes > self.LIMITE_BYTES
+
+    def sacar_todo(self):
+        """Retorna (bytes de todas las tramas, sus envíos) y deja la cola vacía"""
+        datos = b''.join(entrada[1] for entrada in self.tramas)
+        envios = [entrada[2] for entrada in self.tramas]
+        self.tramas.clear()
+        self.por_clave.clear()
+        self.bytes = 0
+        return datos, envios
+
+
+class ProtocoloTCP(asyncio.BufferedProtocol):
+    """Conexión TCP con el otro equipo. asyncio escribe lo recibido directamente en
+    el BufferRecepcion (get_buffer), sin bytes intermedios, y avisa a GameNetwork.
+    
+    Lo que se envía pasa por la ColaSalida; el transporte solo recibe datos mientras
+    su buffer no supere LIMITE_TRANSPORTE (pause_writing / resume_writing).
+    """
+
+    LIMITE_TRANSPORTE = 16 * 1024
+
+    def __init__(self, red):
+        self.red = red
+        self.buffer = BufferRecepcion()
+        self.salida = ColaSalida()
+        self.pausada = False
+        self.transporte = None
+        self.cerrada = red.loop.create_future()
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+        # Mensajes pequeños y sensibles a la latencia: sin algoritmo de Nagle
+        transporte.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transporte.set_write_buffer_limits(high=self.LIMITE_TRANSPORTE)
+        self.red._conexion_abierta(self)
+
+    def pause_writing(self):
+        self.pausada = True
+
+    def resume_writing(self):
+        self.pausada = False
+        self.red._vaciar_salida(self)
+
+    def get_buffer(self, sizehint):
+        return self.buffer.espacio_libre()
+
+    def buffer_updated(self, nbytes):
+        self.buffer.recibido(nbytes)
+        self.red._datos_recibidos(self)
+
+    def connection_lost(self, exc):
+        if not self.cerrada.done():
+            self.cerrada.set_result(None)
+        self.red._conexion_perdida(self, exc)
+
+
+class ProtocoloUDP(asyncio.DatagramProtocol):
+    """Socket UDP del canal de estado; los datagramas van a GameNetwork"""
+
+    def __init__(self, red):
+        self.red = red
+
+    def datagram_received(self, datos, origen):
+        self.red._datagrama_recibido(datos, origen)
+
+    def error_received(self, exc):
+        pass  # Un ICMP "puerto inalcanzable" no es motivo para cerrar el canal
+
 
 class GameNetwork:
-    """Sistema de red TCP para el juego Bomberman - VERSIÓN ESTABLE"""
+    """Sistema de red TCP para el juego Bomberman - VERSIÓN ESTABLE
+    
+    Toda la E/S corre en un único thread con un loop de asyncio: sockets no
+    bloqueantes, sin un thread por conexión ni esperas con sleep. Los métodos
+    públicos se pueden llamar desde el thread del juego; lo que tenga que tocar
+    un transporte se pasa al loop con call_soon_threadsafe.
+    
+    El saludo es un solo ida y vuelta: CONNECTION_REQUEST con la versión del
+    protocolo y CONNECTION_ACCEPTED con el nivel, la semilla y la hora del host
+    (primera muestra para el reloj). Al completarse se marca el Event lista.
     
-    def __init__(self, is_host=False, host_ip='127.0.0.1', port=4040):
+    Si se corta una conexión ya establecida, el cliente vuelve a conectarse solo
+    (INTENTOS_RECONEXION intentos) y quien acepta le reenvía el mundo completo en
+    un WORLD_STATE (ver send_world_state).
+    """
+    
+    TIEMPO_SALUDO = 5.0     # Segundos que el host espera el CONNECTION_REQUEST
+    INTENTOS_RECONEXION = 20    # Unos 35 s con las esperas crecientes de _client_main
+    
+    def __init__(self, is_host=False, host_ip='127.0.0.1', port=4040, perdida_udp=0.0, desorden_udp=0.0,
+                 telemetria_json=None):
         self.is_host = is_host
         self.host_ip = host_ip
         self.port = port
         
-        # Sockets TCP
-        self.server_socket = None
-        self.client_socket = None
-        self.connection_socket = None
+        # Loop de asyncio y su thread (ver initialize)
+        self.loop = None
+        self.hilo_red = None     # Thread que ejecuta el loop
+        self.tareas = set()     # Referencias a las tareas en curso (asyncio solo guarda débiles)
+        
+        # TCP: servidor (host) y conexión activa con el otro equipo
+        self.servidor = None
+        self.conexion = None
+        self.aceptada = None    # asyncio.Event: llegó CONNECTION_ACCEPTED o se cortó (cliente)
+        self.timer_saludo = None
+        self.saludo_enviado = 0.0   # Hora local del CONNECTION_REQUEST (cliente)
+        self.tarea_conexion = None  # _client_main en curso (cliente)
+        self.id_asignado = None     # Id del primer saludo aceptado; al reconectar se pide el mismo
+        
+        # Canal UDP para PLAYER_STATE (mismo número de puerto que TCP en el host).
+        # Solo se usa cuando ya llegó algún datagrama del otro extremo; mientras
+        # tanto (o si un firewall lo bloquea) el estado sigue yendo por TCP.
+        self.udp = None
+        self.udp_peer = None
+        self.udp_activo = False
+        self.perdida_udp = perdida_udp
+        self.desorden_udp = desorden_udp
         
         self.connected = False
         self.connection_established = False
         self.peer_address = None
         self.running = True
         
-        # Locks para sincronización
-        self.connection_lock = threading.Lock()
-        self.message_lock = threading.Lock()
+        # Saludo completo: el juego puede esperar este Event en lugar de consultar
+        self.lista = threading.Event()
+        self.rechazo = None     # Motivo si el otro equipo rechazó la conexión (no se reintenta)
         
-        # Buffer para mensajes recibidos
-        self.received_messages = []
+        # Partida que propone el host en el saludo (la fija MultiplayerGame) y que adopta el cliente
+        self.nivel = "level2"
+        self.semilla = 0
+        
+        # Jugador propio; al conectarse a un servidor dedicado lo asigna el servidor
+        self.player_id = 1 if is_host else 2
+        self.max_jugadores = 2
+        self.servidor_dedicado = False
+        
+        # Lote de envío por tick (ver comenzar_lote)
+        self.lote = None        # Lista de (clave, trama, envío) mientras hay un lote abierto
+        self.hilo_lote = None
+        
+        # Mensajes recibidos: el loop agrega por un extremo y el juego saca por el otro
+        self.received_messages = deque()
         
         # Heartbeat - AJUSTADO PARA MÁS ESTABILIDAD
         self.last_heartbeat_received = time.time()
         self.heartbeat_interval = 3.0  # Más lento para reducir tráfico
         self.heartbeat_timeout = 30.0  # Mucho más tolerante
+        self.timer_heartbeat = None
+        self.timer_silencio = None
+        self.heartbeat_failures = 0
+        
+        # Reloj de la partida: el del host (o servidor). Los heartbeats miden el desfase
+        # con el otro equipo y el RTT; el cliente suma ese desfase a su hora local
+        self.reloj = EstimadorReloj()
+        self.ultimo_heartbeat = None    # (hora del otro equipo, llegada local) para el eco
         
         # Estadísticas
         self.stats = {
             'messages_sent': 0,
             'messages_received': 0,
+            'tcp_reads': 0,
+            'batches_sent': 0,
             'connection_errors': 0,
             'last_debug_time': time.time(),
             'last_heartbeat_sent': 0
         }
         
+        # Telemetría por tipo de mensaje (ver obtener_telemetria); si se indica un
+        # archivo, se vuelca en JSON cada intervalo_telemetria segundos
+        self.telemetria = TelemetriaRed()
+        self.ruta_telemetria = telemetria_json
+        self.intervalo_telemetria = 5.0
+        self.ultimo_volcado = time.time()
+        self.timer_telemetria = None
+        
         # Para controlar flood de mensajes
         self.last_player_state_sent = 0
         self.player_state_min_interval = 0.05  # 20 mensajes por segundo máximo
         
+        # Compresión del estado: keyframes completos por TCP y deltas por UDP
+        self.keyframe_id = 0
+        self.keyframe_estado = None
+        self.last_keyframe_sent = 0
+        self.keyframe_interval = 1.0
+    
     def initialize(self):
-        """Inicializa la conexión TCP"""
+        """Arranca el thread de red y abre los sockets (el cliente conecta en segundo plano)"""
         try:
-            if self.is_host:
-                # HOST: Crear socket servidor
-                self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                self.server_socket.settimeout(1.0)
-                
-                # Bind
-                self.server_socket.bind(('0.0.0.0', self.port))
-                self.server_socket.listen(1)
-                
-                print(f"🎮 Host TCP en puerto {self.port}")
-                
-                # Thread para aceptar
-                threading.Thread(target=self._host_main, daemon=True).start()
-                
-            else:
-                # CLIENTE
-                print(f"🔗 Conectando a {self.host_ip}:{self.port}")
-                self.peer_address = (self.host_ip, self.port)
-                
-                # Thread para conectar
-                threading.Thread(target=self._client_main, daemon=True).start()
+            self.loop = asyncio.new_event_loop()
+            self.hilo_red = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self.hilo_red.start()
             
+            # Esperar a que se abran los sockets para informar errores (puerto ocupado)
+            asyncio.run_coroutine_threadsafe(self._iniciar(), self.loop).result(timeout=5)
             return True
-            
+        
         except Exception as e:
             print(f"❌ Error inicializando: {e}")
+            self._detener_loop()
             return False
     
-    def _host_main(self):
-        """Función principal del host"""
-        print("👂 Host esperando conexión...")
-        
-        try:
-            # Aceptar conexión
-            self.connection_socket, client_addr = self.server_socket.accept()
-            print(f"✅ Cliente conectado: {client_addr}")
-            
-            # Configurar
-            self.client_socket = self.connection_socket
-            self.client_socket.settimeout(0.1)
-            self.peer_address = client_addr
-            
-            with self.connection_lock:
-                self.connected = True
-                self.connection_established = True
-            
-            # Iniciar recepción
-            threading.Thread(target=self._receive_loop, daemon=True).start()
-            
-            # Pequeña pausa
-            time.sleep(0.3)
-            
-            # Enviar confirmación
-            welcome_msg = {
-                'type': MessageType.CONNECTION_ACCEPTED.value,
-                'message': '¡Bienvenido!',
-                'timestamp': time.time(),
-                'player_id': 2,
-                'data': {'status': 'connected'}
-            }
-            
-            if self._send_tcp_message(welcome_msg):
-                print("📤 Confirmación enviada")
+    async def _iniciar(self):
+        if self.is_host:
+            # HOST: escuchar; cada conexión entrante crea un ProtocoloTCP
+            self.servidor = await self.loop.create_server(
+                lambda: ProtocoloTCP(self), '0.0.0.0', self.port, backlog=1, reuse_address=True)
+            print(f"🎮 Host TCP en puerto {self.port}")
             
-            # Iniciar heartbeat
-            threading.Thread(target=self._heartbeat_loop, daemon=True).start()
-            
-            print("✅ Host listo para jugar")
+            await self._abrir_udp(('0.0.0.0', self.port))
+            print("👂 Host esperando conexión...")
+        
+        else:
+            # CLIENTE
+            print(f"🔗 Conectando a {self.host_ip}:{self.port}")
+            self.peer_address = (self.host_ip, self.port)
+            self.aceptada = asyncio.Event()
             
-        except socket.timeout:
-            print("⏱️ Host: Timeout esperando conexión")
-        except Exception as e:
-            print(f"❌ Host error: {e}")
+            self.tarea_conexion = self._tarea(self._client_main())
+            if await self._abrir_udp(('0.0.0.0', 0)):
+                self.udp_peer = self.peer_address
+        
+        self.timer_telemetria = self.loop.call_later(1.0, self._muestrear_telemetria)
+    
+    async def _abrir_udp(self, direccion):
+        """Abre el canal UDP sobre el loop"""
+        try:
+            transporte, _ = await self.loop.create_datagram_endpoint(
+                lambda: ProtocoloUDP(self), local_addr=direccion)
+        except OSError as e:
+            print(f"⚠️ Canal UDP no disponible ({e}), el estado irá por TCP")
+            return False
+        
+        self.udp = CanalUDP(transporte, perdida=self.perdida_udp, desorden=self.desorden_udp)
+        print(f"📡 Canal UDP en puerto {transporte.get_extra_info('sockname')[1]}")
+        return True
+    
+    def _tarea(self, corrutina):
+        """Lanza una corrutina en el loop guardando la referencia hasta que termine"""
+        tarea = self.loop.create_task(corrutina)
+        self.tareas.add(tarea)
+        tarea.add_done_callback(self.tareas.discard)
+        return tarea
+    
+    def _en_loop(self, funcion, *args):
+        """Ejecuta funcion en el thread de red (ya mismo si se llama desde él)"""
+        if threading.current_thread() is self.hilo_red:
+            funcion(*args)
+        else:
+            self.loop.call_soon_threadsafe(funcion, *args)
+    
+    def _conexion_abierta(self, conexion):
+        """Una conexión TCP quedó abierta (aceptada por el host o conectada por el cliente)"""
+        if self.conexion is not None:
+            origen = conexion.transporte.get_extra_info('peername')
+            if not self.is_host or origen[0] != self.peer_address[0]:
+                # El host juega contra un solo equipo a la vez
+                print(f"⚠️ Rechazando conexión de {origen}: partida en curso")
+                conexion.transporte.close()
+                return
+            # El mismo equipo vuelve a conectarse: la conexión anterior quedó colgada
+            # (un corte de Wi-Fi que TCP aún no detectó) y se descarta sin más
+            print(f"🔄 {origen[0]} se reconecta; se descarta la conexión anterior")
+            anterior, self.conexion = self.conexion, None
+            anterior.transporte.abort()
+            self.connection_established = False
+            self.lista.clear()
+            self._detener_heartbeat()
+        
+        self.conexion = conexion
+        self.peer_address = conexion.transporte.get_extra_info('peername')[:2]
+        self.last_heartbeat_received = time.time()
+        self.keyframe_estado = None  # El primer estado tras conectar va completo
+        self.reloj.reiniciar()
+        self.ultimo_heartbeat = None
+        if self.is_host and self.udp:
+            self.udp.reiniciar()
+            self.udp_activo = False
+        self.connected = True
+        
+        if self.is_host:
+            # La partida empieza cuando llegue el CONNECTION_REQUEST (ver _responder_saludo)
+            print(f"✅ Cliente conectado: {self.peer_address}")
+            self.timer_saludo = self.loop.call_later(self.TIEMPO_SALUDO, self._saludo_vencido, conexion)
+        else:
+            print("✅ Conectado al host")
+    
+    def _responder_saludo(self, message):
+        """Host: contesta el CONNECTION_REQUEST con la partida o con el motivo del rechazo"""
+        if self.connection_established or not self.conexion:
+            return
+        if message.get('magia') != MAGIA_PROTOCOLO:
+            print(f"⚠️ {self.peer_address} no habla este protocolo, cerrando")
+            self._cerrar_conexion()
+            return
+        
+        rechazo = 0 if message.get('version') == VERSION_PROTOCOLO else RECHAZO_VERSION
+        self._send_tcp_message({
+            'type': MessageType.CONNECTION_ACCEPTED.value,
+            'timestamp': self.reloj_partida(),
+            'player_id': 2,
+            'max_jugadores': 2,
+            'dedicado': False,
+            'version': VERSION_PROTOCOLO,
+            'rechazo': rechazo,
+            'nivel': self.nivel,
+            'semilla': self.semilla
+        })
+        if rechazo:
+            print(f"⚠️ Rechazando a {self.peer_address}: {MOTIVOS_RECHAZO[rechazo]} "
+                  f"(v{message.get('version')}, esta es v{VERSION_PROTOCOLO})")
+            self._cerrar_conexion()     # Sale la respuesta y después se cierra
+            return
+        
+        self.timer_saludo.cancel()
+        self.connection_established = True
+        self.lista.set()
+        self._iniciar_heartbeat()
+        print("✅ Host listo para jugar")
     
-    def _client_main(self):
-        """Función principal del cliente"""
-        max_attempts = 3
-        attempt = 0
+    def _saludo_vencido(self, conexion):
+        if conexion is self.conexion and not self.connection_established:
+            print(f"⏱️ {self.peer_address} no envió CONNECTION_REQUEST, cerrando")
+            self._cerrar_conexion()
+    
+    async def _client_main(self, max_attempts=8):
+        """Cliente: conecta al host y completa el saludo en un ida y vuelta. Si el host
+        aún no escucha, reintenta con esperas crecientes (desde 0.1 s)"""
+        espera = 0.1
         
-        while attempt < max_attempts:
+        for attempt in range(max_attempts):
+            if not self.running:
+                return False
+            print(f"🔄 Intento {attempt + 1}/{max_attempts}")
             try:
-                print(f"🔄 Intento {attempt + 1}/{max_attempts}")
-                
                 # Conectar
-                self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.client_socket.settimeout(5)
-                self.client_socket.connect((self.host_ip, self.port))
-                self.client_socket.settimeout(0.1)
-                
-                print("✅ Conectado al host")
+                self.aceptada.clear()
+                await asyncio.wait_for(
+                    self.loop.create_connection(lambda: ProtocoloTCP(self), self.host_ip, self.port), 5)
                 
-                with self.connection_lock:
-                    self.connected = True
-                
-                # Iniciar recepción
-                threading.Thread(target=self._receive_loop, daemon=True).start()
-                
-                # Enviar solicitud
+                # Enviar solicitud (hora local: la respuesta del host da la primera muestra del reloj)
+                self.saludo_enviado = time.time()
                 request = {
                     'type': MessageType.CONNECTION_REQUEST.value,
-                    'timestamp': time.time(),
-                    'player_id': 2,
-                    'data': {'action': 'connect'}
+                    'timestamp': self.saludo_enviado,
+                    'player_id': self.id_asignado or 0,
+                    'magia': MAGIA_PROTOCOLO,
+                    'version': VERSION_PROTOCOLO
                 }
                 
                 if not self._send_tcp_message(request):
                     print("❌ Error enviando solicitud")
                 
-                # Esperar confirmación (CORRECCIÓN: Se verifica la bandera establecida en _process_message)
-                print("⏳ Esperando confirmación...")
-                start_time = time.time()
-                
-                while time.time() - start_time < 10.0:
-                    # CORRECCIÓN: Evitamos la condición de carrera: 
-                    # No consumimos mensajes con get_messages(). Solo verificamos la bandera.
-                    with self.connection_lock:
-                        if self.connection_established:
-                            print("✅ Confirmación verificada!")
-                            
-                            # Iniciar heartbeat (lógica original)
-                            threading.Thread(target=self._heartbeat_loop, daemon=True).start()
-                            
-                            print("✅ Cliente listo para jugar")
-                            return True
-                    
-                    time.sleep(0.1)
-                
-                print("❌ No se recibió confirmación")
+                # _process_message marca el evento al recibir la respuesta (o se cortó la conexión)
+                try:
+                    await asyncio.wait_for(self.aceptada.wait(), self.TIEMPO_SALUDO)
+                except asyncio.TimeoutError:
+                    print("❌ No se recibió confirmación")
                 
+                if self.rechazo:
+                    self._cerrar_conexion()
+                    return False
+                if self.connection_established:
+                    self._iniciar_heartbeat()
+                    print("✅ Cliente listo para jugar")
+                    return True
+            
             except ConnectionRefusedError:
                 print("❌ Conexión rechazada")
-            except socket.timeout:
+            except asyncio.TimeoutError:
                 print("⏱️ Timeout de conexión")
-            except Exception as e:
+            except OSError as e:
                 print(f"⚠️ Error: {e}")
             
             # Limpiar y reintentar
-            if self.client_socket:
-                try:
-                    self.client_socket.close()
-                except:
-                    pass
-                self.client_socket = None
-            
-            with self.connection_lock:
-                self.connected = False
-                self.connection_established = False
+            self._cerrar_conexion()
             
-            attempt += 1
-            if attempt < max_attempts:
-                print(f"🔄 Reintentando en 3 segundos...")
-                time.sleep(3)
+            if attempt < max_attempts - 1:
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, 2.0)
         
         print("❌ No se pudo conectar")
         return False
     
-    def _receive_loop(self):
-        """Loop de recepción - MEJORADO"""
-        print("📡 Thread de recepción iniciado")
+    def _cerrar_conexion(self):
+        """Cierra la conexión TCP actual (si hay) y marca el estado como desconectado"""
+        if self.conexion:
+            self._vaciar_salida(self.conexion)  # close() aún envía lo que tenga el transporte
+        conexion, self.conexion = self.conexion, None
+        if conexion:
+            conexion.transporte.close()
+        self.connected = False
+        self.connection_established = False
+        self.lista.clear()
+        self._detener_heartbeat()
+    
+    def _datos_recibidos(self, conexion):
+        """Procesa las tramas completas que acaban de llegar por TCP"""
+        self.last_heartbeat_received = time.time()
+        self.stats['tcp_reads'] += 1
         
-        buffer = b""
-        error_count = 0
-        max_errors = 10
+        # Una trama que no se puede decodificar se salta sola, sin perder las que vienen detrás
+        for trama in conexion.buffer.tramas():
+            inicio = time.perf_counter_ns()
+            try:
+                message = decodificar_mensaje(trama)
+            except ErrorProtocolo as e:
+                print(f"⚠️ Trama descartada: {e}")
+                continue
+            self.telemetria.recibido(message['type'], len(trama) + 4, time.perf_counter_ns() - inicio)
+            
+            try:
+                self._process_message(message)
+            except Exception as e:
+                print(f"⚠️ Error procesando mensaje: {e}")
+    
+    def _conexion_perdida(self, conexion, exc):
+        if conexion is not self.conexion:
+            return  # Rechazada o ya reemplazada
+        if exc is None:
+            print("📭 Conexión cerrada por el peer")
+        else:
+            print(f"⚠️ Conexión perdida: {exc}")
+            self.stats['connection_errors'] += 1
+        establecida = self.connection_established
+        self.conexion = None
+        self.connected = False
+        self.connection_established = False
+        self.lista.clear()
+        self._detener_heartbeat()
+        if self.aceptada:
+            self.aceptada.set()     # El cliente que esperaba el saludo reintenta ya
+        print("🔌 Recepción terminada")
         
+        # Un corte en plena partida no la termina: el cliente vuelve a conectarse
+        if establecida and not self.is_host and self.running:
+            self._reconectar()
+    
+    def _datagrama_recibido(self, datos, origen):
+        """Recibe datagramas de estado; los viejos o fuera de orden se descartan"""
+        inicio = time.perf_counter_ns()
         try:
-            while self.running and error_count < max_errors:
-                try:
-                    # Verificar conexión
-                    with self.connection_lock:
-                        if not self.connected or not self.client_socket:
-                            time.sleep(0.1)
-                            continue
-                    
-                    # Recibir datos
-                    data = self.client_socket.recv(4096)
-                    
-                    if not data:
-                        print("📭 Conexión cerrada por el peer")
-                        with self.connection_lock:
-                            self.connected = False
-                        break
-                    
-                    buffer += data
-                    error_count = 0  # Resetear contador de errores
-                    
-                    with self.connection_lock:
-                        self.last_heartbeat_received = time.time()
-                    
-                    self.stats['messages_received'] += 1
-                    
-                    # Procesar mensajes completos
-                    while len(buffer) >= 4:
-                        try:
-                            # Longitud del mensaje
-                            msg_length = struct.unpack('!I', buffer[:4])[0]
-                            
-                            # Verificar longitud válida (máximo 1MB)
-                            if msg_length > 1048576:
-                                print("⚠️ Mensaje demasiado grande, ignorando")
-                                buffer = b""
-                                break
-                            
-                            # Verificar si tenemos el mensaje completo
-                            if len(buffer) < 4 + msg_length:
-                                break
-                            
-                            # Extraer mensaje
-                            msg_data = buffer[4:4 + msg_length]
-                            buffer = buffer[4 + msg_length:]
-                            
-                            # Deserializar
-                            message = pickle.loads(msg_data)
-                            msg_type = message.get('type')
-                            
-                            # Procesar
-                            self._process_message(message)
-                            
-                        except struct.error:
-                            print("⚠️ Error en formato de mensaje")
-                            buffer = b""
-                            error_count += 1
-                            break
-                        except Exception as e:
-                            print(f"⚠️ Error procesando mensaje: {e}")
-                            buffer = b""
-                            error_count += 1
-                            break
-                            
-                except socket.timeout:
-                    continue
-                except ConnectionResetError:
-                    print("⚠️ Conexión reseteada")
-                    with self.connection_lock:
-                        self.connected = False
-                    break
-                except OSError as e:
-                    if e.errno in [10038, 10054]:
-                        print("⚠️ Conexión cerrada por el peer")
-                    else:
-                        print(f"⚠️ OSError: {e}")
-                    with self.connection_lock:
-                        self.connected = False
-                    break
-                except Exception as e:
-                    print(f"⚠️ Error en recepción: {e}")
-                    error_count += 1
-                    time.sleep(0.1)
+            secuencia, message = self.udp.leer(datos)
+        except ErrorProtocolo as e:
+            print(f"⚠️ Datagrama descartado: {e}")
+            return
+        self.telemetria.recibido(message['type'], len(datos), time.perf_counter_ns() - inicio)
         
-        except Exception as e:
-            print(f"💥 ERROR en receive_loop: {e}")
+        # Solo se aceptan datagramas del equipo conectado por TCP; el host
+        # aprende así el puerto UDP del cliente
+        if not self.peer_address or origen[0] != self.peer_address[0]:
+            return
+        if self.is_host and self.udp_peer != origen:
+            self.udp_peer = origen
+            # Responder para que el cliente sepa que el canal funciona en ambos sentidos
+            self._send_udp_message(self._mensaje_heartbeat())
+        if not self.udp_activo:
+            print("✅ Canal UDP activo para el estado de los jugadores")
+            self.udp_activo = True
         
-        print("🔌 Thread de recepción terminado")
+        if self.udp.es_nuevo(secuencia):
+            self._process_message(message)
     
     def _process_message(self, message):
         """Procesa un mensaje recibido - SILENCIOSO para mensajes frecuentes"""
         msg_type = message.get('type')
         
         # Actualizar heartbeat
-        with self.connection_lock:
-            self.last_heartbeat_received = time.time()
+        self.last_heartbeat_received = time.time()
+        self.stats['messages_received'] += 1
         
         # Solo mostrar logs para mensajes importantes
-        if msg_type not in [MessageType.PLAYER_STATE.value, MessageType.HEARTBEAT.value]:
+        if msg_type not in TIPOS_FRECUENTES:
             print(f"📨 Mensaje recibido - Tipo: {msg_type}")
         
         # Procesar según tipo
         if msg_type == MessageType.CONNECTION_ACCEPTED.value:
-            print("✅ Conexión aceptada por el host")
-            with self.connection_lock:
+            if message.get('rechazo') or message.get('version') != VERSION_PROTOCOLO:
+                self.rechazo = MOTIVOS_RECHAZO.get(message.get('rechazo') or RECHAZO_VERSION)
+                print(f"❌ Conexión rechazada: {self.rechazo}")
+            else:
+                # El id lo asigna quien acepta (un servidor dedicado reparte de 1 a N)
+                self.player_id = message.get('player_id') or self.player_id
+                self.id_asignado = self.player_id
+                self.max_jugadores = message.get('max_jugadores') or self.max_jugadores
+                self.servidor_dedicado = bool(message.get('dedicado'))
+                self.nivel = message.get('nivel') or self.nivel
+                self.semilla = message.get('semilla', 0)
+                # La respuesta sale al momento: primera muestra del reloj sin esperar heartbeats
+                self.reloj.muestra(self.saludo_enviado, message['timestamp'], message['timestamp'], time.time())
+                print(f"✅ Conexión aceptada por el {'servidor' if self.servidor_dedicado else 'host'} "
+                      f"(jugador {self.player_id}, {self.nivel})")
                 self.connection_established = True
-            
+                self.lista.set()
+            if self.aceptada:
+                self.aceptada.set()
+        
         elif msg_type == MessageType.CONNECTION_REQUEST.value and self.is_host:
             print("📨 Solicitud de conexión recibida")
-            
+            self._responder_saludo(message)
+        
         elif msg_type == MessageType.HEARTBEAT.value:
-            pass  # Solo actualiza timestamp
+            llegada = time.time()
+            if message.get('eco'):
+                # Respuesta a un heartbeat nuestro: un intercambio completo para el reloj
+                enviado = message['timestamp']
+                if self.reloj.muestra(message['eco'], enviado - message['retencion'], enviado, llegada):
+                    self.telemetria.muestra_rtt(self.reloj.rtt)
+            self.ultimo_heartbeat = (message['timestamp'], llegada)
             
+            # Hasta tener el filtro lleno se contesta al momento: unas pocas idas y
+            # vueltas al conectar en lugar de una muestra cada heartbeat_interval
+            if self.reloj.calentando:
+                self._send_tcp_message(self._mensaje_heartbeat())
+        
         elif msg_type == MessageType.CONNECTION_CHECK.value:
             if self.is_host:
                 response = {
                     'type': MessageType.CONNECTION_CHECK.value,
-                    'timestamp': time.time(),
+                    'timestamp': self.reloj_partida(),
                     'status': 'ok'
                 }
                 self._send_tcp_message(response)
         
-        # Agregar al buffer
-        with self.message_lock:
-            self.received_messages.append((message, None))
+        # Agregar al buffer con el instante de llegada (espera en cola para la telemetría)
+        self.received_messages.append((message, time.perf_counter_ns()))
     
     def _send_tcp_message(self, message):
         """Envía un mensaje TCP - CON RECONEXIÓN"""
         try:
-            with self.connection_lock:
-                if not self.connected or not self.client_socket:
-                    return False
+            conexion = self.conexion
+            if not self.connected or not conexion:
+                return False
             
-            # Serializar
-            serialized = pickle.dumps(message)
-            length = len(serialized)
+            # Serializar (longitud + mensaje)
+            inicio = time.perf_counter_ns()
+            frame = codificar_mensaje(message)
+            codificado = time.perf_counter_ns()
             
             # Verificar tamaño
-            if length > 1048576:
+            if len(frame) - 4 > MAX_TAMAÑO_MENSAJE:
                 print("⚠️ Mensaje demasiado grande para enviar")
                 return False
             
-            # Enviar longitud + mensaje
-            header = struct.pack('!I', length)
-            self.client_socket.sendall(header + serialized)
+            # (tipo, bytes, ns de codificar, instante) para la telemetría
+            envio = (message['type'], len(frame), codificado - inicio, codificado)
+            clave = (message['type'], message.get('player_id')) if message['type'] in TIPOS_COMBINABLES else None
+            
+            # Dentro de un lote del mismo thread: se envía al cerrar el lote
+            if self.lote is not None and threading.get_ident() == self.hilo_lote:
+                self.lote.append((clave, frame, envio))
+                self.stats['messages_sent'] += 1
+                return True
+            
+            self._en_loop(self._encolar, conexion, ((clave, frame, envio),))
             
             self.stats['messages_sent'] += 1
             return True
-            
-        except BrokenPipeError:
-            print("🔌 Conexión rota al enviar")
+        
+        except Exception as e:
+            print(f"❌ Error enviando: {e}")
             self._try_reconnect()
             return False
+    
+    def _encolar(self, conexion, entradas):
+        """Agrega tramas a la cola de salida (thread de red) y la vacía si el transporte
+        acepta datos; el juego nunca espera a la red, a lo sumo se acumula aquí"""
+        if conexion is not self.conexion or conexion.transporte.is_closing():
+            return
+        
+        for clave, trama, envio in entradas:
+            reemplazado = conexion.salida.agregar(clave, trama, envio)
+            if reemplazado:
+                self.telemetria.combinado(reemplazado[0])
+        
+        if conexion.salida.excedida():
+            print(f"⚠️ Cola de salida llena ({conexion.salida.bytes // 1024} KB sin enviar): "
+                  "el otro equipo no está leyendo")
+            self.stats['connection_errors'] += 1
+            conexion.transporte.abort()
+            return
+        
+        if not conexion.pausada:
+            self._vaciar_salida(conexion)
+    
+    def _vaciar_salida(self, conexion):
+        """Pasa toda la cola de salida al transporte en una sola escritura"""
+        if conexion is not self.conexion or not conexion.salida or conexion.transporte.is_closing():
+            return
+        datos, envios = conexion.salida.sacar_todo()
+        conexion.transporte.write(datos)
+        ahora = time.perf_counter_ns()
+        for tipo, tamaño, codificar_ns, encolado in envios:
+            self.telemetria.enviado(tipo, tamaño, codificar_ns, ahora - encolado)
+    
+    def comenzar_lote(self):
+        """Los mensajes TCP que envíe este thread se acumulan hasta enviar_lote().
+        
+        Los del thread de red (heartbeat, respuestas de recepción) salen al momento.
+        """
+        self.lote = []
+        self.hilo_lote = threading.get_ident()
+    
+    def enviar_lote(self):
+        """Encola juntas las tramas acumuladas desde comenzar_lote() (una sola escritura)"""
+        lote, self.lote = self.lote, None
+        if not lote:
+            return True
+        
+        try:
+            conexion = self.conexion
+            if not self.connected or not conexion:
+                return False
+            self._en_loop(self._encolar, conexion, lote)
+            self.stats['batches_sent'] += 1
+            return True
         except Exception as e:
             print(f"❌ Error enviando: {e}")
             self._try_reconnect()
             return False
     
+    def _send_udp_message(self, message):
+        """Envía un mensaje por el canal UDP; False si aún no hay canal o destino"""
+        if not self.udp or not self.udp_peer:
+            return False
+        try:
+            self._en_loop(self._enviar_datagrama, message, self.udp_peer, time.perf_counter_ns())
+            self.stats['messages_sent'] += 1
+            return True
+        except RuntimeError as e:
+            print(f"⚠️ Error enviando por UDP: {e}")
+            return False
+    
+    def _enviar_datagrama(self, message, destino, encolado):
+        try:
+            tamaño, codificar_ns = self.udp.enviar(message, destino)
+        except (OSError, ErrorProtocolo) as e:
+            print(f"⚠️ Error enviando por UDP: {e}")
+            return
+        self.telemetria.enviado(message['type'], tamaño, codificar_ns, time.perf_counter_ns() - encolado)
+    
     def _try_reconnect(self):
         """Intenta reconectar si se pierde la conexión"""
-        if not self.running:
+        if not self.running or not self.loop or self.loop.is_closed():
             return
-        
+        self._en_loop(self._reconectar)
+    
+    def _reconectar(self):
+        if self.tarea_conexion and not self.tarea_conexion.done():
+            return  # Ya hay un intento en curso
         print("🔄 Intentando reconectar...")
-        
-        with self.connection_lock:
-            self.connected = False
-            self.connection_established = False
-        
-        # Cerrar sockets viejos
-        if self.client_socket:
-            try:
-                self.client_socket.close()
-            except:
-                pass
+        self._cerrar_conexion()
         
         # Solo cliente intenta reconectar automáticamente
-        if not self.is_host:
+        if not self.is_host and self.running:
             print("🔄 Cliente intentando reconectar al host...")
-            # Intentar reconectar en un thread separado
-            threading.Thread(target=self._client_main, daemon=True).start()
+            self.tarea_conexion = self._tarea(self._client_main(self.INTENTOS_RECONEXION))
     
     def send_player_state(self, player_data):
         """Envía estado del jugador - CON THROTTLING"""
@@ -423,27 +805,75 @@ class GameNetwork:
             return True  # Simular éxito pero no enviar realmente
         
         if self.is_connected():
-            message = {
-                'type': MessageType.PLAYER_STATE.value,
-                'player_id': 1 if self.is_host else 2,
-                'data': player_data,
-                'timestamp': current_time
-            }
+            player_id = self.player_id
+            
+            if (not self.udp_activo or self.keyframe_estado is None
+                    or current_time - self.last_keyframe_sent >= self.keyframe_interval):
+                # Keyframe completo por TCP: llega seguro y en orden, así que es la
+                # base confirmada sobre la que el otro equipo aplica los deltas
+                self.keyframe_id = (self.keyframe_id + 1) & 0xFFFF
+                message = {
+                    'type': MessageType.PLAYER_STATE.value,
+                    'player_id': player_id,
+                    'keyframe': self.keyframe_id,
+                    'data': player_data,
+                    'timestamp': self.reloj_partida()
+                }
+                success = self._send_tcp_message(message)
+                if success:
+                    self.keyframe_estado = player_data
+                    self.last_keyframe_sent = current_time
+            else:
+                # Delta por UDP: solo lo que cambió respecto al keyframe. Cada delta
+                # es independiente de los anteriores, así que perder uno no importa
+                message = {
+                    'type': MessageType.PLAYER_STATE_DELTA.value,
+                    'player_id': player_id,
+                    'keyframe': self.keyframe_id,
+                    'data': diferencia_estado(self.keyframe_estado, player_data),
+                    'timestamp': self.reloj_partida()
+                }
+                success = self._send_udp_message(message) or self._send_tcp_message(message)
             
-            success = self._send_tcp_message(message)
             if success:
                 self.last_player_state_sent = current_time
             return success
         
         return False
     
+    def send_player_input(self, seq, input_data):
+        """Envía una entrada del cliente al host (modo autoritativo)"""
+        if self.is_connected():
+            message = {
+                'type': MessageType.PLAYER_INPUT.value,
+                'player_id': self.player_id,
+                'seq': seq,
+                'data': input_data,
+                'timestamp': self.reloj_partida()
+            }
+            return self._send_tcp_message(message)
+        return False
+    
+    def send_authoritative_state(self, player_id, player_data, ack):
+        """Envía el estado autoritativo de un jugador remoto con la última entrada aplicada"""
+        if self.is_connected():
+            message = {
+                'type': MessageType.PLAYER_STATE.value,
+                'player_id': player_id,
+                'ack': ack,
+                'data': player_data,
+                'timestamp': self.reloj_partida()
+            }
+            return self._send_tcp_message(message)
+        return False
+    
     def send_bomb_placed(self, bomb_data):
         """Envía bomba colocada"""
         if self.is_connected():
             message = {
                 'type': MessageType.BOMB_PLACED.value,
                 'data': bomb_data,
-                'timestamp': time.time()
+                'timestamp': self.reloj_partida()
             }
             return self._send_tcp_message(message)
         return False
@@ -454,7 +884,7 @@ class GameNetwork:
             message = {
                 'type': MessageType.OBJECT_DESTROYED.value,
                 'data': object_data,
-                'timestamp': time.time()
+                'timestamp': self.reloj_partida()
             }
             return self._send_tcp_message(message)
         return False
@@ -465,7 +895,7 @@ class GameNetwork:
             message = {
                 'type': MessageType.POWERUP_SPAWNED.value,
                 'data': powerup_data,
-                'timestamp': time.time()
+                'timestamp': self.reloj_partida()
             }
             return self._send_tcp_message(message)
         return False
@@ -476,108 +906,224 @@ class GameNetwork:
             message = {
                 'type': MessageType.POWERUP_COLLECTED.value,
                 'data': powerup_data,
-                'timestamp': time.time()
+                'timestamp': self.reloj_partida()
             }
             return self._send_tcp_message(message)
         return False
     
-    def _heartbeat_loop(self):
-        """Loop de heartbeat - MEJORADO"""
-        print("❤️ Thread de heartbeat iniciado")
-        
-        consecutive_failures = 0
+    def send_world_state(self, estado):
+        """Envía el mundo completo (SimulacionMultijugador.estado_completo) al equipo
+        que acaba de conectarse o reconectarse"""
+        if self.is_connected():
+            message = dict(estado, type=MessageType.WORLD_STATE.value, timestamp=self.reloj_partida())
+            return self._send_tcp_message(message)
+        return False
+    
+    def _iniciar_heartbeat(self):
+        """Programa los timers de heartbeat y de silencio del otro equipo (thread de red)"""
+        print("❤️ Heartbeat iniciado")
+        self._detener_heartbeat()
+        self.heartbeat_failures = 0
+        self.timer_heartbeat = self.loop.call_soon(self._heartbeat)
+        self._vigilar_silencio()
+    
+    def _detener_heartbeat(self):
+        for timer in (self.timer_heartbeat, self.timer_silencio):
+            if timer:
+                timer.cancel()
+        self.timer_heartbeat = self.timer_silencio = None
+    
+    def _heartbeat(self):
+        """Envía un heartbeat y se vuelve a programar"""
         max_failures = 3
+        current_time = time.time()
         
-        while self.running:
-            try:
-                current_time = time.time()
-                
-                # Estadísticas cada 30 segundos (menos frecuente)
-                if current_time - self.stats['last_debug_time'] > 30:
-                    print(f"📊 Stats: Enviados={self.stats['messages_sent']}, Recibidos={self.stats['messages_received']}")
-                    self.stats['last_debug_time'] = current_time
-                
-                # Enviar heartbeat si estamos conectados
-                if self.is_connected():
-                    if current_time - self.stats['last_heartbeat_sent'] >= self.heartbeat_interval:
-                        heartbeat = {
-                            'type': MessageType.HEARTBEAT.value,
-                            'timestamp': current_time,
-                            'seq': self.stats['messages_sent']
-                        }
-                        
-                        if self._send_tcp_message(heartbeat):
-                            self.stats['last_heartbeat_sent'] = current_time
-                            consecutive_failures = 0
-                        else:
-                            consecutive_failures += 1
-                            print(f"⚠️ Heartbeat fallido ({consecutive_failures}/{max_failures})")
-                
-                # Verificar timeout (más tolerante)
-                with self.connection_lock:
-                    time_since = current_time - self.last_heartbeat_received
-                    if self.connected and time_since > self.heartbeat_timeout:
-                        print(f"⚠️ Sin heartbeat por {time_since:.1f}s")
-                        self.connected = False
-                        self.connection_established = False
-                
-                # Si hay muchos fallos consecutivos, intentar reconectar
-                if consecutive_failures >= max_failures and not self.is_host:
-                    print("🔄 Demasiados fallos, intentando reconectar...")
-                    self._try_reconnect()
-                    consecutive_failures = 0
-                
-                time.sleep(1.0)  # Más lento
-                
-            except Exception as e:
-                print(f"⚠️ Error en heartbeat: {e}")
-                time.sleep(2)
+        # Estadísticas cada 30 segundos (menos frecuente)
+        if current_time - self.stats['last_debug_time'] > 30:
+            print(f"📊 Stats: Enviados={self.stats['messages_sent']}, Recibidos={self.stats['messages_received']}")
+            self.stats['last_debug_time'] = current_time
         
-        print("💔 Thread de heartbeat terminado")
+        # Enviar heartbeat si estamos conectados
+        if self.is_connected():
+            heartbeat = self._mensaje_heartbeat()
+            
+            if self._send_tcp_message(heartbeat):
+                self.stats['last_heartbeat_sent'] = current_time
+                # También por UDP: así el host aprende el puerto del
+                # cliente y se mantiene abierto el mapeo de NAT
+                self._send_udp_message(heartbeat)
+                self.heartbeat_failures = 0
+            else:
+                self.heartbeat_failures += 1
+                print(f"⚠️ Heartbeat fallido ({self.heartbeat_failures}/{max_failures})")
+        
+        # Si hay muchos fallos consecutivos, intentar reconectar
+        if self.heartbeat_failures >= max_failures and not self.is_host:
+            print("🔄 Demasiados fallos, intentando reconectar...")
+            self._try_reconnect()
+            return
+        
+        self.timer_heartbeat = self.loop.call_later(self.heartbeat_interval, self._heartbeat)
+    
+    def _mensaje_heartbeat(self):
+        """HEARTBEAT con la hora local (no la de la partida) y el eco del último recibido"""
+        ahora = time.time()
+        eco = retencion = 0.0
+        if self.ultimo_heartbeat:
+            eco, llegada = self.ultimo_heartbeat
+            retencion = ahora - llegada
+        return {
+            'type': MessageType.HEARTBEAT.value,
+            'timestamp': ahora,
+            'seq': self.stats['messages_sent'],
+            'eco': eco,
+            'retencion': retencion
+        }
+    
+    def reloj_partida(self):
+        """Hora de la partida: la del host; el cliente le suma el desfase estimado.
+        
+        Todas las marcas de tiempo que viajan (bombas, escudo, estados) usan este reloj,
+        así una bomba explota a la vez en los dos equipos aunque sus relojes difieran.
+        """
+        if self.is_host:
+            return time.time()
+        return time.time() + self.reloj.desfase
+    
+    def _vigilar_silencio(self):
+        """Timer que vence heartbeat_timeout segundos después del último mensaje recibido;
+        si para entonces llegó algo, se reprograma en lugar de consultar cada segundo"""
+        time_since = time.time() - self.last_heartbeat_received
+        if self.connected and time_since > self.heartbeat_timeout:
+            print(f"⚠️ Sin heartbeat por {time_since:.1f}s")
+            self.timer_silencio = None
+            # La conexión está muerta aunque TCP no lo sepa: el cliente reconecta y
+            # el host queda libre para aceptar la nueva conexión
+            if self.is_host:
+                self._cerrar_conexion()
+            else:
+                self._reconectar()
+            return
+        
+        espera = max(0.0, self.heartbeat_timeout - time_since) + 0.01
+        self.timer_silencio = self.loop.call_later(espera, self._vigilar_silencio)
+    
+    def _muestrear_telemetria(self):
+        """Cada segundo: totales para el ancho de banda y, si hay archivo, el volcado JSON"""
+        ahora = time.time()
+        self.telemetria.muestrear(ahora)
+        if self.ruta_telemetria and ahora - self.ultimo_volcado >= self.intervalo_telemetria:
+            self._volcar_telemetria()
+            self.ultimo_volcado = ahora
+        self.timer_telemetria = self.loop.call_later(1.0, self._muestrear_telemetria)
+    
+    def _volcar_telemetria(self):
+        try:
+            volcar_json(self.obtener_telemetria(), self.ruta_telemetria)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la telemetría: {e}")
+            self.ruta_telemetria = None
+    
+    def obtener_telemetria(self):
+        """Resumen de la red como dict serializable a JSON: contadores por tipo de mensaje,
+        RTT (p50/p95/p99 de los heartbeats con eco), ancho de banda, reloj y canal UDP"""
+        datos = self.telemetria.instantanea()
+        datos['reloj'] = {
+            'desfase_ms': self.reloj.desfase * 1000,
+            'rtt_minimo_ms': self.reloj.rtt_minimo * 1000 if self.reloj.rtt_minimo is not None else None,
+            'jitter_ms': self.reloj.jitter * 1000
+        }
+        datos['conexion'] = {
+            'conectado': self.is_connected(),
+            'udp_activo': self.udp_activo,
+            'mensajes_enviados': self.stats['messages_sent'],
+            'mensajes_recibidos': self.stats['messages_received'],
+            'lecturas_tcp': self.stats['tcp_reads'],
+            'lotes': self.stats['batches_sent'],
+            'errores': self.stats['connection_errors'],
+            'cola_recepcion': len(self.received_messages)
+        }
+        conexion = self.conexion
+        if conexion:
+            datos['cola_salida'] = {
+                'tramas': len(conexion.salida),
+                'bytes': conexion.salida.bytes,
+                'maximo': conexion.salida.maximo,
+                'combinadas': conexion.salida.combinadas,
+                'buffer_transporte': conexion.transporte.get_write_buffer_size(),
+                'pausada': conexion.pausada
+            }
+        if self.udp:
+            datos['udp'] = dict(self.udp.stats)
+        return datos
     
     def get_messages(self):
         """Obtiene mensajes recibidos"""
-        with self.message_lock:
-            messages = self.received_messages.copy()
-            self.received_messages.clear()
-            return messages
+        messages = []
+        ahora = time.perf_counter_ns()
+        while self.received_messages:
+            message, llegada = self.received_messages.popleft()
+            self.telemetria.entregado(message['type'], ahora - llegada)
+            messages.append((message, None))
+        return messages
     
     def is_connected(self):
         """Verifica conexión"""
-        with self.connection_lock:
-            if not self.connected or not self.connection_established:
-                return False
-            
-            time_since = time.time() - self.last_heartbeat_received
-            return time_since < self.heartbeat_timeout
+        if not self.connected or not self.connection_established:
+            return False
+        
+        time_since = time.time() - self.last_heartbeat_received
+        return time_since < self.heartbeat_timeout
     
     def disconnect(self):
         """Cierra conexión limpiamente"""
         self.running = False
         
-        # Pequeña pausa antes de cerrar
-        time.sleep(0.1)
-        
-        # Cerrar sockets
-        if self.client_socket:
+        if self.loop and not self.loop.is_closed():
             try:
-                self.client_socket.close()
-            except:
-                pass
+                # Cerrar desde el loop, esperando a que salga lo que quede por enviar
+                asyncio.run_coroutine_threadsafe(self._cerrar(), self.loop).result(timeout=2)
+            except Exception as e:
+                print(f"⚠️ Error cerrando la red: {e}")
+            self._detener_loop()
         
-        if self.server_socket:
-            try:
-                self.server_socket.close()
-            except:
-                pass
+        print("🔌 Conexión cerrada limpiamente")
+    
+    async def _cerrar(self):
+        conexion = self.conexion
+        if self.timer_telemetria:
+            self.timer_telemetria.cancel()
+        if self.ruta_telemetria:
+            self._volcar_telemetria()
+        if self.servidor_dedicado and self.connection_established:
+            # Salida voluntaria: el servidor libera el jugador ya, sin reservarlo para una reconexión
+            self._send_tcp_message({'type': MessageType.GAME_OVER.value, 'player_id': self.player_id,
+                                    'timestamp': self.reloj_partida()})
+        self._cerrar_conexion()
+        pendientes = [tarea for tarea in self.tareas if tarea is not asyncio.current_task()]
+        for tarea in pendientes:
+            tarea.cancel()
+        await asyncio.gather(*pendientes, return_exceptions=True)
         
-        if self.connection_socket:
+        if self.servidor:
+            self.servidor.close()
+        if self.udp:
+            self.udp.transporte.close()
+        if conexion:
             try:
-                self.connection_socket.close()
-            except:
-                pass
-        
-        print("🔌 Conexión cerrada limpiamente")
+                # close() envía lo pendiente antes de cerrar; esperar como mucho un momento
+                await asyncio.wait_for(asyncio.shield(conexion.cerrada), 0.5)
+            except asyncio.TimeoutError:
+                conexion.transporte.abort()
+    
+    def _detener_loop(self):
+        """Detiene el loop de red y espera a que termine su thread"""
+        if not self.loop or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.hilo_red.join(timeout=1.0)
+        if not self.hilo_red.is_alive():
+            self.loop.close()
     
     def _get_local_ip(self):
         """Obtiene IP local"""
@@ -1,8 +1,9 @@
 import pygame
-import os
+import assets
 
 class Object:
     objects = []
+    grid = None  # Índice de ocupación por celdas (lo construye Map.crear_obstaculos)
 
     def __init__(self, x, y, largura, altura=None, imagem_path=None, destrutivel=False):
         if altura is None:
@@ -13,24 +14,24 @@ class Object:
         self.imagem = None
         self.imagem_original = None
         
-        # Carrega a imagem se for fornecida
-        if imagem_path and os.path.exists(imagem_path):
+        # Carrega a imagem se for fornecida (compartilhada pelo gestor de assets)
+        if imagem_path:
             self.carregar_imagem(imagem_path, largura, altura)
         else:
-            # Fallback para cor sólida se a imagem não existir
-            self.cor = (50, 50, 50) if not destrutivel else (50, 50, 50)
-            print(f"Aviso: Imagem {imagem_path} não encontrada. Usando cor sólida.")
+            # Fallback para cor sólida se não houver imagem
+            self.cor = (50, 50, 50)
         
         Object.objects.append(self)
+        if Object.grid is not None:
+            Object.grid.registrar(self)
 
     def carregar_imagem(self, imagem_path, largura, altura):
-        """Carrega e redimensiona a imagem para o tamanho do objeto"""
-        try:
-            self.imagem_original = pygame.image.load(imagem_path).convert_alpha()
-            self.imagem = pygame.transform.scale(self.imagem_original, (largura, altura))
+        """Obtém a imagem já convertida e redimensionada para o tamanho do objeto"""
+        self.imagem_original = assets.cargar_imagen(imagem_path)
+        self.imagem = assets.cargar_imagen(imagem_path, (largura, altura))
+        if self.imagem:
             self.cor = None  # Indica que estamos usando imagem
-        except pygame.error as e:
-            print(f"Erro ao carregar imagem {imagem_path}: {e}")
+        else:
             self.cor = (0, 120, 0) if not self.destrutivel else (120, 60, 0)
 
     def draw(self, surface):
@@ -47,14 +48,50 @@ class Object:
             return False
         return self.rect.colliderect(outro_rect)
 
+    def destruir(self):
+        """Marca o objeto como destruído e atualiza o grid de ocupação"""
+        if self.destruido:
+            return
+        self.destruido = True
+        if Object.grid is not None:
+            Object.grid.marcar_destruido(self)
+
+    def restaurar(self):
+        """Desfaz a destruição (ressincronização pela rede) e atualiza o grid"""
+        if not self.destruido:
+            return
+        self.destruido = False
+        if Object.grid is not None:
+            Object.grid.marcar_restaurado(self)
+
     @classmethod
-    def verificar_colisao_com_player(cls, player_rect):
-        """Verifica colisão do player com qualquer objeto não destruído"""
+    def limpar(cls, grid=None):
+        """Remove todos os objetos e substitui o grid de ocupação"""
+        cls.objects.clear()
+        cls.grid = grid
+
+    @classmethod
+    def objeto_em_rect(cls, rect):
+        """Retorna o primeiro objeto não destruído que colide com o retângulo"""
+        if cls.grid is not None:
+            return cls.grid.colision(rect)
         for obj in cls.objects:
-            if obj.colidir(player_rect):
+            if obj.colidir(rect):
                 return obj
         return None
 
+    @classmethod
+    def objetos_em_rect(cls, rect):
+        """Retorna todos os objetos não destruídos que colidem com o retângulo"""
+        if cls.grid is not None:
+            return cls.grid.objetos_en_rect(rect)
+        return [obj for obj in cls.objects if obj.colidir(rect)]
+
+    @classmethod
+    def verificar_colisao_com_player(cls, player_rect):
+        """Verifica colisão do player com qualquer objeto não destruído"""
+        return cls.objeto_em_rect(player_rect)
+
     def verificar_explosao(self, bombas):
         """Verifica se este objeto foi atingido por alguma explosão"""
         if not self.destrutivel or self.destruido:
@@ -64,7 +101,7 @@ class Object:
             if bomba.explotada and bomba.explosion_activa():
                 for explosion_rect in bomba.explosion_tiles:
                     if self.rect.colliderect(explosion_rect):
-                        self.destruido = True
+                        self.destruir()
                         print(f"💥 Objeto destrutível em ({self.rect.x}, {self.rect.y}) foi destruído!")
                         return True
         return False
@@ -72,6 +109,17 @@ class Object:
     @classmethod
     def atualizar_objetos_destrutiveis(cls, bombas):
         """Atualiza todos os objetos destrutíveis do jogo"""
-        for obj in cls.objects:
-            if obj.destrutivel:
-                obj.verificar_explosao(bombas)
\ No newline at end of file
+        if cls.grid is None:
+            for obj in cls.objects:
+                if obj.destrutivel:
+                    obj.verificar_explosao(bombas)
+            return
+
+        # Com o grid só consultamos as células atingidas pelas explosões
+        for bomba in bombas:
+            if bomba.explotada and bomba.explosion_activa():
+                for explosion_rect in bomba.explosion_tiles:
+                    for obj in cls.grid.objetos_en_rect(explosion_rect):
+                        if obj.destrutivel:
+                            obj.destruir()
+                            print(f"💥 Objeto destrutível em ({obj.rect.x}, {obj.rect.y}) foi destruído!")
@@ -0,0 +1,82 @@
+import pygame
+import assets
+
+# Panel de telemetría de red (F3 en MultiplayerGame): RTT, ancho de banda y una fila
+# por tipo de mensaje con tráfico. Igual que el overlay del perfilador, la superficie
+# se reconstruye cada REFRESCO frames y entre medio solo se vuelve a copiar.
+
+
+class PanelRed:
+    """Overlay con el resumen de GameNetwork.obtener_telemetria()"""
+
+    REFRESCO = 30
+    TAMAÑO = (600, 265)
+    COLUMNAS = (8, 180, 235, 290, 360, 430, 485, 540)
+
+    def __init__(self, network):
+        self.network = network
+        self.visible = False
+        self.superficie = None
+        self.frames_desde_refresco = 0
+
+    def alternar(self):
+        self.visible = not self.visible
+        self.superficie = None
+        print(f"📡 Panel de red: {'ON' if self.visible else 'OFF'}")
+
+    def _construir(self):
+        datos = self.network.obtener_telemetria()
+        ancho, alto = self.TAMAÑO
+        superficie = pygame.Surface((ancho, alto), pygame.SRCALPHA)
+        superficie.fill((0, 0, 0, 190))
+        fuente = assets.obtener_fuente(18)
+        blanco, gris = (255, 255, 255), (170, 170, 170)
+
+        rtt, reloj, conexion = datos['rtt_ms'], datos['reloj'], datos['conexion']
+        banda = datos['ancho_banda_kbps']
+        udp = datos.get('udp', {})
+        salida = datos.get('cola_salida')
+        lineas = (
+            f"RTT p50 {rtt['p50']:.1f}  p95 {rtt['p95']:.1f}  p99 {rtt['p99']:.1f} ms"
+            f"  ({rtt['muestras']} muestras)  jitter {reloj['jitter_ms']:.1f} ms",
+            f"Subida {banda['subida']:.1f} kbit/s  bajada {banda['bajada']:.1f} kbit/s"
+            f"  desfase {reloj['desfase_ms']:+.1f} ms",
+            f"{'Conectado' if conexion['conectado'] else 'Desconectado'}"
+            f"  UDP {'activo' if conexion['udp_activo'] else 'inactivo'}"
+            f" (viejos {udp.get('datagrams_stale', 0)}, perdidos {udp.get('datagrams_dropped', 0)})"
+            f"  cola entrada {conexion['cola_recepcion']}",
+            "Cola salida {tramas} ({bytes} B, máx {maximo}, combinadas {combinadas})"
+            "  transporte {buffer_transporte} B".format(**salida) if salida else "Cola salida: sin conexión"
+        )
+        y = 6
+        for texto in lineas:
+            superficie.blit(fuente.render(texto, True, blanco), (8, y))
+            y += 15
+
+        # Tabla por tipo (columnas en posiciones fijas: la fuente no es monoespaciada)
+        y += 6
+        encabezado = ("tipo", "env", "rec", "kB env", "kB rec", "cod µs", "dec µs", "cola ms")
+        for x, texto in zip(self.COLUMNAS, encabezado):
+            superficie.blit(fuente.render(texto, True, gris), (x, y))
+        for nombre, tipo in datos['tipos'].items():
+            y += 14
+            if y > alto - 14:
+                break
+            # Cola: la mayor p95 entre la de envío y la de recepción
+            cola = max(tipo['espera_envio_ms']['p95'], tipo['espera_recepcion_ms']['p95'])
+            textos = (nombre, str(tipo['enviados']), str(tipo['recibidos']),
+                      f"{tipo['bytes_enviados'] / 1000:.1f}", f"{tipo['bytes_recibidos'] / 1000:.1f}",
+                      f"{tipo['codificar_us']:.1f}", f"{tipo['decodificar_us']:.1f}", f"{cola:.2f}")
+            for x, texto in zip(self.COLUMNAS, textos):
+                superficie.blit(fuente.render(texto, True, blanco), (x, y))
+        return superficie
+
+    def dibujar(self, superficie, x, y):
+        """Dibuja el panel si está visible; retorna el área modificada o None"""
+        if not self.visible:
+            return None
+        self.frames_desde_refresco += 1
+        if self.superficie is None or self.frames_desde_refresco >= self.REFRESCO:
+            self.superficie = self._construir()
+            self.frames_desde_refresco = 0
+        return superficie.blit(self.superficie, (x, y))
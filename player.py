@@ -1,11 +1,33 @@
 import pygame
 import os
 import time
+import assets
 from object import Object
 from powerup import PowerUpType
 
+# Desplazamiento (dx, dy) de cada dirección de movimiento
+DIRECCIONES = {
+    'up': (0, -1),
+    'down': (0, 1),
+    'left': (-1, 0),
+    'right': (1, 0)
+}
+
+def direccion_desde_teclas(keys):
+    """Traduce el estado del teclado a una dirección de movimiento (o None)"""
+    if keys[pygame.K_w] or keys[pygame.K_UP]:
+        return 'up'
+    if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+        return 'down'
+    if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        return 'left'
+    if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        return 'right'
+    return None
+
 class Player:
-    def __init__(self, ancho_ventana, alto_ventana, tamaño, velocidad, id=0):
+    def __init__(self, ancho_ventana, alto_ventana, tamaño, velocidad, id=0, reloj=None):
+        self.reloj = reloj or time.time  # Reloj inyectable (segundos) para bombas y power-ups
         self.tamaño = tamaño
         self.velocidad = velocidad
         self.id = id  # ID único del jugador (0 para un jugador, 1/2 para multijugador)
@@ -88,7 +110,7 @@ class Player:
     def colocar_bomba(self, bomba=None):
         """Marca que el jugador ha colocado una bomba"""
         self.bomba_colocada = True
-        self.ultima_bomba_tiempo = time.time()
+        self.ultima_bomba_tiempo = self.reloj()
         self.bomba_actual = bomba
         self.bombas_colocadas_actual += 1
     
@@ -112,7 +134,7 @@ class Player:
             
         elif tipo_powerup == PowerUpType.SHIELD:
             self.tiene_escudo = True
-            self.escudo_tiempo = time.time() + 10  # 10 segundos
+            self.escudo_tiempo = self.reloj() + 10  # 10 segundos
             print(f"🛡️ Jugador {self.id}: ¡Escudo activado por 10 segundos!")
             
         elif tipo_powerup == PowerUpType.REMOTE_CONTROL:
@@ -121,7 +143,7 @@ class Player:
     
     def actualizar_powerups(self):
         """Actualiza los power-ups temporales"""
-        tiempo_actual = time.time()
+        tiempo_actual = self.reloj()
         
         # Escudo
         if self.tiene_escudo and tiempo_actual > self.escudo_tiempo:
@@ -144,6 +166,18 @@ class Player:
             'escudo_tiempo': self.escudo_tiempo
         }
     
+    def estado_red(self):
+        """Estado completo del jugador tal como viaja en PLAYER_STATE y en los snapshots"""
+        return {
+            'x': int(self.x),
+            'y': int(self.y),
+            'direction': self.direccion_actual,
+            'frame': self.frame_actual,
+            'life': self.life,
+            'moving': self.esta_moviendose,
+            'powerup_state': self.get_estado_powerups()
+        }
+    
     def set_estado_powerups(self, estado):
         """Establece el estado de power-ups desde la red"""
         self.max_bombas = estado.get('max_bombas', self.max_bombas)
@@ -161,18 +195,17 @@ class Player:
     def cargar_sprites(self):
         """Carga los sprites del jugador usando tus rutas originales"""
         
+        def cuadro_rojo(tamaño):
+            surf = pygame.Surface(tamaño)
+            surf.fill((255, 50, 50))
+            return surf
+        
         def cargar_sprite(ruta, tamaño):
-            try:
-                if not os.path.exists(ruta):
-                    raise FileNotFoundError(f"No existe: {ruta}")
-                    
-                sprite = pygame.image.load(ruta).convert_alpha()
-                return pygame.transform.scale(sprite, tamaño)
-            except Exception as e:
+            sprite = assets.cargar_imagen(ruta, tamaño)
+            if sprite is None:
                 print(f"⚠️ Aviso: No se encontró la imagen en '{ruta}'. Usando cuadro rojo.")
-                surf = pygame.Surface(tamaño)
-                surf.fill((255, 50, 50))
-                return surf
+                sprite = assets.obtener_generado(('cuadro_rojo', tamaño), lambda: cuadro_rojo(tamaño))
+            return sprite
 
         sprites = {
             'down': [],
@@ -182,9 +215,6 @@ class Player:
         }
 
         carpeta = 'playerSprites' 
-        
-        if not os.path.exists(carpeta):
-            print(f"❌ ERROR CRÍTICO: La carpeta '{carpeta}' no existe en el directorio del juego.")
 
         for direccion in sprites.keys():
             for i in range(1, 4):
@@ -197,31 +227,30 @@ class Player:
         return sprites
 
     def actualizar_movimiento(self, ancho_ventana, alto_ventana, bombas=None):
-        """Actualiza la posición del jugador con colisión de bombas"""
+        """Actualiza la posición del jugador a partir del teclado"""
+        direccion = direccion_desde_teclas(pygame.key.get_pressed())
+        self.mover(direccion, ancho_ventana, alto_ventana, bombas)
+        
+        # Actualizar power-ups temporales
+        self.actualizar_powerups()
+
+    def mover(self, direccion, ancho_ventana, alto_ventana, bombas=None):
+        """Mueve un paso en la dirección indicada (None = quieto) con colisión de objetos y bombas.
+
+        No depende del teclado ni del reloj: la simulación y la red la reutilizan.
+        """
         if bombas is None:
             bombas = []
             
-        keys = pygame.key.get_pressed()
         futuro_x = self.x
         futuro_y = self.y
-        nueva_direccion = self.direccion_actual
 
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
-            futuro_y -= self.velocidad
-            nueva_direccion = "up"
-        elif keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            futuro_y += self.velocidad
-            nueva_direccion = "down"
-        elif keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            futuro_x -= self.velocidad
-            nueva_direccion = "left"
-        elif keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            futuro_x += self.velocidad
-            nueva_direccion = "right"
-
-        # Actualizar dirección si cambió
-        if nueva_direccion != self.direccion_actual:
-            self.direccion_actual = nueva_direccion
+        if direccion in DIRECCIONES:
+            dx, dy = DIRECCIONES[direccion]
+            futuro_x += dx * self.velocidad
+            futuro_y += dy * self.velocidad
+            # Actualizar dirección si cambió
+            self.direccion_actual = direccion
 
         # Verificar colisión con objetos
         futuro_rect = pygame.Rect(futuro_x, futuro_y, self.tamaño, self.tamaño)
@@ -249,9 +278,6 @@ class Player:
         # Limites de la ventana
         self.x = max(0, min(self.x, ancho_ventana - self.tamaño))
         self.y = max(0, min(self.y, alto_ventana - self.tamaño))
-        
-        # Actualizar power-ups temporales
-        self.actualizar_powerups()
 
     def actualizar_animacion(self, tiempo_actual, keys):
         """Actualiza la animación del jugador"""
@@ -270,7 +296,7 @@ class Player:
             self.frame_actual = 0
 
     def dibujar(self, superficie, tiempo_actual):
-        """Dibuja al jugador en la superficie"""
+        """Dibuja al jugador en la superficie y retorna el área modificada"""
         self.actualizar_animacion(tiempo_actual, pygame.key.get_pressed())
         
         try:
@@ -294,4 +320,6 @@ class Player:
             
         except IndexError:
             sprite_actual = self.sprites[self.direccion_actual][0]
-            superficie.blit(sprite_actual, (self.x, self.y))
\ No newline at end of file
+            superficie.blit(sprite_actual, (self.x, self.y))
+        
+        return pygame.Rect(self.x, self.y, self.tamaño, self.tamaño)
\ No newline at end of file
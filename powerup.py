@@ -1,6 +1,7 @@
 import pygame
 import random
 import os
+import assets
 from enum import Enum
 
 class PowerUpType(Enum):
@@ -66,14 +67,10 @@ class PowerUp:
     
     def cargar_imagen(self):
         """Intenta cargar una imagen para el power-up"""
-        try:
-            nombre_archivo = f"powerup_{self.tipo.value}.png"
-            ruta = os.path.join('Object&Bomb_Sprites', nombre_archivo)
-            if os.path.exists(ruta):
-                self.imagen = pygame.image.load(ruta)
-                self.imagen = pygame.transform.scale(self.imagen, (self.tamaño, self.tamaño))
-        except:
-            pass  # Usaremos dibujo si no hay imagen
+        nombre_archivo = f"powerup_{self.tipo.value}.png"
+        ruta = os.path.join('Object&Bomb_Sprites', nombre_archivo)
+        # Usaremos dibujo si no hay imagen
+        self.imagen = assets.cargar_imagen(ruta, (self.tamaño, self.tamaño), opcional=True)
     
     def actualizar_animacion(self):
         """Actualiza la animación del power-up"""
@@ -81,9 +78,9 @@ class PowerUp:
         self.anim_offset = (tiempo_actual // 100) % 10  # Para animación
     
     def dibujar(self, superficie):
-        """Dibuja el power-up en la pantalla"""
+        """Dibuja el power-up en la pantalla y retorna el área modificada"""
         if not self.activo:
-            return
+            return None
         
         self.actualizar_animacion()
         
@@ -111,8 +108,7 @@ class PowerUp:
                              radio - 4)
             
             # Dibujar el símbolo
-            font = pygame.font.Font(None, 24)
-            texto = font.render(self.simbolo, True, (255, 255, 255))
+            texto = assets.renderizar_texto(self.simbolo, 24, (255, 255, 255))
             texto_rect = texto.get_rect(center=(centro_x, centro_y))
             superficie.blit(texto, texto_rect)
             
@@ -121,6 +117,8 @@ class PowerUp:
                 pygame.draw.circle(superficie, (255, 255, 200, 100),
                                  (centro_x, centro_y),
                                  radio - 2, 2)
+        
+        return self.rect.copy()
     
     def colisiona_con(self, jugador_rect):
         """Verifica si el jugador colisiona con el power-up"""
@@ -137,9 +135,10 @@ class PowerUp:
 class PowerUpSystem:
     """Sistema para manejar power-ups en el juego"""
     
-    def __init__(self, probabilidad_spawn=0.35):  # 35% de chance
+    def __init__(self, probabilidad_spawn=0.35, rng=None):  # 35% de chance
         self.powerups = []
         self.probabilidad_spawn = probabilidad_spawn
+        self.rng = rng or random  # Inyectable para simulación determinista
         
         # Power-ups disponibles para spawnear con probabilidades (sin SPEED_UP)
         self.tipos_disponibles = [
@@ -154,9 +153,9 @@ class PowerUpSystem:
     
     def intentar_spawn(self, x, y, tamaño):
         """Intenta spawnear un power-up en una posición"""
-        if random.random() < self.probabilidad_spawn:
+        if self.rng.random() < self.probabilidad_spawn:
             # Elegir tipo basado en probabilidades
-            tipo = random.choices(self.tipos_disponibles, weights=self.probabilidades, k=1)[0]
+            tipo = self.rng.choices(self.tipos_disponibles, weights=self.probabilidades, k=1)[0]
             
             # Crear power-up
             powerup = PowerUp(x, y, tipo, tamaño)
@@ -187,9 +186,13 @@ class PowerUpSystem:
         return powerups_recogidos
     
     def dibujar_todos(self, superficie):
-        """Dibuja todos los power-ups activos"""
+        """Dibuja todos los power-ups activos y retorna las áreas modificadas"""
+        areas = []
         for powerup in self.powerups:
-            powerup.dibujar(superficie)
+            area = powerup.dibujar(superficie)
+            if area:
+                areas.append(area)
+        return areas
     
     def limpiar(self):
         """Limpia todos los power-ups"""
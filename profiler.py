@@ -0,0 +1,229 @@
+import pygame
+import time
+import csv
+import contextlib
+from collections import deque
+import assets
+
+# Perfilador de frames por fases: cada fase con nombre se mide con perf_counter_ns
+# y se acumula por frame; las últimas VENTANA frames se guardan para percentiles,
+# el gráfico en pantalla y el volcado a CSV.
+#
+# Uso:
+#     perfil.comenzar_frame()
+#     with perfil.fase('enemigos'):
+#         ...
+#     perfil.terminar_frame()
+
+PRESUPUESTO_MS = 1000 / 60  # Duración de un frame a 60 FPS
+
+# Colores de las fases en el gráfico (las que no están aquí usan la paleta de reserva)
+COLORES_FASES = {
+    'entrada': (200, 200, 200),
+    'red': (80, 160, 255),
+    'movimiento': (100, 255, 100),
+    'bombas': (255, 120, 40),
+    'powerups': (255, 220, 60),
+    'destruccion': (200, 90, 60),
+    'enemigos': (255, 70, 70),
+    'eventos': (180, 120, 255),
+    'render_mapa': (60, 140, 60),
+    'render_entidades': (60, 200, 200),
+    'render_hud': (220, 150, 220),
+    'presentar': (140, 140, 255)
+}
+PALETA_RESERVA = [(255, 255, 255), (150, 150, 150), (255, 160, 160), (160, 255, 160)]
+
+
+class _Fase:
+    """Context manager reutilizable que suma el tiempo de una fase al frame actual"""
+
+    __slots__ = ('perfil', 'nombre', 'inicio')
+
+    def __init__(self, perfil, nombre):
+        self.perfil = perfil
+        self.nombre = nombre
+        self.inicio = 0
+
+    def __enter__(self):
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        frame = self.perfil.frame_actual
+        frame[self.nombre] = frame.get(self.nombre, 0) + time.perf_counter_ns() - self.inicio
+        return False
+
+
+class PerfilFrames:
+    """Tiempos por fase de las últimas `ventana` frames"""
+
+    VENTANA = 300      # Frames guardados (5 s a 60 FPS)
+    REFRESCO = 30      # Frames entre actualizaciones del overlay
+    TAMAÑO_OVERLAY = (420, 330)
+
+    def __init__(self, ventana=VENTANA):
+        self.ventana = ventana
+        self.fases = {}             # nombre -> _Fase (se reutilizan para no crear objetos por frame)
+        self.orden = []             # Fases en el orden en que aparecieron
+        self.historial = deque(maxlen=ventana)  # (total_ns, {fase: ns}) por frame
+        self.frame_actual = {}
+        self.inicio_frame = None
+        self.frames = 0
+
+        # Overlay
+        self.visible = False
+        self.usado = False          # Se mostró alguna vez (solo entonces se vuelca al salir)
+        self.superficie = None
+        self.frames_desde_refresco = 0
+
+    def fase(self, nombre):
+        """Context manager que mide una fase del frame actual"""
+        fase = self.fases.get(nombre)
+        if fase is None:
+            fase = self.fases[nombre] = _Fase(self, nombre)
+            self.orden.append(nombre)
+        return fase
+
+    def comenzar_frame(self):
+        self.frame_actual = {}
+        self.inicio_frame = time.perf_counter_ns()
+
+    def terminar_frame(self):
+        if self.inicio_frame is None:
+            return
+        total = time.perf_counter_ns() - self.inicio_frame
+        self.historial.append((total, self.frame_actual))
+        self.inicio_frame = None
+        self.frames += 1
+        self.frames_desde_refresco += 1
+
+    def alternar(self):
+        """Muestra u oculta el overlay"""
+        self.visible = not self.visible
+        self.usado = True
+        self.superficie = None
+        print(f"📈 Perfilador: {'ON' if self.visible else 'OFF'}")
+
+    # Estadísticas ==================================================================
+
+    def muestras_ms(self, nombre=None):
+        """Tiempos en ms de una fase (o del frame completo) en la ventana actual"""
+        if nombre is None:
+            return [total / 1e6 for total, _ in self.historial]
+        return [fases.get(nombre, 0) / 1e6 for _, fases in self.historial]
+
+    @staticmethod
+    def percentil(valores, p):
+        if not valores:
+            return 0.0
+        ordenados = sorted(valores)
+        return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+    def resumen(self):
+        """{fase: (p50, p95, p99)} en ms, incluyendo 'frame' para el total"""
+        resumen = {}
+        for nombre in [None] + self.orden:
+            muestras = self.muestras_ms(nombre)
+            resumen[nombre or 'frame'] = tuple(self.percentil(muestras, p) for p in (50, 95, 99))
+        return resumen
+
+    # Overlay =======================================================================
+
+    def _color(self, nombre):
+        if nombre in COLORES_FASES:
+            return COLORES_FASES[nombre]
+        return PALETA_RESERVA[self.orden.index(nombre) % len(PALETA_RESERVA)]
+
+    def _construir_overlay(self):
+        ancho, alto = self.TAMAÑO_OVERLAY
+        superficie = pygame.Surface((ancho, alto), pygame.SRCALPHA)
+        superficie.fill((0, 0, 0, 190))
+
+        # Gráfico de barras apiladas: una columna por frame, escala de 2 presupuestos
+        alto_grafico = 90
+        escala = alto_grafico / (PRESUPUESTO_MS * 2)
+        base_y = 8 + alto_grafico
+        frames = list(self.historial)[-(ancho - 16):]
+        for i, (total, fases) in enumerate(frames):
+            x = 8 + i
+            y = base_y
+            for nombre in self.orden:
+                altura = fases.get(nombre, 0) / 1e6 * escala
+                if altura <= 0:
+                    continue
+                pygame.draw.line(superficie, self._color(nombre), (x, y), (x, max(8, y - altura)))
+                y -= altura
+            # Lo no atribuido a ninguna fase, en gris
+            resto = total / 1e6 * escala - (base_y - y)
+            if resto > 0:
+                pygame.draw.line(superficie, (90, 90, 90), (x, y), (x, max(8, y - resto)))
+
+        # Línea del presupuesto de 16.6 ms
+        presupuesto_y = base_y - PRESUPUESTO_MS * escala
+        pygame.draw.line(superficie, (255, 255, 255), (8, presupuesto_y), (ancho - 8, presupuesto_y))
+
+        # Tabla de percentiles (columnas en posiciones fijas: la fuente no es monoespaciada)
+        fuente = assets.obtener_fuente(18)
+        columnas = (8, 160, 240, 320)
+        y = base_y + 6
+        for x, texto in zip(columnas, ("fase (ms)", "p50", "p95", "p99")):
+            superficie.blit(fuente.render(texto, True, (255, 255, 255)), (x, y))
+        for nombre, valores in self.resumen().items():
+            y += 14
+            if y > alto - 14:
+                break
+            color = (255, 255, 255) if nombre == 'frame' else self._color(nombre)
+            textos = (nombre,) + tuple(f"{v:.2f}" for v in valores)
+            for x, texto in zip(columnas, textos):
+                superficie.blit(fuente.render(texto, True, color), (x, y))
+        return superficie
+
+    def dibujar(self, superficie, x, y):
+        """Dibuja el overlay si está visible; retorna el área modificada o None"""
+        if not self.visible:
+            return None
+        if self.superficie is None or self.frames_desde_refresco >= self.REFRESCO:
+            self.superficie = self._construir_overlay()
+            self.frames_desde_refresco = 0
+        return superficie.blit(self.superficie, (x, y))
+
+    # CSV ===========================================================================
+
+    def volcar_csv(self, ruta=None):
+        """Escribe un CSV con una fila por frame (tiempos en ms); retorna la ruta"""
+        if ruta is None:
+            ruta = time.strftime("perfil_frames_%Y%m%d_%H%M%S.csv")
+        with open(ruta, 'w', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['frame', 'total_ms'] + self.orden)
+            primero = self.frames - len(self.historial)
+            for i, (total, fases) in enumerate(self.historial):
+                escritor.writerow([primero + i, f"{total / 1e6:.4f}"] +
+                                  [f"{fases.get(nombre, 0) / 1e6:.4f}" for nombre in self.orden])
+        print(f"📄 Perfil de frames guardado en {ruta}")
+        return ruta
+
+    def volcar_si_usado(self):
+        """Vuelca el CSV al salir solo si el perfilador se llegó a mostrar"""
+        if self.usado and self.historial:
+            return self.volcar_csv()
+        return None
+
+
+class PerfilNulo:
+    """Perfilador que no mide nada (por defecto en la simulación sin ventana)"""
+
+    _contexto = contextlib.nullcontext()
+
+    def fase(self, nombre):
+        return self._contexto
+
+    def comenzar_frame(self):
+        pass
+
+    def terminar_frame(self):
+        pass
+
+
+PERFIL_NULO = PerfilNulo()
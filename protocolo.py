@@ -0,0 +1,713 @@
+import zlib
+import struct
+from enum import Enum
+
+# Codec binario del protocolo de red. Cada MessageType tiene un layout struct fijo;
+# los mensajes se siguen manejando como dicts en el juego y aquí se traducen
+# a bytes y de vuelta. No se deserializa nada ejecutable (a diferencia de pickle).
+#
+# Trama en el cable:
+#     longitud (4 bytes, !I) | versión (B) | tipo (B) | timestamp (d) | cuerpo del tipo
+#
+# Las posiciones van en píxeles enteros sin signo (el mapa mide 1260x720, cabe en H).
+#
+# Tipos de tamaño variable:
+#   PLAYER_STATE_DELTA: tras player_id y el keyframe de referencia va una máscara de
+#       campos cambiados y solo los valores de esos campos.
+#   WORLD_SNAPSHOT: cabecera fija, número de jugadores (B) y un bloque por jugador.
+#   WORLD_STATE: cabecera fija y un cuerpo comprimido con zlib (ver EsquemaComprimido)
+#       con el mundo completo; se envía al conectarse o reconectarse un equipo.
+#
+# Datagrama UDP (solo TIPOS_NO_FIABLES):
+#     secuencia (4 bytes, !I) | versión (B) | tipo (B) | timestamp (d) | cuerpo del tipo
+#
+# Saludo: el cliente envía CONNECTION_REQUEST con MAGIA_PROTOCOLO y su versión; quien
+# acepta contesta CONNECTION_ACCEPTED con su versión, el nivel y la semilla de la
+# partida, o con un motivo de rechazo. Estos dos tipos se decodifican con cualquier
+# versión en la cabecera (para poder rechazar con motivo), así que su formato no cambia.
+
+VERSION_PROTOCOLO = 3
+MAGIA_PROTOCOLO = 0x424F4D42    # "BOMB"
+CABECERA = struct.Struct('!BBd')
+LONGITUD = struct.Struct('!I')
+SECUENCIA = struct.Struct('!I')   # Prefijo de los datagramas UDP (en lugar de la longitud)
+CANTIDAD = struct.Struct('!H')    # Prefijo de cada sección del cuerpo comprimido
+LARGO_NIVEL = 24                  # Bytes UTF-8 del nombre de nivel en CONNECTION_ACCEPTED
+
+# Tamaño máximo de un mensaje serializado (1MB)
+MAX_TAMAÑO_MENSAJE = 1048576
+
+class MessageType(Enum):
+    """Tipos de mensajes para el protocol del juego"""
+    CONNECTION_REQUEST = 1
+    CONNECTION_ACCEPTED = 2
+    PLAYER_STATE = 3
+    BOMB_PLACED = 4
+    BOMB_EXPLODED = 5
+    OBJECT_DESTROYED = 6
+    PLAYER_HIT = 7
+    GAME_OVER = 8
+    HEARTBEAT = 9
+    POWERUP_SPAWNED = 10
+    POWERUP_COLLECTED = 11
+    PLAYER_POWERUP_STATE = 12
+    CONNECTION_CHECK = 13
+    PLAYER_STATE_DELTA = 14
+    PLAYER_INPUT = 15
+    WORLD_SNAPSHOT = 16
+    WORLD_STATE = 17
+
+# Tipos que pueden viajar por el canal UDP: estado que se reemplaza, nunca eventos
+TIPOS_NO_FIABLES = frozenset({MessageType.PLAYER_STATE_DELTA.value, MessageType.HEARTBEAT.value})
+
+# Tipos del saludo, con el mismo formato en todas las versiones
+TIPOS_SALUDO = frozenset({MessageType.CONNECTION_REQUEST.value, MessageType.CONNECTION_ACCEPTED.value})
+
+# Motivos de rechazo en CONNECTION_ACCEPTED (0: aceptado)
+RECHAZO_VERSION = 1
+RECHAZO_PARTIDA_LLENA = 2
+MOTIVOS_RECHAZO = {
+    RECHAZO_VERSION: "versión de protocolo incompatible",
+    RECHAZO_PARTIDA_LLENA: "partida llena"
+}
+
+class ErrorProtocolo(ValueError):
+    """Mensaje que no se puede codificar o decodificar"""
+
+
+# Las conversiones pueden ser funciones (valor, timestamp) o tablas: un dict para
+# codificar (valor -> byte, 0 si no está) y una tupla para decodificar (byte -> valor)
+DIRECCIONES = ('down', 'up', 'left', 'right')
+DIRECCION_A_BYTE = {direccion: i for i, direccion in enumerate(DIRECCIONES)}
+DIRECCIONES_ENTRADA = DIRECCIONES + (None,)    # Una entrada puede no tener dirección
+DIRECCION_ENTRADA_A_BYTE = {direccion: i for i, direccion in enumerate(DIRECCIONES_ENTRADA)}
+
+def _boost_a_byte(boost, timestamp):
+    return max(0, min(255, round(boost * 10)))  # Décimas
+
+def _byte_a_boost(valor, timestamp):
+    return valor / 10
+
+def _instante_a_restante(instante, timestamp):
+    """Instante absoluto (fin del escudo, explosión de una bomba): se envía lo que le
+    queda en centésimas; 0 es ninguno o ya pasado"""
+    if not instante:
+        return 0
+    return max(0, min(65535, round((instante - timestamp) * 100)))
+
+def _restante_a_instante(restante, timestamp):
+    return timestamp + restante / 100 if restante else 0
+
+def _texto_a_bytes(texto, timestamp):
+    # struct rellena con ceros pero también recortaría sin avisar: un nombre de nivel
+    # recortado haría que cada equipo juegue en un mapa distinto
+    datos = (texto or '').encode('utf-8')
+    if len(datos) > LARGO_NIVEL:
+        raise ErrorProtocolo(f"Nombre de nivel demasiado largo ({len(datos)} bytes, máximo {LARGO_NIVEL}): {texto!r}")
+    return datos
+
+def _bytes_a_texto(valor, timestamp):
+    return valor.rstrip(b'\0').decode('utf-8', 'replace')
+
+
+class Campo:
+    """Un campo del mensaje: ruta de claves en el dict, formato struct y conversiones opcionales"""
+
+    def __init__(self, ruta, formato, codificar=None, decodificar=None):
+        self.ruta = tuple(ruta.split('.'))
+        self.formato = formato
+        self.codificar = codificar
+        self.decodificar = decodificar
+
+
+def _codificar_valor(campo, valor, timestamp):
+    """Conversión de un valor suelto al formato del campo (para los esquemas no compilados)"""
+    if isinstance(campo.codificar, dict):
+        return campo.codificar.get(valor, 0)
+    if campo.codificar:
+        return campo.codificar(valor, timestamp)
+    if campo.formato in 'BHI':
+        return int(valor or 0)
+    if campo.formato == 'd':
+        return float(valor or 0)
+    return bool(valor)
+
+def _leer(m, ruta):
+    """Valor de una ruta de claves en un dict anidado (None si falta algo)"""
+    for clave in ruta:
+        if not m:
+            return None
+        m = m.get(clave)
+    return m
+
+def _escribir(m, ruta, valor):
+    for clave in ruta[:-1]:
+        m = m.setdefault(clave, {})
+    m[ruta[-1]] = valor
+
+def _decodificar_valor(campo, valor, timestamp):
+    if isinstance(campo.decodificar, tuple):
+        return campo.decodificar[valor]
+    if campo.decodificar:
+        return campo.decodificar(valor, timestamp)
+    return valor
+
+
+class Esquema:
+    """Layout fijo de un tipo de mensaje.
+
+    A partir de los campos se genera (una vez, como hace collections.namedtuple) una
+    función de empaquetado y otra de desempaquetado sin bucles ni búsquedas por campo:
+    con dicts tan pequeños, un codec genérico campo a campo es más lento que pickle.
+    """
+
+    def __init__(self, *campos):
+        self.campos = campos
+        self.struct = struct.Struct('!' + ''.join(campo.formato for campo in campos))
+        self.completo = struct.Struct(CABECERA.format + self.struct.format[1:])   # Sin longitud
+        self.trama = struct.Struct(LONGITUD.format + self.completo.format[1:])     # Con longitud
+        self.tipo = None
+        self.empaquetar = None
+        self.desempaquetar = None
+
+    def compilar(self, tipo):
+        """Genera las funciones de empaquetado para el valor de tipo dado"""
+        self.tipo = tipo
+        entorno = {'pack': self.trama.pack, 'unpack': self.completo.unpack}
+
+        # Empaquetado: se busca cada dict padre una sola vez
+        padres = {(): 'm'}
+        lineas = ['def empaquetar(m, t):']
+        expresiones = []
+        for i, campo in enumerate(self.campos):
+            for n in range(1, len(campo.ruta)):
+                padre = campo.ruta[:n]
+                if padre not in padres:
+                    padres[padre] = f'p{len(padres)}'
+                    lineas.append(f"    {padres[padre]} = {padres[padre[:-1]]}.get({padre[-1]!r}) or {{}}")
+            padre = padres[campo.ruta[:-1]]
+            if isinstance(campo.codificar, dict):
+                entorno[f'c{i}'] = campo.codificar
+                expresiones.append(f"c{i}.get({padre}.get({campo.ruta[-1]!r}), 0)")
+            elif campo.codificar:
+                entorno[f'c{i}'] = campo.codificar
+                expresiones.append(f"c{i}({padre}.get({campo.ruta[-1]!r}), t)")
+            elif campo.formato in 'BHI':
+                # Las coordenadas pueden llegar como float (60.0)
+                expresiones.append(f"int({padre}.get({campo.ruta[-1]!r}, 0))")
+            elif campo.formato == 'd':
+                expresiones.append(f"float({padre}.get({campo.ruta[-1]!r}) or 0)")
+            else:
+                expresiones.append(f"{padre}.get({campo.ruta[-1]!r}, False)")
+        lineas.append(f"    return pack({self.completo.size}, {VERSION_PROTOCOLO}, {tipo}, t, {', '.join(expresiones)})")
+
+        # Desempaquetado: un literal de dict anidado con los valores en su sitio
+        arbol = {}
+        for i, campo in enumerate(self.campos):
+            nodo = arbol
+            for clave in campo.ruta[:-1]:
+                nodo = nodo.setdefault(clave, {})
+            if isinstance(campo.decodificar, tuple):
+                entorno[f'd{i}'] = campo.decodificar
+                nodo[campo.ruta[-1]] = f"d{i}[v{i}]"
+            elif campo.decodificar:
+                entorno[f'd{i}'] = campo.decodificar
+                nodo[campo.ruta[-1]] = f"d{i}(v{i}, t)"
+            else:
+                nodo[campo.ruta[-1]] = f"v{i}"
+
+        def literal(nodo):
+            return '{' + ', '.join(f"{clave!r}: {literal(valor) if isinstance(valor, dict) else valor}"
+                                   for clave, valor in nodo.items()) + '}'
+
+        variables = ', '.join(f'v{i}' for i in range(len(self.campos)))
+        lineas += [
+            'def desempaquetar(data):',
+            f"    _, _, t, {variables} = unpack(data)",
+            f"    return {{'type': {tipo}, 'timestamp': t, {literal(arbol)[1:]}"
+        ]
+
+        exec('\n'.join(lineas), entorno)
+        self.empaquetar = entorno['empaquetar']
+        self.desempaquetar = entorno['desempaquetar']
+        return self
+
+    def admite(self, longitud):
+        """Longitud (sin el prefijo) que puede tener una trama de este tipo"""
+        return longitud == self.completo.size
+
+
+class EsquemaDelta:
+    """Estado de jugador como diferencia respecto a un keyframe.
+
+    El mensaje lleva player_id, el id del keyframe de referencia y en 'data' solo
+    los campos que cambiaron (con la misma anidación que PLAYER_STATE). En el cable
+    una máscara de bits indica qué campos siguen; el struct de cada máscara se
+    crea la primera vez que aparece.
+    """
+
+    def __init__(self, *campos):
+        self.campos = campos
+        self.fijo = struct.Struct(CABECERA.format + 'BHH')   # + player_id, keyframe, máscara
+        self.max_mascara = (1 << len(campos)) - 1
+        self.structs = {}
+        self.maximo = self.fijo.size + self._struct(self.max_mascara).size
+        self.tipo = None
+
+    def _struct(self, mascara):
+        formato = self.structs.get(mascara)
+        if formato is None:
+            formato = self.structs[mascara] = struct.Struct(
+                '!' + ''.join(campo.formato for i, campo in enumerate(self.campos) if mascara >> i & 1))
+        return formato
+
+    def compilar(self, tipo):
+        self.tipo = tipo
+        return self
+
+    def admite(self, longitud):
+        return self.fijo.size <= longitud <= self.maximo
+
+    def empaquetar(self, m, t):
+        datos = m.get('data') or {}
+        mascara = 0
+        valores = []
+        for i, campo in enumerate(self.campos):
+            nodo = datos
+            for clave in campo.ruta[:-1]:
+                nodo = nodo.get(clave) or {}
+            if campo.ruta[-1] in nodo:
+                mascara |= 1 << i
+                valores.append(_codificar_valor(campo, nodo[campo.ruta[-1]], t))
+        cuerpo = self._struct(mascara).pack(*valores)
+        return (LONGITUD.pack(self.fijo.size + len(cuerpo)) +
+                self.fijo.pack(VERSION_PROTOCOLO, self.tipo, t, int(m.get('player_id', 0)),
+                               int(m.get('keyframe', 0)), mascara) + cuerpo)
+
+    def desempaquetar(self, data):
+        _, _, t, player_id, keyframe, mascara = self.fijo.unpack_from(data)
+        if mascara > self.max_mascara:
+            raise ErrorProtocolo(f"Máscara de delta inválida: {mascara:#x}")
+        formato = self._struct(mascara)
+        if len(data) != self.fijo.size + formato.size:
+            raise ErrorProtocolo(f"Tamaño incorrecto para el delta con máscara {mascara:#x}: {len(data)}")
+
+        datos = {}
+        valores = iter(formato.unpack_from(data, self.fijo.size))
+        for i, campo in enumerate(self.campos):
+            if mascara >> i & 1:
+                nodo = datos
+                for clave in campo.ruta[:-1]:
+                    nodo = nodo.setdefault(clave, {})
+                nodo[campo.ruta[-1]] = _decodificar_valor(campo, next(valores), t)
+        return {'type': self.tipo, 'timestamp': t, 'player_id': player_id,
+                'keyframe': keyframe, 'data': datos}
+
+
+
+class EsquemaLista:
+    """Campos fijos seguidos de una lista de elementos con el mismo layout (hasta 255).
+
+    Los elementos van en message[clave] como dicts con las rutas de sus campos.
+    """
+
+    MAX_ELEMENTOS = 255
+
+    def __init__(self, campos, clave, elemento):
+        self.campos = campos
+        self.clave = clave
+        self.elemento = elemento
+        self.fijo = struct.Struct(CABECERA.format + ''.join(campo.formato for campo in campos) + 'B')
+        self.tipo = None
+
+    def compilar(self, tipo):
+        self.tipo = tipo
+        return self
+
+    def admite(self, longitud):
+        resto = longitud - self.fijo.size
+        return 0 <= resto <= self.MAX_ELEMENTOS * self.elemento.struct.size and \
+            resto % self.elemento.struct.size == 0
+
+    def empaquetar(self, m, t):
+        elementos = m.get(self.clave) or []
+        if len(elementos) > self.MAX_ELEMENTOS:
+            raise ValueError(f"Demasiados elementos: {len(elementos)}")
+        partes = [self.fijo.pack(VERSION_PROTOCOLO, self.tipo, t,
+                                 *(_codificar_valor(c, _leer(m, c.ruta), t) for c in self.campos),
+                                 len(elementos))]
+        campos_elemento = self.elemento.campos
+        empaquetar = self.elemento.struct.pack
+        for elemento in elementos:
+            partes.append(empaquetar(*(_codificar_valor(c, _leer(elemento, c.ruta), t)
+                                       for c in campos_elemento)))
+        cuerpo = b''.join(partes)
+        return LONGITUD.pack(len(cuerpo)) + cuerpo
+
+    def desempaquetar(self, data):
+        valores = self.fijo.unpack_from(data)
+        t, cantidad = valores[2], valores[-1]
+        if len(data) != self.fijo.size + cantidad * self.elemento.struct.size:
+            raise ErrorProtocolo(f"Tamaño incorrecto para {cantidad} elementos: {len(data)}")
+
+        message = {'type': self.tipo, 'timestamp': t}
+        for campo, valor in zip(self.campos, valores[3:-1]):
+            _escribir(message, campo.ruta, _decodificar_valor(campo, valor, t))
+        elementos = message[self.clave] = []
+        for valores in self.elemento.struct.iter_unpack(data[self.fijo.size:]):
+            elemento = {}
+            for campo, valor in zip(self.elemento.campos, valores):
+                _escribir(elemento, campo.ruta, _decodificar_valor(campo, valor, t))
+            elementos.append(elemento)
+        return message
+
+
+class EsquemaComprimido:
+    """Campos fijos seguidos de un cuerpo comprimido con zlib, de tamaño variable.
+
+    El cuerpo son secciones en orden, cada una en message[clave]: bytes (elemento
+    None) o una lista de dicts con el layout de un Esquema, precedidas por su
+    longitud o cantidad (H). Al descomprimir se limita el tamaño a MAX_CUERPO para
+    que una trama pequeña no pueda reclamar memoria sin límite.
+    """
+
+    MAX_CUERPO = 64 * 1024
+    NIVEL = 6
+
+    def __init__(self, campos, secciones):
+        self.campos = campos
+        self.secciones = secciones
+        self.fijo = struct.Struct(CABECERA.format + ''.join(campo.formato for campo in campos))
+        self.tipo = None
+
+    def compilar(self, tipo):
+        self.tipo = tipo
+        return self
+
+    def admite(self, longitud):
+        return self.fijo.size < longitud <= MAX_TAMAÑO_MENSAJE
+
+    def empaquetar(self, m, t):
+        partes = []
+        for clave, elemento in self.secciones:
+            if elemento is None:
+                valor = bytes(m.get(clave) or b'')
+                partes += (CANTIDAD.pack(len(valor)), valor)
+                continue
+            elementos = m.get(clave) or []
+            partes.append(CANTIDAD.pack(len(elementos)))
+            empaquetar = elemento.struct.pack
+            for e in elementos:
+                partes.append(empaquetar(*(_codificar_valor(c, _leer(e, c.ruta), t) for c in elemento.campos)))
+        cuerpo = self.fijo.pack(VERSION_PROTOCOLO, self.tipo, t,
+                                *(_codificar_valor(c, _leer(m, c.ruta), t) for c in self.campos))
+        cuerpo += zlib.compress(b''.join(partes), self.NIVEL)
+        return LONGITUD.pack(len(cuerpo)) + cuerpo
+
+    def desempaquetar(self, data):
+        valores = self.fijo.unpack_from(data)
+        t = valores[2]
+        descompresor = zlib.decompressobj()
+        try:
+            cuerpo = descompresor.decompress(data[self.fijo.size:], self.MAX_CUERPO)
+        except zlib.error as e:
+            raise ErrorProtocolo(f"Cuerpo comprimido inválido: {e}")
+        if not descompresor.eof or descompresor.unconsumed_tail:
+            raise ErrorProtocolo(f"Cuerpo comprimido incompleto o mayor que {self.MAX_CUERPO} bytes")
+
+        message = {'type': self.tipo, 'timestamp': t}
+        for campo, valor in zip(self.campos, valores[3:]):
+            _escribir(message, campo.ruta, _decodificar_valor(campo, valor, t))
+        posicion = 0
+        for clave, elemento in self.secciones:
+            if posicion + CANTIDAD.size > len(cuerpo):
+                raise ErrorProtocolo(f"Sección {clave} truncada")
+            cantidad = CANTIDAD.unpack_from(cuerpo, posicion)[0]
+            posicion += CANTIDAD.size
+            tamaño = cantidad if elemento is None else cantidad * elemento.struct.size
+            if posicion + tamaño > len(cuerpo):
+                raise ErrorProtocolo(f"Sección {clave} truncada")
+            if elemento is None:
+                message[clave] = cuerpo[posicion:posicion + tamaño]
+            else:
+                elementos = message[clave] = []
+                for valores in elemento.struct.iter_unpack(cuerpo[posicion:posicion + tamaño]):
+                    e = {}
+                    for campo, valor in zip(elemento.campos, valores):
+                        _escribir(e, campo.ruta, _decodificar_valor(campo, valor, t))
+                    elementos.append(e)
+            posicion += tamaño
+        if posicion != len(cuerpo):
+            raise ErrorProtocolo(f"Sobran {len(cuerpo) - posicion} bytes tras las secciones")
+        return message
+
+
+def _campos_powerups(prefijo):
+    return (
+        Campo(f'{prefijo}.max_bombas', 'B'),
+        Campo(f'{prefijo}.rango_explosion', 'B'),
+        Campo(f'{prefijo}.velocidad_boost', 'B', _boost_a_byte, _byte_a_boost),
+        Campo(f'{prefijo}.tiene_escudo', '?'),
+        Campo(f'{prefijo}.tiene_control_remoto', '?'),
+        Campo(f'{prefijo}.escudo_tiempo', 'H', _instante_a_restante, _restante_a_instante)
+    )
+
+
+ESQUEMAS = {
+    MessageType.CONNECTION_REQUEST: Esquema(
+        Campo('player_id', 'B'),
+        Campo('magia', 'I'),            # MAGIA_PROTOCOLO: descarta lo que no es este juego
+        Campo('version', 'B')
+    ),
+    MessageType.CONNECTION_ACCEPTED: Esquema(
+        Campo('player_id', 'B'),        # Id asignado a quien se conecta
+        Campo('max_jugadores', 'B'),
+        Campo('dedicado', '?'),         # El otro extremo es un servidor sin jugador propio
+        Campo('version', 'B'),
+        Campo('rechazo', 'B'),          # 0 o uno de MOTIVOS_RECHAZO
+        Campo('nivel', f'{LARGO_NIVEL}s', _texto_a_bytes, _bytes_a_texto),
+        Campo('semilla', 'I')
+    ),
+    MessageType.PLAYER_STATE: Esquema(
+        Campo('player_id', 'B'),
+        Campo('keyframe', 'H'),      # Id con el que los deltas se refieren a este estado
+        Campo('ack', 'I'),           # Modo autoritativo: última entrada del cliente aplicada
+        Campo('data.x', 'H'),
+        Campo('data.y', 'H'),
+        Campo('data.direction', 'B', DIRECCION_A_BYTE, DIRECCIONES),
+        Campo('data.frame', 'B'),
+        Campo('data.life', 'B'),
+        Campo('data.moving', '?'),
+        *_campos_powerups('data.powerup_state')
+    ),
+    MessageType.BOMB_PLACED: Esquema(
+        Campo('data.x', 'H'),
+        Campo('data.y', 'H'),
+        Campo('data.player_id', 'B'),
+        Campo('data.rango_explosion', 'B'),
+        Campo('data.time', 'd')
+    ),
+    MessageType.BOMB_EXPLODED: Esquema(Campo('data.x', 'H'), Campo('data.y', 'H')),
+    MessageType.OBJECT_DESTROYED: Esquema(Campo('data.x', 'H'), Campo('data.y', 'H')),
+    MessageType.PLAYER_HIT: Esquema(Campo('player_id', 'B'), Campo('data.life', 'B')),
+    MessageType.GAME_OVER: Esquema(Campo('player_id', 'B')),
+    MessageType.HEARTBEAT: Esquema(
+        Campo('seq', 'I'),
+        Campo('eco', 'd'),          # timestamp del último heartbeat recibido (0: ninguno)
+        Campo('retencion', 'd')     # Segundos entre su llegada y este envío (ver reloj_red.py)
+    ),
+    MessageType.POWERUP_SPAWNED: Esquema(
+        Campo('data.x', 'H'),
+        Campo('data.y', 'H'),
+        Campo('data.type', 'B')
+    ),
+    MessageType.POWERUP_COLLECTED: Esquema(
+        Campo('data.x', 'H'),
+        Campo('data.y', 'H'),
+        Campo('data.type', 'B'),
+        Campo('data.player_id', 'B')
+    ),
+    MessageType.PLAYER_POWERUP_STATE: Esquema(Campo('player_id', 'B'), *_campos_powerups('data')),
+    MessageType.PLAYER_INPUT: Esquema(
+        Campo('player_id', 'B'),
+        Campo('seq', 'I'),
+        Campo('data.direccion', 'B', DIRECCION_ENTRADA_A_BYTE, DIRECCIONES_ENTRADA),
+        Campo('data.bomba', '?'),
+        Campo('data.detonar', '?')
+    ),
+    MessageType.CONNECTION_CHECK: Esquema(
+        Campo('status', '?', lambda estado, t: estado == 'ok', lambda ok, t: 'ok' if ok else 'error')
+    )
+}
+# El delta admite los mismos campos que 'data' en PLAYER_STATE
+ESQUEMAS[MessageType.PLAYER_STATE_DELTA] = EsquemaDelta(*(
+    Campo('.'.join(campo.ruta[1:]), campo.formato, campo.codificar, campo.decodificar)
+    for campo in ESQUEMAS[MessageType.PLAYER_STATE].campos if campo.ruta[0] == 'data'
+))
+# Snapshot del servidor dedicado: el estado de cada jugador con su última entrada aplicada
+ESQUEMAS[MessageType.WORLD_SNAPSHOT] = EsquemaLista(
+    (Campo('tick', 'I'),), 'jugadores',
+    Esquema(*(campo for campo in ESQUEMAS[MessageType.PLAYER_STATE].campos if campo.ruta != ('keyframe',)))
+)
+# Mundo completo al (re)conectarse: mapa de bits de los bloques destructibles
+# destruidos (en el orden de Object.objects), bombas sin explotar, power-ups y jugadores
+ESQUEMAS[MessageType.WORLD_STATE] = EsquemaComprimido(
+    (Campo('bloques', 'H'),),       # Cantidad de bloques destructibles (comprueba que el mapa coincide)
+    (
+        ('destruidos', None),
+        ('bombas', Esquema(
+            Campo('x', 'H'),
+            Campo('y', 'H'),
+            Campo('player_id', 'B'),
+            Campo('rango_explosion', 'B'),
+            Campo('explota', 'H', _instante_a_restante, _restante_a_instante)
+        )),
+        ('powerups', Esquema(Campo('x', 'H'), Campo('y', 'H'), Campo('tipo', 'B'))),
+        ('jugadores', ESQUEMAS[MessageType.WORLD_SNAPSHOT].elemento)
+    )
+)
+ESQUEMAS_POR_VALOR = {tipo.value: esquema.compilar(tipo.value) for tipo, esquema in ESQUEMAS.items()}
+
+
+def longitud_valida(version, tipo, longitud):
+    """La cabecera de una trama es plausible (se usa para resincronizar el flujo).
+
+    Las del saludo se aceptan con cualquier versión: su formato no cambia y así quien
+    acepta puede contestar con RECHAZO_VERSION en lugar de descartarlas.
+    """
+    esquema = ESQUEMAS_POR_VALOR.get(tipo)
+    return ((version == VERSION_PROTOCOLO or tipo in TIPOS_SALUDO) and
+            esquema is not None and esquema.admite(longitud))
+
+
+def codificar_mensaje(message):
+    """Serializa un mensaje (dict con 'type') y le antepone su longitud"""
+    tipo = message.get('type')
+    esquema = ESQUEMAS_POR_VALOR.get(tipo)
+    if esquema is None:
+        raise ErrorProtocolo(f"Tipo de mensaje desconocido: {tipo}")
+    try:
+        return esquema.empaquetar(message, message.get('timestamp') or 0.0)
+    except (struct.error, TypeError, ValueError) as e:
+        raise ErrorProtocolo(f"No se puede codificar {MessageType(tipo).name}: {e}") from e
+
+def decodificar_mensaje(data):
+    """Deserializa el cuerpo de un mensaje (sin la cabecera de longitud) a un dict"""
+    if len(data) < CABECERA.size:
+        raise ErrorProtocolo(f"Mensaje truncado ({len(data)} bytes)")
+    version, tipo = data[0], data[1]
+    if version != VERSION_PROTOCOLO and tipo not in TIPOS_SALUDO:
+        raise ErrorProtocolo(f"Versión de protocolo {version} no soportada (se esperaba {VERSION_PROTOCOLO})")
+    esquema = ESQUEMAS_POR_VALOR.get(tipo)
+    if esquema is None:
+        raise ErrorProtocolo(f"Tipo de mensaje desconocido: {tipo}")
+    if not esquema.admite(len(data)):
+        raise ErrorProtocolo(f"Tamaño incorrecto para {MessageType(tipo).name}: {len(data)} bytes")
+    try:
+        return esquema.desempaquetar(data)
+    except IndexError:
+        raise ErrorProtocolo(f"Valor fuera de rango en {MessageType(tipo).name}")
+
+
+def codificar_datagrama(message, secuencia):
+    """Serializa un mensaje para el canal UDP, precedido de su número de secuencia"""
+    return SECUENCIA.pack(secuencia) + codificar_mensaje(message)[LONGITUD.size:]
+
+def decodificar_datagrama(data):
+    """Retorna (secuencia, mensaje) de un datagrama recibido"""
+    if len(data) < SECUENCIA.size + CABECERA.size:
+        raise ErrorProtocolo(f"Datagrama truncado ({len(data)} bytes)")
+    if data[SECUENCIA.size + 1] not in TIPOS_NO_FIABLES:
+        raise ErrorProtocolo(f"Tipo {data[SECUENCIA.size + 1]} no admitido por UDP")
+    return SECUENCIA.unpack_from(data)[0], decodificar_mensaje(data[SECUENCIA.size:])
+
+def diferencia_estado(base, actual):
+    """Campos de 'data' de PLAYER_STATE que cambiaron entre base y actual (anidados igual)"""
+    cambios = {}
+    for campo in ESQUEMAS[MessageType.PLAYER_STATE_DELTA].campos:
+        nodo_base, nodo_actual = base, actual
+        for clave in campo.ruta[:-1]:
+            nodo_base = nodo_base.get(clave) or {}
+            nodo_actual = nodo_actual.get(clave) or {}
+        clave = campo.ruta[-1]
+        if clave in nodo_actual and nodo_actual[clave] != nodo_base.get(clave):
+            nodo = cambios
+            for padre in campo.ruta[:-1]:
+                nodo = nodo.setdefault(padre, {})
+            nodo[clave] = nodo_actual[clave]
+    return cambios
+
+def aplicar_diferencia(base, cambios):
+    """Nuevo 'data' con los cambios de un delta aplicados sobre el estado base"""
+    resultado = dict(base)
+    for clave, valor in cambios.items():
+        if isinstance(valor, dict):
+            resultado[clave] = aplicar_diferencia(base.get(clave) or {}, valor)
+        else:
+            resultado[clave] = valor
+    return resultado
+
+def secuencia_posterior(a, b):
+    """a es más nueva que b, en aritmética de 32 bits con vuelta (RFC 1982)"""
+    return 0 < (a - b) & 0xFFFFFFFF < 0x80000000
+
+
+class BufferRecepcion:
+    """Buffer de recepción preasignado que separa el flujo TCP en tramas sin copiarlas.
+
+    Se llena con sock.recv_into(buffer.espacio_libre()) y tramas() entrega vistas
+    (memoryview) sobre el propio bytearray, válidas hasta la siguiente recepción.
+    Es lineal en vez de circular para que cada trama quede contigua: al compactar
+    solo se mueve la cola de la trama incompleta, que nunca supera un mensaje.
+
+    Si una cabecera no es plausible (versión, tipo o longitud que no cuadran) se
+    avanza byte a byte hasta encontrar la siguiente trama válida en lugar de
+    descartar todo lo recibido.
+    """
+
+    TAMAÑO_INICIAL = 65536
+    MIN_LIBRE = 4096    # Por debajo de esto se compacta antes de recibir
+    MAXIMO = LONGITUD.size + MAX_TAMAÑO_MENSAJE    # Tamaño que el buffer no supera al crecer
+
+    def __init__(self, tamaño=TAMAÑO_INICIAL):
+        self.datos = bytearray(tamaño)
+        self.vista = memoryview(self.datos)
+        self.inicio = 0     # Primer byte sin procesar
+        self.fin = 0        # Fin de los datos recibidos
+        self.resincronizando = False
+        self.bytes_descartados = 0
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def espacio_libre(self):
+        """Vista sobre la parte libre del buffer, para recv_into o get_buffer de asyncio"""
+        pendiente = self.fin - self.inicio
+        if pendiente == 0:
+            self.inicio = self.fin = 0
+        elif len(self.datos) - self.fin < self.MIN_LIBRE:
+            necesario = pendiente + self.MIN_LIBRE
+            if pendiente >= LONGITUD.size + 2:
+                # La longitud solo cuenta si la cabecera es plausible: con menos bytes
+                # o con basura al principio no se sabe cuánto va a ocupar la trama
+                cuerpo = self.inicio + LONGITUD.size
+                longitud = LONGITUD.unpack_from(self.datos, self.inicio)[0]
+                if longitud_valida(self.datos[cuerpo], self.datos[cuerpo + 1], longitud):
+                    necesario = max(necesario, LONGITUD.size + longitud)
+            if necesario > len(self.datos) and len(self.datos) < self.MAXIMO:
+                # Una trama válida mayor que el buffer: crecer, nunca más allá de un mensaje máximo
+                datos = bytearray(min(max(necesario, len(self.datos) * 2), self.MAXIMO))
+                datos[:pendiente] = self.vista[self.inicio:self.fin]
+                self.datos = datos
+                self.vista = memoryview(self.datos)
+            else:
+                self.datos[:pendiente] = bytes(self.vista[self.inicio:self.fin])
+            self.inicio, self.fin = 0, pendiente
+        return self.vista[self.fin:]
+
+    def recibido(self, n):
+        """Marca como ocupados los n bytes escritos en espacio_libre()"""
+        self.fin += n
+
+    def tramas(self):
+        """Genera las tramas completas (sin la longitud) como memoryview"""
+        minimo = LONGITUD.size + 2  # Longitud + versión + tipo para validar la cabecera
+        while self.fin - self.inicio >= minimo:
+            longitud = LONGITUD.unpack_from(self.datos, self.inicio)[0]
+            cuerpo = self.inicio + LONGITUD.size
+            if not longitud_valida(self.datos[cuerpo], self.datos[cuerpo + 1], longitud):
+                if not self.resincronizando:
+                    print("⚠️ Cabecera de trama inválida, resincronizando...")
+                    self.resincronizando = True
+                self.inicio += 1
+                self.bytes_descartados += 1
+                continue
+
+            if self.fin - cuerpo < longitud:
+                return  # Trama incompleta: esperar más datos
+
+            if self.resincronizando:
+                print(f"✅ Flujo resincronizado ({self.bytes_descartados} bytes descartados en total)")
+                self.resincronizando = False
+            self.inicio = cuerpo + longitud
+            yield self.vista[cuerpo:self.inicio]
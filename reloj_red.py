@@ -0,0 +1,63 @@
+from collections import deque
+
+# Sincronización de relojes al estilo NTP sobre los HEARTBEAT. Cada heartbeat lleva
+# la hora local de quien lo envía, el eco de la hora del último heartbeat recibido
+# del otro equipo y cuánto tiempo lo retuvo antes de contestar. Con eso, quien recibe
+# la respuesta tiene los cuatro instantes de un intercambio:
+#
+#     t1 envío (local) -> t2 llegada (remoto) ... t3 respuesta (remoto) -> t4 llegada (local)
+#
+#     rtt     = (t4 - t1) - (t3 - t2)
+#     desfase = ((t2 - t1) + (t3 - t4)) / 2      (reloj remoto - reloj local)
+#
+# El desfase supone que la ida y la vuelta tardan lo mismo; el error es como mucho
+# la mitad de la asimetría, así que se usa el de la muestra reciente con menor RTT
+# (la que menos esperó en colas), como el filtro de reloj de NTP.
+
+
+class EstimadorReloj:
+    """Desfase con el reloj del otro equipo, RTT y jitter a partir de intercambios de heartbeats"""
+
+    MUESTRAS = 8    # Ventana del filtro; hasta llenarla se contesta cada heartbeat al momento
+
+    def __init__(self):
+        self.muestras = deque(maxlen=self.MUESTRAS)    # (rtt, desfase)
+        self.desfase = 0.0          # Reloj remoto - reloj local
+        self.rtt = None             # Último RTT medido (segundos)
+        self.rtt_minimo = None      # RTT de la muestra que fija el desfase
+        self.jitter = 0.0           # Variación media entre RTT consecutivos (RFC 3550)
+
+    @property
+    def sincronizado(self):
+        return bool(self.muestras)
+
+    @property
+    def calentando(self):
+        """Aún faltan muestras para llenar el filtro"""
+        return len(self.muestras) < self.MUESTRAS
+
+    def muestra(self, t1, t2, t3, t4):
+        """Agrega un intercambio completo; retorna False si es imposible (RTT negativo)"""
+        rtt = (t4 - t1) - (t3 - t2)
+        if rtt < 0:
+            return False
+
+        if self.rtt is not None:
+            self.jitter += (abs(rtt - self.rtt) - self.jitter) / 16
+        self.rtt = rtt
+        self.muestras.append((rtt, ((t2 - t1) + (t3 - t4)) / 2))
+        self.rtt_minimo, self.desfase = min(self.muestras)
+        return True
+
+    def reiniciar(self):
+        """Olvida las muestras (nueva conexión, quizá con otro equipo)"""
+        self.muestras.clear()
+        self.desfase = 0.0
+        self.rtt = self.rtt_minimo = None
+        self.jitter = 0.0
+
+    def a_local(self, t_remoto):
+        return t_remoto - self.desfase
+
+    def a_remoto(self, t_local):
+        return t_local + self.desfase
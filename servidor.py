@@ -0,0 +1,401 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import sys
+import time
+import random
+import socket
+import argparse
+import selectors
+from simulacion import (SimulacionMultijugador, EntradaJugador, EVENTO_BOMBA_COLOCADA,
+                        EVENTO_OBJETO_DESTRUIDO, EVENTO_POWERUP_SPAWNEADO, EVENTO_POWERUP_RECOGIDO)
+from protocolo import (MessageType, ErrorProtocolo, BufferRecepcion, codificar_mensaje,
+                       decodificar_mensaje, secuencia_posterior, VERSION_PROTOCOLO, MAGIA_PROTOCOLO,
+                       RECHAZO_VERSION, RECHAZO_PARTIDA_LLENA, MOTIVOS_RECHAZO, LARGO_NIVEL)
+
+# Servidor dedicado sin ventana: simula la partida con autoridad sobre todos los
+# jugadores y reparte un snapshot del mundo por tick. Los clientes son MultiplayerGame
+# normales conectados como cliente; predicen su movimiento y envían PLAYER_INPUT.
+#
+#   python servidor.py --jugadores 6 --puerto 4040
+#
+# Un solo thread: un bucle de selectors con sockets no bloqueantes que atiende la red
+# entre ticks, sin un thread por conexión.
+#
+# Si un cliente se corta sin despedirse, su jugador queda reservado TIEMPO_RECONEXION
+# segundos; al volver pide el mismo id y recibe el mundo completo (WORLD_STATE).
+
+
+class ConexionCliente:
+    """Estado de un cliente conectado al servidor"""
+
+    def __init__(self, sock, direccion):
+        self.sock = sock
+        self.direccion = direccion
+        self.buffer = BufferRecepcion()
+        self.salida = bytearray()       # Pendiente de escribir (el socket no bloquea)
+        self.player_id = None           # Asignado al recibir CONNECTION_REQUEST
+        self.aceptada = time.time()     # Sin CONNECTION_REQUEST en TIEMPO_SALUDO se cierra
+        self.comandos = []              # (seq, datos) recibidos desde el último tick
+        self.ack = 0                    # Última entrada aplicada
+        self.escuchando_escritura = False
+
+
+class ServidorJuego:
+    """Partida de hasta max_jugadores clientes sobre un bucle de selectors"""
+
+    MAX_SALIDA_SNAPSHOTS = 64 * 1024    # Con más pendiente se omiten snapshots (el siguiente los reemplaza)
+    MAX_SALIDA = 1024 * 1024            # Con más pendiente el cliente no da abasto: se desconecta
+    TIEMPO_RECONEXION = 30.0            # Segundos que se reserva el jugador de un cliente cortado
+    TIEMPO_SALUDO = 5.0                 # Segundos para enviar CONNECTION_REQUEST tras conectarse
+
+    def __init__(self, puerto=4040, max_jugadores=4, hz=30, nivel="level2", semilla=None):
+        self.puerto = puerto
+        self.max_jugadores = max_jugadores
+        self.periodo = 1 / hz
+        self.nivel = nivel
+        self.semilla = random.getrandbits(32) if semilla is None else semilla
+
+        self.sim = SimulacionMultijugador(nivel=nivel, ids=range(1, max_jugadores + 1), reloj=time.time,
+                                          semilla=self.semilla)
+        self.conexiones = {}            # socket -> ConexionCliente
+        self.por_jugador = {}           # player_id -> ConexionCliente
+        self.ausentes = {}              # player_id -> (instante del corte, ack) esperando reconexión
+        self.selector = selectors.DefaultSelector()
+        self.servidor = None
+        self.ejecutando = False
+        self.ticks = 0
+
+    # Red ===========================================================================
+
+    def iniciar(self):
+        self.servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.servidor.bind(('0.0.0.0', self.puerto))
+        self.servidor.listen(self.max_jugadores)
+        self.servidor.setblocking(False)
+        self.selector.register(self.servidor, selectors.EVENT_READ)
+        print(f"🖥️ Servidor dedicado en puerto {self.puerto} ({self.max_jugadores} jugadores, "
+              f"{1 / self.periodo:.0f} Hz, {self.nivel})")
+
+    def _aceptar(self):
+        try:
+            sock, direccion = self.servidor.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conexion = ConexionCliente(sock, direccion)
+        self.conexiones[sock] = conexion
+        self.selector.register(sock, selectors.EVENT_READ, conexion)
+        print(f"🔗 Conexión desde {direccion[0]}:{direccion[1]}")
+
+    def _leer(self, conexion):
+        try:
+            recibidos = conexion.sock.recv_into(conexion.buffer.espacio_libre())
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._cerrar(conexion, f"error de lectura: {e}", reconectable=True)
+            return
+        if not recibidos:
+            self._cerrar(conexion, "cerró la conexión", reconectable=True)
+            return
+
+        conexion.buffer.recibido(recibidos)
+        for trama in conexion.buffer.tramas():
+            try:
+                message = decodificar_mensaje(trama)
+            except ErrorProtocolo as e:
+                print(f"⚠️ Trama descartada de {conexion.direccion[0]}: {e}")
+                continue
+            self._procesar(conexion, message)
+
+        # Las respuestas (eco del heartbeat, bienvenida) salen ya, sin esperar al tick
+        if conexion.salida and conexion.sock in self.conexiones:
+            self._escribir(conexion)
+
+    def _escribir(self, conexion):
+        if conexion.salida:
+            try:
+                enviados = conexion.sock.send(conexion.salida)
+            except BlockingIOError:
+                enviados = 0
+            except OSError as e:
+                self._cerrar(conexion, f"error de escritura: {e}", reconectable=True)
+                return
+            del conexion.salida[:enviados]
+
+        # Solo interesa saber si el socket admite escritura mientras quede algo pendiente
+        quiere_escribir = bool(conexion.salida)
+        if quiere_escribir != conexion.escuchando_escritura:
+            eventos = selectors.EVENT_READ | (selectors.EVENT_WRITE if quiere_escribir else 0)
+            self.selector.modify(conexion.sock, eventos, conexion)
+            conexion.escuchando_escritura = quiere_escribir
+
+    def _cerrar(self, conexion, motivo, reconectable=False):
+        """Cierra la conexión; si se cortó (reconectable) el jugador queda reservado en
+        lugar de anunciar a los demás que salió de la partida"""
+        if conexion.sock not in self.conexiones:
+            return
+        print(f"🔌 Cliente {conexion.direccion[0]} (jugador {conexion.player_id}) {motivo}")
+        self.selector.unregister(conexion.sock)
+        conexion.sock.close()
+        del self.conexiones[conexion.sock]
+        if conexion.player_id is not None and self.por_jugador.get(conexion.player_id) is conexion:
+            del self.por_jugador[conexion.player_id]
+            if reconectable and self.ejecutando and self.sim.jugadores[conexion.player_id].is_alive():
+                self.ausentes[conexion.player_id] = (time.time(), conexion.ack)
+                print(f"⏳ Jugador {conexion.player_id} reservado {self.TIEMPO_RECONEXION:.0f}s para que se reconecte")
+                return
+            self.difundir({'type': MessageType.GAME_OVER.value, 'player_id': conexion.player_id,
+                           'timestamp': time.time()})
+
+    def enviar(self, conexion, trama, descartable=False):
+        """Encola una trama ya codificada; los snapshots se omiten si el cliente va atrasado"""
+        pendiente = len(conexion.salida)
+        if descartable and pendiente > self.MAX_SALIDA_SNAPSHOTS:
+            return
+        if pendiente > self.MAX_SALIDA:
+            self._cerrar(conexion, "no consume lo que se le envía", reconectable=True)
+            return
+        conexion.salida += trama
+
+    def difundir(self, message, descartable=False):
+        """Envía un mensaje a todos los jugadores (se codifica una sola vez)"""
+        trama = codificar_mensaje(message)
+        for conexion in list(self.por_jugador.values()):
+            self.enviar(conexion, trama, descartable)
+
+    # Mensajes ======================================================================
+
+    def _procesar(self, conexion, message):
+        tipo = message['type']
+
+        if tipo == MessageType.CONNECTION_REQUEST.value:
+            if message.get('magia') != MAGIA_PROTOCOLO:
+                self._cerrar(conexion, "no habla este protocolo")
+            elif message.get('version') != VERSION_PROTOCOLO:
+                self._rechazar(conexion, RECHAZO_VERSION)
+            else:
+                self._asignar_jugador(conexion, message.get('player_id', 0))
+
+        elif tipo == MessageType.PLAYER_INPUT.value:
+            if conexion.player_id is not None:
+                conexion.comandos.append((message['seq'], message['data']))
+
+        elif tipo == MessageType.HEARTBEAT.value:
+            # Eco inmediato: el cliente calcula RTT y desfase con el reloj del servidor,
+            # que es el reloj de la partida (ver reloj_red.py)
+            self.enviar(conexion, codificar_mensaje({'type': MessageType.HEARTBEAT.value,
+                                                     'timestamp': time.time(), 'seq': message['seq'],
+                                                     'eco': message['timestamp'], 'retencion': 0.0}))
+
+        elif tipo == MessageType.CONNECTION_CHECK.value:
+            self.enviar(conexion, codificar_mensaje({'type': MessageType.CONNECTION_CHECK.value,
+                                                     'timestamp': time.time(), 'status': 'ok'}))
+
+        elif tipo == MessageType.GAME_OVER.value:
+            self._cerrar(conexion, "abandonó la partida")
+
+    def _asignar_jugador(self, conexion, preferido=0):
+        """Da un jugador libre a la conexión; preferido es el que tenía antes de un corte"""
+        if conexion.player_id is not None:
+            return
+        anterior = self.por_jugador.get(preferido)
+        if anterior is not None and anterior.direccion[0] == conexion.direccion[0]:
+            # Se reconectó antes de que este lado notara el corte: la conexión vieja sobra
+            self._cerrar(anterior, "reemplazado por una reconexión", reconectable=True)
+
+        libres = [id for id in self.sim.jugadores if id not in self.por_jugador
+                  and (id not in self.ausentes or id == preferido) and self.sim.jugadores[id].is_alive()]
+        if not libres:
+            self._rechazar(conexion, RECHAZO_PARTIDA_LLENA)
+            return
+
+        conexion.player_id = preferido if preferido in libres else libres[0]
+        reservado = self.ausentes.pop(conexion.player_id, None)
+        if reservado:
+            conexion.ack = reservado[1]     # Las entradas ya aplicadas no se repiten
+        self.por_jugador[conexion.player_id] = conexion
+        self.enviar(conexion, self._respuesta_saludo(conexion.player_id))
+        self.enviar(conexion, self._estado_mundo())
+        print(f"✅ {conexion.direccion[0]} es el jugador {conexion.player_id}"
+              f"{' (reconectado)' if reservado else ''}")
+
+    def _estado_mundo(self):
+        """WORLD_STATE con el mundo completo y los jugadores conectados"""
+        message = self.sim.estado_completo(ids=list(self.por_jugador),
+                                           acks={id: c.ack for id, c in self.por_jugador.items()})
+        message['type'] = MessageType.WORLD_STATE.value
+        message['timestamp'] = time.time()
+        return codificar_mensaje(message)
+
+    def _respuesta_saludo(self, player_id, rechazo=0):
+        """CONNECTION_ACCEPTED con la partida; su timestamp es la primera muestra del reloj del cliente"""
+        return codificar_mensaje({
+            'type': MessageType.CONNECTION_ACCEPTED.value,
+            'player_id': player_id,
+            'max_jugadores': self.max_jugadores,
+            'dedicado': True,
+            'version': VERSION_PROTOCOLO,
+            'rechazo': rechazo,
+            'nivel': self.nivel,
+            'semilla': self.semilla,
+            'timestamp': time.time()
+        })
+
+    def _rechazar(self, conexion, motivo):
+        print(f"⚠️ Rechazando a {conexion.direccion[0]}: {MOTIVOS_RECHAZO[motivo]}")
+        self.enviar(conexion, self._respuesta_saludo(0, motivo))
+        self._escribir(conexion)
+        self._cerrar(conexion, "rechazado")
+
+    # Simulación ====================================================================
+
+    def tick(self):
+        """Aplica las entradas recibidas, avanza la simulación y reparte los cambios"""
+        jugadores = self.sim.jugadores
+        activos = {}
+        for id, conexion in self.por_jugador.items():
+            jugador = jugadores[id]
+            if not jugador.is_alive():
+                conexion.comandos.clear()
+                continue
+            for seq, datos in conexion.comandos:
+                if conexion.ack and not secuencia_posterior(seq, conexion.ack):
+                    continue  # Repetida
+                self.sim.aplicar_comando(jugador, datos['direccion'], datos['bomba'], datos['detonar'])
+                conexion.ack = seq
+            conexion.comandos.clear()
+            activos[id] = EntradaJugador()
+
+        self._vencer_saludos()
+        self._vencer_reservas()
+        vivos_antes = {id for id in activos if jugadores[id].is_alive()}
+        self.sim.paso(activos)
+        self._difundir_eventos()
+
+        for id in vivos_antes:
+            if not jugadores[id].is_alive():
+                print(f"💀 Jugador {id} eliminado")
+
+        self.ticks += 1
+        self.difundir({
+            'type': MessageType.WORLD_SNAPSHOT.value,
+            'timestamp': time.time(),
+            'tick': self.ticks,
+            'jugadores': [{'player_id': id, 'ack': conexion.ack, 'data': jugadores[id].estado_red()}
+                          for id, conexion in self.por_jugador.items()]
+        }, descartable=True)
+
+    def _vencer_saludos(self):
+        """Cierra las conexiones que no se presentaron a tiempo (ocupan un socket sin jugar)"""
+        limite = time.time() - self.TIEMPO_SALUDO
+        for conexion in list(self.conexiones.values()):
+            if conexion.player_id is None and conexion.aceptada < limite:
+                self._cerrar(conexion, f"no envió CONNECTION_REQUEST en {self.TIEMPO_SALUDO:.0f}s")
+
+    def _vencer_reservas(self):
+        """Los jugadores que no volvieron a tiempo salen de la partida"""
+        ahora = time.time()
+        for id, (desde, _) in list(self.ausentes.items()):
+            if ahora - desde > self.TIEMPO_RECONEXION:
+                del self.ausentes[id]
+                print(f"⌛ El jugador {id} no se reconectó")
+                self.difundir({'type': MessageType.GAME_OVER.value, 'player_id': id, 'timestamp': ahora})
+
+    def _difundir_eventos(self):
+        ahora = time.time()
+        for tipo, datos in self.sim.tomar_eventos():
+            if tipo == EVENTO_BOMBA_COLOCADA:
+                bomba = datos['bomba']
+                message = {'type': MessageType.BOMB_PLACED.value, 'data': {
+                    'x': bomba.x, 'y': bomba.y, 'player_id': bomba.jugador_id,
+                    'time': bomba.tiempo_creacion, 'rango_explosion': bomba.rango_explosion}}
+            elif tipo == EVENTO_OBJETO_DESTRUIDO:
+                message = {'type': MessageType.OBJECT_DESTROYED.value,
+                           'data': {'x': int(datos['x']), 'y': int(datos['y'])}}
+            elif tipo == EVENTO_POWERUP_SPAWNEADO:
+                powerup = datos['powerup']
+                message = {'type': MessageType.POWERUP_SPAWNED.value, 'data': {
+                    'x': int(powerup.x), 'y': int(powerup.y), 'type': powerup.tipo.value}}
+            elif tipo == EVENTO_POWERUP_RECOGIDO:
+                powerup = datos['powerup']
+                message = {'type': MessageType.POWERUP_COLLECTED.value, 'data': {
+                    'x': int(powerup.x), 'y': int(powerup.y), 'type': powerup.tipo.value,
+                    'player_id': datos['jugador_id']}}
+            else:
+                continue
+            message['timestamp'] = ahora
+            self.difundir(message)
+
+    # Bucle =========================================================================
+
+    def ejecutar(self, duracion=None):
+        """Atiende la red entre ticks hasta que se detenga (o pasen duracion segundos)"""
+        self.ejecutando = True
+        inicio = time.perf_counter()
+        siguiente_tick = inicio
+        try:
+            while self.ejecutando:
+                ahora = time.perf_counter()
+                if duracion is not None and ahora - inicio >= duracion:
+                    break
+
+                for clave, eventos in self.selector.select(timeout=max(0.0, siguiente_tick - ahora)):
+                    if clave.fileobj is self.servidor:
+                        self._aceptar()
+                        continue
+                    conexion = clave.data
+                    if eventos & selectors.EVENT_READ:
+                        self._leer(conexion)
+                    if eventos & selectors.EVENT_WRITE and conexion.sock in self.conexiones:
+                        self._escribir(conexion)
+
+                if time.perf_counter() >= siguiente_tick:
+                    self.tick()
+                    for conexion in list(self.conexiones.values()):
+                        self._escribir(conexion)
+                    siguiente_tick += self.periodo
+                    # Si el servidor se atrasó, no intentar recuperar ticks perdidos de golpe
+                    siguiente_tick = max(siguiente_tick, time.perf_counter() - self.periodo)
+        finally:
+            self.cerrar()
+
+    def cerrar(self):
+        self.ejecutando = False
+        for conexion in list(self.conexiones.values()):
+            self._cerrar(conexion, "desconectado (servidor detenido)")
+        if self.servidor:
+            self.selector.unregister(self.servidor)
+            self.servidor.close()
+            self.servidor = None
+        print("🛑 Servidor detenido")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor dedicado de Bomberman, sin ventana")
+    parser.add_argument('--puerto', type=int, default=4040)
+    parser.add_argument('--jugadores', type=int, default=4, help="máximo de jugadores (2 a 8)")
+    parser.add_argument('--hz', type=float, default=30, help="ticks (y snapshots) por segundo")
+    parser.add_argument('--nivel', default="level2")
+    parser.add_argument('--semilla', type=int, help="semilla de la partida (por defecto, al azar)")
+    args = parser.parse_args(argv)
+    if not 2 <= args.jugadores <= 8:
+        parser.error("--jugadores debe estar entre 2 y 8")
+    if len(args.nivel.encode('utf-8')) > LARGO_NIVEL:
+        parser.error(f"--nivel admite como mucho {LARGO_NIVEL} bytes (viaja en el saludo)")
+
+    servidor = ServidorJuego(puerto=args.puerto, max_jugadores=args.jugadores, hz=args.hz, nivel=args.nivel,
+                             semilla=args.semilla)
+    servidor.iniciar()
+    try:
+        servidor.ejecutar()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
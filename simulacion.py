@@ -0,0 +1,726 @@
+import pygame
+import random
+from map import Map
+from player import Player
+from object import Object
+from bomba import Bomba
+from powerup import PowerUpSystem, PowerUpType
+from enemy import Enemy
+from exit_point import ExitPoint
+from profiler import PERFIL_NULO
+
+# Núcleo de simulación sin ventana: el mundo avanza por ticks fijos a partir de
+# entradas explícitas y de un reloj inyectado. Game y MultiplayerGame solo leen
+# el teclado, dibujan y (en multijugador) traducen los eventos a mensajes de red.
+#
+# El mapa usa el estado global de Object (Object.objects / Object.grid), así que
+# solo puede haber una simulación activa por proceso.
+
+TICK = 1 / 60  # Duración de un tick en segundos
+
+# Eventos que la simulación deja en self.eventos para el shell que la envuelve
+EVENTO_NIVEL_INICIADO = 'nivel_iniciado'
+EVENTO_NIVEL_COMPLETADO = 'nivel_completado'
+EVENTO_VICTORIA = 'victoria'
+EVENTO_DERROTA = 'derrota'
+EVENTO_BOMBA_COLOCADA = 'bomba_colocada'
+EVENTO_OBJETO_DESTRUIDO = 'objeto_destruido'
+EVENTO_POWERUP_SPAWNEADO = 'powerup_spawneado'
+EVENTO_POWERUP_RECOGIDO = 'powerup_recogido'
+EVENTO_ENEMIGO_ELIMINADO = 'enemigo_eliminado'
+
+
+class RelojSimulado:
+    """Reloj que solo avanza cuando la simulación completa un tick.
+
+    Se usa como callable igual que time.time: reloj() retorna segundos.
+    """
+
+    def __init__(self, tick=TICK):
+        self.tick = tick
+        self.ticks = 0
+
+    def __call__(self):
+        # Se calcula desde el número de ticks para no acumular error de coma flotante
+        return self.ticks * self.tick
+
+    def avanzar(self, ticks=1):
+        self.ticks += ticks
+
+
+class EntradaJugador:
+    """Entrada de un jugador para un tick.
+
+    direccion: 'up', 'down', 'left', 'right' o None.
+    bomba / detonar: pulsaciones (se aplican una sola vez por tick).
+    """
+
+    def __init__(self, direccion=None, bomba=False, detonar=False):
+        self.direccion = direccion
+        self.bomba = bomba
+        self.detonar = detonar
+
+    def limpiar_pulsaciones(self):
+        """Descarta las pulsaciones ya consumidas manteniendo la dirección"""
+        self.bomba = False
+        self.detonar = False
+
+
+class MundoBase:
+    """Reglas compartidas por el modo de un jugador y el multijugador"""
+
+    LARGURA = 1260
+    ALTURA = 720
+    TILE_SIZE = 20
+    PLAYER_TILES = 3
+    COR_CLARA = (0, 140, 0)
+    COR_ESCURA = (0, 120, 0)
+
+    def __init__(self, reloj=None, semilla=None, probabilidad_spawn=0.35, tick=TICK):
+        self.player_size = self.TILE_SIZE * self.PLAYER_TILES
+        self.player_vel = self.TILE_SIZE * 1.5
+
+        # Sin reloj externo, el tiempo es el de la propia simulación (determinista)
+        self.tick = tick
+        self.reloj_propio = reloj is None
+        self.reloj = RelojSimulado(tick) if reloj is None else reloj
+        self.ticks = 0
+
+        # Todo el azar de la partida sale de este generador
+        self.semilla = semilla
+        self.rng = random.Random(semilla)
+
+        self.mapa = Map(self.LARGURA, self.ALTURA, self.TILE_SIZE, self.COR_CLARA, self.COR_ESCURA)
+        self.bombas = []
+        self.powerup_system = PowerUpSystem(probabilidad_spawn=probabilidad_spawn, rng=self.rng)
+        self.eventos = []
+
+        # Perfilador de fases; el shell con ventana lo sustituye por un PerfilFrames
+        self.perfil = PERFIL_NULO
+
+    def ahora(self):
+        """Tiempo actual de la simulación en segundos"""
+        return self.reloj()
+
+    def _avanzar_reloj(self):
+        self.ticks += 1
+        if self.reloj_propio:
+            self.reloj.avanzar()
+
+    def _emitir(self, tipo, **datos):
+        self.eventos.append((tipo, datos))
+
+    def tomar_eventos(self):
+        """Retorna y vacía la lista de eventos pendientes"""
+        eventos = self.eventos
+        self.eventos = []
+        return eventos
+
+    def crear_jugador(self, id):
+        return Player(self.LARGURA, self.ALTURA, self.player_size, self.player_vel,
+                      id=id, reloj=self.reloj)
+
+    def ajustar_a_grid(self, x, y):
+        """Ajusta las coordenadas a la cuadrícula"""
+        grid_size = self.player_size
+        grid_x = (x // grid_size) * grid_size
+        grid_y = (y // grid_size) * grid_size
+        return grid_x, grid_y
+
+    def colocar_bomba(self, jugador):
+        """Coloca una bomba del jugador en su celda; retorna la bomba o None"""
+        if not jugador.puede_colocar_bomba():
+            print("⚠️ Ya tienes una bomba activa - espera a que explote")
+            return None
+
+        grid_x, grid_y = self.ajustar_a_grid(jugador.x, jugador.y)
+
+        # No se apilan bombas (de ningún jugador) en la misma celda
+        for bomba in self.bombas:
+            if not bomba.explotada and bomba.x == grid_x and bomba.y == grid_y:
+                return None
+
+        nueva_bomba = Bomba(grid_x, grid_y, self.player_size,
+                            jugador_id=jugador.id,
+                            rango_explosion=jugador.rango_explosion,
+                            reloj=self.reloj)
+        self.bombas.append(nueva_bomba)
+        jugador.colocar_bomba(nueva_bomba)
+        self._emitir(EVENTO_BOMBA_COLOCADA, bomba=nueva_bomba, jugador_id=jugador.id)
+        print(f"💣 Bomba colocada en ({grid_x}, {grid_y}) - Rango: {jugador.rango_explosion}")
+        return nueva_bomba
+
+    def detonar_bombas(self, jugador):
+        """Detona las bombas propias del jugador (control remoto); retorna cuántas"""
+        print("🎮 Activando control remoto...")
+        bombas_detonadas = 0
+
+        for bomba in self.bombas:
+            if not bomba.explotada and not bomba.es_remota and bomba.jugador_id == jugador.id:
+                bomba.explotar(Object.objects)
+                bombas_detonadas += 1
+
+        if bombas_detonadas > 0:
+            print(f"💥 ¡{bombas_detonadas} bombas detonadas remotamente!")
+        else:
+            print("⚠️ No hay bombas para detonar")
+        return bombas_detonadas
+
+    def procesar_explosion(self, bomba, spawnear_powerups=True):
+        """Destruye los objetos alcanzados por una explosión; retorna los objetos destruidos"""
+        objetos_destruidos = []
+
+        for rect in bomba.explosion_tiles:
+            for obj in Object.objetos_em_rect(rect):
+                if obj.destrutivel and not obj.destruido:
+                    obj.destruir()
+                    objetos_destruidos.append(obj)
+                    print(f"💥 Objeto destruido en ({obj.rect.x}, {obj.rect.y})")
+
+                    if not spawnear_powerups:
+                        continue
+
+                    self._emitir(EVENTO_OBJETO_DESTRUIDO, x=obj.rect.x, y=obj.rect.y)
+
+                    # Intentar spawnear power-up
+                    powerup = self.powerup_system.intentar_spawn(
+                        obj.rect.x, obj.rect.y,
+                        self.player_size
+                    )
+                    if powerup:
+                        self._emitir(EVENTO_POWERUP_SPAWNEADO, powerup=powerup)
+
+        return objetos_destruidos
+
+    def danar_jugadores(self, bomba, jugadores):
+        """Aplica el daño de una explosión activa a los jugadores que toca (una vez por bomba)"""
+        alcanzados = False
+        for jugador in jugadores:
+            player_rect = pygame.Rect(jugador.x, jugador.y, self.player_size, self.player_size)
+            for rect in bomba.explosion_tiles:
+                if player_rect.colliderect(rect):
+                    if jugador.take_damage(1):
+                        print(f"🔥 Jugador {jugador.id} golpeado! Vida: {jugador.life}")
+                    alcanzados = True
+                    break
+        if alcanzados:
+            bomba.causou_dano = True
+
+    def recoger_powerups(self, jugador):
+        """Aplica los power-ups que toca el jugador y retorna sus tipos"""
+        jugador_rect = pygame.Rect(jugador.x, jugador.y, self.player_size, self.player_size)
+        recogidos = []
+        for powerup in self.powerup_system.powerups:
+            if powerup.activo and powerup.colisiona_con(jugador_rect):
+                recogidos.append(powerup)
+
+        tipos = self.powerup_system.verificar_colisiones(jugador_rect, jugador)
+        for tipo_powerup in tipos:
+            jugador.aplicar_powerup(tipo_powerup)
+        for powerup in recogidos:
+            self._emitir(EVENTO_POWERUP_RECOGIDO, powerup=powerup, jugador_id=jugador.id)
+        return tipos
+
+
+class Simulacion(MundoBase):
+    """Partida de un jugador: niveles, enemigos y punto de salida.
+
+    ajustes permite sobrescribir parámetros de balance antes del primer nivel
+    (por ejemplo {'probabilidad_spawn': 0.5, 'velocidad_enemigo_base': 1.5}).
+    """
+
+    def __init__(self, niveles=None, reloj=None, semilla=None, probabilidad_spawn=0.35, tick=TICK,
+                 ajustes=None, escanear_mapas=False):
+        super().__init__(reloj=reloj, semilla=semilla, probabilidad_spawn=probabilidad_spawn, tick=tick)
+        
+        # Registra también los PNG sueltos de la carpeta de mapas como niveles
+        if escanear_mapas:
+            self.mapa.scan_maps_folder()
+
+        # Sistema de niveles
+        self.niveles = list(niveles) if niveles else ["level1", "level2"]
+        self.nivel_actual = 0
+        self.num_enemigos_base = 3  # Enemigos base por nivel
+        self.enemigos_extra_por_nivel = 1  # Enemigos extra que se añaden por nivel
+        self.max_enemigos = 8
+        self.velocidad_enemigo_base = 1.0
+        self.velocidad_enemigo_extra = 0.2  # Por nivel (máximo +1.0)
+
+        self.jugador = self.crear_jugador(0)
+        self.jugador.life_max = 3
+        self.jugador.life = 3
+
+        self.enemigos = []
+        self.enemigos_eliminados = 0
+        self.exit_point = None
+
+        # Movimiento por pasos de celda con cooldown (segundos)
+        self.move_cooldown = 0.2
+        self.ultimo_movimiento = self.ahora()
+
+        # Fin de partida
+        self.terminado = False
+        self.victoria = False
+
+        if ajustes:
+            self.aplicar_ajustes(ajustes)
+
+        self.iniciar_nivel()
+
+    def aplicar_ajustes(self, ajustes):
+        """Sobrescribe parámetros de balance; lanza ValueError si alguno no existe"""
+        for nombre, valor in ajustes.items():
+            if nombre == 'probabilidad_spawn':
+                self.powerup_system.probabilidad_spawn = valor
+            elif nombre in ('num_enemigos_base', 'enemigos_extra_por_nivel', 'max_enemigos',
+                            'velocidad_enemigo_base', 'velocidad_enemigo_extra', 'move_cooldown'):
+                setattr(self, nombre, valor)
+            else:
+                raise ValueError(f"Ajuste desconocido: {nombre}")
+
+    def iniciar_nivel(self):
+        """Inicia el nivel self.nivel_actual"""
+        print(f"\n=== NIVEL {self.nivel_actual + 1} ===")
+
+        # Limpiar elementos del nivel anterior
+        self.bombas.clear()
+        self.enemigos.clear()
+        self.enemigos_eliminados = 0
+        self.powerup_system.limpiar()
+        Object.limpar()
+
+        # Si no hay más niveles, repetir el último
+        nivel = self.niveles[min(self.nivel_actual, len(self.niveles) - 1)]
+        self.mapa.crear_obstaculos(nivel)
+
+        # Colocar jugador en posición inicial (esquina superior izquierda)
+        self.jugador.x = 60
+        self.jugador.y = 60
+        self.jugador.bomba_colocada = False
+        self.jugador.bomba_actual = None
+        self.jugador.bombas_colocadas_actual = 0
+
+        self.crear_enemigos()
+        self.crear_punto_salida()
+
+        self._emitir(EVENTO_NIVEL_INICIADO, nivel=self.nivel_actual)
+        print(f"Mapa: {nivel}")
+        print(f"Enemigos: {len(self.enemigos)}")
+        print(f"¡Comienza el nivel {self.nivel_actual + 1}!")
+
+    def crear_enemigos(self):
+        """Crea un número fijo de enemigos por nivel"""
+        num_enemigos = self.num_enemigos_base + (self.nivel_actual * self.enemigos_extra_por_nivel)
+        num_enemigos = min(num_enemigos, self.max_enemigos)
+
+        for _ in range(num_enemigos):
+            self.spawn_enemigo_aleatorio()
+
+    def spawn_enemigo_aleatorio(self):
+        """Crea un enemigo en una posición aleatoria válida"""
+        intentos = 0
+        while intentos < 100:
+            # Generar posición aleatoria en la cuadrícula
+            grid_x = self.rng.randint(0, (self.LARGURA // self.player_size) - 1) * self.player_size
+            grid_y = self.rng.randint(0, (self.ALTURA // self.player_size) - 1) * self.player_size
+
+            # Verificar que no esté en la posición del jugador
+            if abs(grid_x - self.jugador.x) < self.player_size * 2 and abs(grid_y - self.jugador.y) < self.player_size * 2:
+                intentos += 1
+                continue
+
+            # Verificar que no colisione con objetos no destruidos
+            enemigo_rect = pygame.Rect(grid_x, grid_y, self.player_size, self.player_size)
+            if Object.objeto_em_rect(enemigo_rect) is None:
+                # Vida y velocidad progresivas (más difícil cada nivel)
+                vida = 1 + min(self.nivel_actual // 2, 2)  # Máximo +2 de vida
+                velocidad = self.velocidad_enemigo_base + min(self.nivel_actual * self.velocidad_enemigo_extra, 1.0)
+
+                enemigo = Enemy(grid_x, grid_y, self.player_size, velocidad, vida,
+                                reloj=self.reloj, rng=self.rng)
+                self.enemigos.append(enemigo)
+                print(f"👾 Enemigo nivel {self.nivel_actual + 1} apareció en ({grid_x}, {grid_y}) - Vida: {vida}")
+                break
+
+            intentos += 1
+
+    def crear_punto_salida(self):
+        """Crea el punto de salida en la esquina inferior derecha (o una alternativa libre)"""
+        posiciones_posibles = [
+            (self.LARGURA - self.player_size * 2, self.ALTURA - self.player_size * 2),  # Esquina inferior derecha
+            (self.player_size * 2, self.ALTURA - self.player_size * 2),  # Esquina inferior izquierda
+            (self.LARGURA // 2 - self.player_size, self.ALTURA - self.player_size * 2),  # Centro abajo
+            (self.player_size * 2, self.player_size * 2),  # Esquina superior izquierda
+        ]
+
+        for pos_x, pos_y in posiciones_posibles:
+            exit_rect = pygame.Rect(pos_x, pos_y, self.player_size, self.player_size)
+            if Object.objeto_em_rect(exit_rect) is None:
+                self.exit_point = ExitPoint(pos_x, pos_y, self.player_size)
+                print(f"🚪 Punto de salida en ({pos_x}, {pos_y})")
+                return
+
+        # Si no se encontró posición, usar la del jugador
+        self.exit_point = ExitPoint(self.jugador.x, self.jugador.y, self.player_size)
+        print(f"⚠️ Punto de salida en posición del jugador ({self.jugador.x}, {self.jugador.y})")
+
+    def siguiente_nivel(self):
+        """Pasa al siguiente nivel o termina la partida con victoria"""
+        print(f"\n🎉 ¡Nivel {self.nivel_actual + 1} completado!")
+        print(f"Enemigos eliminados: {self.enemigos_eliminados}")
+        print(f"Enemigos restantes: {len([e for e in self.enemigos if e.activo])}")
+        self._emitir(EVENTO_NIVEL_COMPLETADO, nivel=self.nivel_actual)
+
+        self.nivel_actual += 1
+        if self.nivel_actual < len(self.niveles):
+            print(f"\nCargando nivel {self.nivel_actual + 1}...")
+            self.iniciar_nivel()
+        else:
+            print("\n¡HAS COMPLETADO TODOS LOS NIVELES!")
+            self.terminado = True
+            self.victoria = True
+            self._emitir(EVENTO_VICTORIA)
+
+    def paso(self, entrada=None):
+        """Avanza la simulación un tick con la entrada del jugador"""
+        if self.terminado:
+            return
+        if entrada is None:
+            entrada = EntradaJugador()
+
+        self._avanzar_reloj()
+        ahora = self.ahora()
+        jugador = self.jugador
+        perfil = self.perfil
+
+        with perfil.fase('movimiento'):
+            # Acciones
+            if entrada.bomba:
+                self.colocar_bomba(jugador)
+            if entrada.detonar and jugador.tiene_control_remoto:
+                self.detonar_bombas(jugador)
+
+            # Movimiento con cooldown
+            if entrada.direccion and ahora - self.ultimo_movimiento >= self.move_cooldown:
+                jugador.mover(entrada.direccion, self.LARGURA, self.ALTURA, self.bombas)
+                self.ultimo_movimiento = ahora
+            jugador.actualizar_powerups()
+
+        with perfil.fase('bombas'):
+            # Estado de colisión de las bombas
+            for bomba in self.bombas:
+                bomba.actualizar_colision(jugador.x, jugador.y, jugador.id, self.player_size)
+
+            self.actualizar_bombas()
+
+        with perfil.fase('powerups'):
+            self.recoger_powerups(jugador)
+
+        with perfil.fase('destruccion'):
+            Object.atualizar_objetos_destrutiveis(self.bombas)
+
+        with perfil.fase('enemigos'):
+            self.actualizar_enemigos()
+            self.verificar_colision_enemigos()
+
+        # Salida: se activa al eliminar a todos los enemigos
+        jugador_rect = pygame.Rect(jugador.x, jugador.y, self.player_size, self.player_size)
+        if self.exit_point and not self.exit_point.activado and not self.enemigos:
+            self.exit_point.activar()
+            print("🎉 ¡Todos los enemigos eliminados! La salida está activada.")
+
+        if not jugador.is_alive():
+            self.terminado = True
+            self._emitir(EVENTO_DERROTA)
+            return
+
+        if self.exit_point and self.exit_point.activado and self.exit_point.colisiona_con(jugador_rect):
+            print("🏁 ¡Has llegado a la salida! Pasando al siguiente nivel...")
+            self.siguiente_nivel()
+
+    def actualizar_bombas(self):
+        """Explosiones, destrucción, daño y limpieza de bombas terminadas"""
+        bombas_a_remover = []
+
+        for bomba in self.bombas:
+            if bomba.debe_explotar():
+                bomba.explotar(Object.objects)
+                bomba.causou_dano = False
+
+            if bomba.recien_explotada:
+                bomba.recien_explotada = False
+                self.procesar_explosion(bomba)
+
+            if bomba.explotada and bomba.explosion_activa() and not bomba.causou_dano:
+                self.verificar_dano_enemigos(bomba)
+
+            if bomba.explosion_activa() and not bomba.causou_dano:
+                self.danar_jugadores(bomba, [self.jugador])
+
+            if bomba.explotada and not bomba.explosion_activa():
+                bombas_a_remover.append(bomba)
+                self.jugador.bomba_destruida()
+
+        for bomba in bombas_a_remover:
+            self.bombas.remove(bomba)
+
+    def verificar_dano_enemigos(self, bomba):
+        """Verifica si la explosión daña a los enemigos"""
+        for enemigo in self.enemigos:
+            if enemigo.activo:
+                for rect in bomba.explosion_tiles:
+                    if enemigo.rect.colliderect(rect):
+                        if enemigo.recibir_dano(1):
+                            print(f"💥 ¡Enemigo eliminado!")
+                            self.enemigos_eliminados += 1
+                            self._emitir(EVENTO_ENEMIGO_ELIMINADO, x=enemigo.x, y=enemigo.y)
+                        bomba.causou_dano = True
+                        break
+
+    def actualizar_enemigos(self):
+        """Mueve los enemigos activos y retira los eliminados"""
+        for enemigo in self.enemigos:
+            if enemigo.activo:
+                enemigo.actualizar(Object.objects, self.bombas, self.LARGURA, self.ALTURA)
+        self.enemigos = [e for e in self.enemigos if e.activo]
+
+    def verificar_colision_enemigos(self):
+        """Verifica colisiones entre jugador y enemigos"""
+        jugador_rect = pygame.Rect(self.jugador.x, self.jugador.y,
+                                   self.player_size, self.player_size)
+
+        for enemigo in self.enemigos:
+            if enemigo.activo and enemigo.colisiona_con(jugador_rect):
+                if self.jugador.take_damage(1):
+                    print(f"👾 ¡Enemigo golpeó al jugador! Vida: {self.jugador.life}")
+                break
+
+
+class SimulacionMultijugador(MundoBase):
+    """Partida de varios jugadores en un mapa compartido.
+
+    paso() solo simula a los jugadores que reciben entrada (los locales); el resto
+    se actualiza desde fuera (red). Las bombas agregadas con agregar_bomba_remota
+    explotan y destruyen bloques, pero sus efectos no se emiten como eventos.
+    """
+
+    POSICIONES_INICIALES = {
+        1: (60, 60),
+        2: (MundoBase.LARGURA - 120, 60)
+    }
+
+    def __init__(self, nivel="level2", ids=(1, 2), reloj=None, semilla=None, probabilidad_spawn=0.35, tick=TICK):
+        super().__init__(reloj=reloj, semilla=semilla, probabilidad_spawn=probabilidad_spawn, tick=tick)
+
+        self.nivel = nivel
+        Object.limpar()
+        self.mapa.crear_obstaculos(nivel)
+
+        self.jugadores = {}
+        ocupadas = []
+        for id in ids:
+            jugador = self.crear_jugador(id)
+            jugador.x, jugador.y = self.POSICIONES_INICIALES.get(id) or self._posicion_inicial_libre(ocupadas)
+            ocupadas.append((jugador.x, jugador.y))
+            self.jugadores[id] = jugador
+
+        # Movimiento con cooldown (segundos) por jugador
+        self.move_cooldown = 0.1
+        self.ultimo_movimiento = {id: self.ahora() for id in ids}
+
+    def _posicion_inicial_libre(self, ocupadas):
+        """Celda libre del mapa lo más lejos posible de las posiciones ya ocupadas"""
+        mejor, mejor_distancia = (60, 60), -1
+        tamaño = self.player_size
+        for y in range(0, self.ALTURA, tamaño):
+            for x in range(0, self.LARGURA, tamaño):
+                if Object.objeto_em_rect(pygame.Rect(x, y, tamaño, tamaño)) is not None:
+                    continue
+                distancia = min((abs(x - ox) + abs(y - oy) for ox, oy in ocupadas), default=0)
+                if distancia > mejor_distancia:
+                    mejor, mejor_distancia = (x, y), distancia
+        return mejor
+
+    def bombas_de(self, remotas):
+        """Bombas remotas (agregadas desde la red) o locales"""
+        return [bomba for bomba in self.bombas if bomba.es_remota == remotas]
+
+    def agregar_bomba_remota(self, x, y, jugador_id, tiempo_creacion=None, rango_explosion=1):
+        """Agrega una bomba colocada por otro jugador; retorna la bomba o None si ya existía"""
+        for bomba in self.bombas:
+            if bomba.es_remota and bomba.x == x and bomba.y == y:
+                return None
+
+        bomba = Bomba(x, y, self.player_size,
+                      jugador_id=jugador_id,
+                      rango_explosion=rango_explosion,
+                      reloj=self.reloj)
+        if tiempo_creacion is not None:
+            bomba.tiempo_creacion = tiempo_creacion
+        bomba.es_remota = True
+        bomba.es_solida_para_otros = True
+        self.bombas.append(bomba)
+        return bomba
+
+    def destruir_objeto_en(self, x, y):
+        """Destruye el objeto cuya esquina está en (x, y); retorna True si existía"""
+        if Object.grid is not None:
+            obj = Object.grid.objeto_en_pixel(x, y)
+            if obj and obj.rect.x == x and obj.rect.y == y:
+                obj.destruir()
+                return True
+            return False
+
+        for obj in Object.objects:
+            if obj.rect.x == x and obj.rect.y == y and not obj.destruido:
+                obj.destruir()
+                return True
+        return False
+
+    def estado_completo(self, ids=None, acks=None):
+        """Mundo completo para WORLD_STATE: bloques destructibles destruidos (mapa de
+        bits en el orden de Object.objects), bombas sin explotar, power-ups y el estado
+        de los jugadores ids (todos si es None) con su última entrada aplicada en acks"""
+        destructibles = [obj for obj in Object.objects if obj.destrutivel]
+        destruidos = bytearray((len(destructibles) + 7) // 8)
+        for i, obj in enumerate(destructibles):
+            if obj.destruido:
+                destruidos[i >> 3] |= 1 << (i & 7)
+
+        acks = acks or {}
+        ids = self.jugadores if ids is None else ids
+        return {
+            'bloques': len(destructibles),
+            'destruidos': bytes(destruidos),
+            'bombas': [{'x': bomba.x, 'y': bomba.y, 'player_id': bomba.jugador_id,
+                        'rango_explosion': bomba.rango_explosion,
+                        'explota': bomba.tiempo_creacion + bomba.duracion}
+                       for bomba in self.bombas if not bomba.explotada],
+            'powerups': [{'x': int(powerup.x), 'y': int(powerup.y), 'tipo': powerup.tipo.value}
+                         for powerup in self.powerup_system.powerups if powerup.activo],
+            'jugadores': [{'player_id': id, 'ack': acks.get(id, 0), 'data': self.jugadores[id].estado_red()}
+                          for id in ids if id in self.jugadores]
+        }
+
+    def aplicar_estado_completo(self, estado, propio=None):
+        """Reemplaza bloques, bombas y power-ups por los de un WORLD_STATE; retorna False
+        (sin tocar nada) si el mapa no coincide. Los jugadores los aplica quien envuelve
+        la simulación, que sabe cuáles predice y cuáles interpola.
+
+        propio: jugador cuyas bombas locales se conservan (el cliente no autoritativo
+        las simula él mismo; en el estado recibido son las remotas del otro equipo).
+        """
+        destructibles = [obj for obj in Object.objects if obj.destrutivel]
+        destruidos = estado['destruidos']
+        if estado['bloques'] != len(destructibles) or len(destruidos) != (len(destructibles) + 7) // 8:
+            return False
+
+        for i, obj in enumerate(destructibles):
+            if destruidos[i >> 3] >> (i & 7) & 1:
+                obj.destruir()
+            else:
+                obj.restaurar()
+        self.mapa.invalidar_capas()
+
+        # Las que ya explotaron terminan su llama; el resto sale del estado recibido
+        self.bombas[:] = [bomba for bomba in self.bombas
+                          if bomba.explotada or (not bomba.es_remota and bomba.jugador_id == propio)]
+        for datos in estado['bombas']:
+            if datos['player_id'] == propio:
+                continue
+            bomba = self.agregar_bomba_remota(datos['x'], datos['y'], datos['player_id'],
+                                              rango_explosion=datos['rango_explosion'])
+            if bomba:
+                bomba.tiempo_creacion = datos['explota'] - bomba.duracion
+
+        self.powerup_system.limpiar()
+        for datos in estado['powerups']:
+            try:
+                tipo = PowerUpType(datos['tipo'])
+            except ValueError:
+                continue
+            self.powerup_system.spawn_powerup(datos['x'], datos['y'], tipo, self.player_size)
+        return True
+
+    def mover_jugador(self, jugador, direccion, respetar_cooldown=True):
+        """Un paso del jugador si el cooldown lo permite; retorna si se intentó mover.
+
+        El host aplica sin cooldown los comandos del cliente, que ya lo respetó al predecirlos.
+        """
+        ahora = self.ahora()
+        if not direccion:
+            return False
+        # Si el reloj retrocedió (se sincronizó con el de la partida) no se espera
+        if respetar_cooldown and 0 <= ahora - self.ultimo_movimiento[jugador.id] < self.move_cooldown:
+            return False
+        jugador.mover(direccion, self.LARGURA, self.ALTURA, self.bombas)
+        self.ultimo_movimiento[jugador.id] = ahora
+        return True
+
+    def aplicar_comando(self, jugador, direccion, bomba=False, detonar=False):
+        """Aplica una entrada que el cliente ya predijo (autoridad: host o servidor)"""
+        if bomba:
+            self.colocar_bomba(jugador)
+        if detonar and jugador.tiene_control_remoto:
+            self.detonar_bombas(jugador)
+        # El cliente ya respetó el cooldown al predecir el paso
+        self.mover_jugador(jugador, direccion, respetar_cooldown=False)
+
+    def paso(self, entradas):
+        """Avanza un tick; entradas es un dict {id_jugador: EntradaJugador}"""
+        self._avanzar_reloj()
+        simulados = [self.jugadores[id] for id in entradas if id in self.jugadores]
+        perfil = self.perfil
+
+        with perfil.fase('movimiento'):
+            for jugador in simulados:
+                entrada = entradas[jugador.id]
+
+                if entrada.bomba:
+                    self.colocar_bomba(jugador)
+                if entrada.detonar and jugador.tiene_control_remoto:
+                    self.detonar_bombas(jugador)
+
+                self.mover_jugador(jugador, entrada.direccion)
+                jugador.actualizar_powerups()
+
+        with perfil.fase('bombas'):
+            # Estado de colisión de las bombas según la posición de su dueño (también
+            # las remotas: el cliente predice su movimiento alrededor de sus bombas)
+            for bomba in self.bombas:
+                if not bomba.explotada:
+                    dueño = self.jugadores.get(bomba.jugador_id)
+                    if dueño is not None:
+                        bomba.actualizar_colision(dueño.x, dueño.y, dueño.id, self.player_size)
+
+        with perfil.fase('powerups'):
+            for jugador in simulados:
+                self.recoger_powerups(jugador)
+
+        with perfil.fase('bombas'):
+            self.actualizar_bombas(simulados)
+
+    def actualizar_bombas(self, simulados):
+        """Explosiones, destrucción, daño a los jugadores simulados y limpieza"""
+        bombas_a_remover = []
+
+        for bomba in self.bombas:
+            if bomba.debe_explotar():
+                bomba.explotar(Object.objects)
+
+            if bomba.recien_explotada:
+                bomba.recien_explotada = False
+                # Solo las bombas propias generan power-ups y eventos de destrucción
+                self.procesar_explosion(bomba, spawnear_powerups=not bomba.es_remota)
+
+            if bomba.explotada and bomba.explosion_activa() and not bomba.causou_dano:
+                self.danar_jugadores(bomba, simulados)
+
+            if bomba.explotada and not bomba.explosion_activa():
+                bombas_a_remover.append(bomba)
+                # Liberar al dueño para colocar otra bomba
+                if not bomba.es_remota and bomba.jugador_id in self.jugadores:
+                    self.jugadores[bomba.jugador_id].bomba_destruida()
+
+        for bomba in bombas_a_remover:
+            self.bombas.remove(bomba)
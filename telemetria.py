@@ -0,0 +1,149 @@
+import os
+import json
+import time
+from collections import deque
+from protocolo import MessageType
+
+# Telemetría de GameNetwork por tipo de mensaje: cantidad y bytes en cada sentido,
+# tiempo de codificar y decodificar, y espera en cola (desde que el juego pide el
+# envío hasta que el mensaje se escribe en el socket, y desde que llega hasta que
+# el juego lo saca con get_messages). Además RTT de los heartbeats con eco y ancho
+# de banda de los últimos segundos.
+#
+# Casi todo se registra desde el thread de red; la espera de recepción la anota el
+# thread del juego. Los contadores de todos los tipos existen desde el principio,
+# así leerlos desde otro thread no choca con diccionarios que cambian de tamaño.
+
+
+def percentiles(valores, ps=(50, 95, 99)):
+    """Percentiles por rango más cercano (0.0 si no hay valores)"""
+    if not valores:
+        return tuple(0.0 for _ in ps)
+    ordenados = sorted(valores)
+    return tuple(ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))] for p in ps)
+
+
+class ContadoresTipo:
+    """Contadores de un MessageType; las esperas son las últimas MUESTRAS en ns"""
+
+    MUESTRAS = 256
+
+    __slots__ = ('enviados', 'bytes_enviados', 'codificar_ns', 'combinados', 'recibidos',
+                 'bytes_recibidos', 'decodificar_ns', 'espera_envio', 'espera_recepcion')
+
+    def __init__(self):
+        self.enviados = 0
+        self.bytes_enviados = 0
+        self.codificar_ns = 0
+        self.combinados = 0     # Reemplazados en la cola de salida por uno más nuevo
+        self.recibidos = 0
+        self.bytes_recibidos = 0
+        self.decodificar_ns = 0
+        self.espera_envio = deque(maxlen=self.MUESTRAS)
+        self.espera_recepcion = deque(maxlen=self.MUESTRAS)
+
+    def resumen(self):
+        espera_envio = percentiles(list(self.espera_envio))
+        espera_recepcion = percentiles(list(self.espera_recepcion))
+        return {
+            'enviados': self.enviados,
+            'bytes_enviados': self.bytes_enviados,
+            'combinados': self.combinados,
+            'recibidos': self.recibidos,
+            'bytes_recibidos': self.bytes_recibidos,
+            'codificar_us': self.codificar_ns / self.enviados / 1e3 if self.enviados else 0.0,
+            'decodificar_us': self.decodificar_ns / self.recibidos / 1e3 if self.recibidos else 0.0,
+            'espera_envio_ms': {f'p{p}': v / 1e6 for p, v in zip((50, 95, 99), espera_envio)},
+            'espera_recepcion_ms': {f'p{p}': v / 1e6 for p, v in zip((50, 95, 99), espera_recepcion)}
+        }
+
+
+class TelemetriaRed:
+    """Contadores por tipo, RTT y ancho de banda; instantanea() los resume en un dict JSON"""
+
+    MUESTRAS_RTT = 128
+    VENTANA_ANCHO_BANDA = 5.0   # Segundos sobre los que se calcula el ancho de banda
+
+    def __init__(self):
+        self.tipos = {tipo.value: ContadoresTipo() for tipo in MessageType}
+        self.rtt = deque(maxlen=self.MUESTRAS_RTT)     # Segundos
+        self.totales = deque()      # (instante, bytes enviados, bytes recibidos) cada segundo
+        self.bytes_enviados = 0
+        self.bytes_recibidos = 0
+        self.inicio = time.time()
+
+    def enviado(self, tipo, tamaño, codificar_ns, espera_ns):
+        contadores = self.tipos.get(tipo)
+        if contadores is None:
+            return
+        contadores.enviados += 1
+        contadores.bytes_enviados += tamaño
+        contadores.codificar_ns += codificar_ns
+        contadores.espera_envio.append(espera_ns)
+        self.bytes_enviados += tamaño
+
+    def combinado(self, tipo):
+        contadores = self.tipos.get(tipo)
+        if contadores is not None:
+            contadores.combinados += 1
+
+    def recibido(self, tipo, tamaño, decodificar_ns):
+        contadores = self.tipos.get(tipo)
+        if contadores is None:
+            return
+        contadores.recibidos += 1
+        contadores.bytes_recibidos += tamaño
+        contadores.decodificar_ns += decodificar_ns
+        self.bytes_recibidos += tamaño
+
+    def entregado(self, tipo, espera_ns):
+        """El juego sacó el mensaje de la cola de recepción (thread del juego)"""
+        contadores = self.tipos.get(tipo)
+        if contadores is not None:
+            contadores.espera_recepcion.append(espera_ns)
+
+    def muestra_rtt(self, rtt):
+        self.rtt.append(rtt)
+
+    def muestrear(self, ahora=None):
+        """Guarda los totales de bytes (se llama cada segundo) para el ancho de banda"""
+        ahora = time.time() if ahora is None else ahora
+        self.totales.append((ahora, self.bytes_enviados, self.bytes_recibidos))
+        while len(self.totales) > 2 and ahora - self.totales[1][0] >= self.VENTANA_ANCHO_BANDA:
+            self.totales.popleft()
+
+    def ancho_banda(self):
+        """(subida, bajada) en bytes por segundo sobre la ventana"""
+        if len(self.totales) < 2:
+            return 0.0, 0.0
+        (t0, enviados0, recibidos0), (t1, enviados1, recibidos1) = self.totales[0], self.totales[-1]
+        if t1 <= t0:
+            return 0.0, 0.0
+        return (enviados1 - enviados0) / (t1 - t0), (recibidos1 - recibidos0) / (t1 - t0)
+
+    def instantanea(self):
+        """Resumen serializable a JSON (tiempos en ms o µs según el nombre del campo)"""
+        p50, p95, p99 = percentiles(list(self.rtt))
+        subida, bajada = self.ancho_banda()
+        return {
+            'tiempo': time.time(),
+            'duracion': time.time() - self.inicio,
+            'rtt_ms': {
+                'ultimo': self.rtt[-1] * 1000 if self.rtt else None,
+                'p50': p50 * 1000, 'p95': p95 * 1000, 'p99': p99 * 1000,
+                'muestras': len(self.rtt)
+            },
+            'ancho_banda_kbps': {'subida': subida * 8 / 1000, 'bajada': bajada * 8 / 1000},
+            'bytes': {'enviados': self.bytes_enviados, 'recibidos': self.bytes_recibidos},
+            'tipos': {MessageType(tipo).name: contadores.resumen()
+                      for tipo, contadores in self.tipos.items()
+                      if contadores.enviados or contadores.recibidos}
+        }
+
+
+def volcar_json(datos, ruta):
+    """Escribe el JSON de forma atómica (quien lo lee nunca ve un archivo a medias)"""
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w') as f:
+        json.dump(datos, f, indent=2)
+    os.replace(temporal, ruta)
@@ -0,0 +1,53 @@
+import random
+from protocolo import (MessageType, BufferRecepcion, LONGITUD, MAX_TAMAÑO_MENSAJE, codificar_mensaje,
+                       decodificar_mensaje)
+
+# BufferRecepcion crece para tramas mayores que él, pero solo hasta un mensaje máximo
+# y solo con longitudes de cabeceras plausibles: un par de bytes de basura de
+# cualquier equipo conectado no pueden reservar gigas de memoria.
+
+
+def _recibir(buffer, datos):
+    libre = buffer.espacio_libre()
+    libre[:len(datos)] = datos
+    buffer.recibido(len(datos))
+
+
+def test_prefijo_enorme_no_hace_crecer_el_buffer():
+    buffer = BufferRecepcion()
+    tamaño = len(buffer.datos)
+
+    # Una sola lectura con tramas válidas que llenan el buffer casi hasta el final y
+    # cinco bytes de basura: la longitud (2 GB) y la versión, sin el tipo con el que
+    # se valida. Al consumir las tramas quedan al final, con poco espacio libre detrás.
+    trama = codificar_mensaje({'type': MessageType.GAME_OVER.value, 'timestamp': 1.0, 'player_id': 1})
+    cantidad = (tamaño - 100) // len(trama)
+    _recibir(buffer, trama * cantidad + LONGITUD.pack(0x7FFFFFFF) + b'\x03')
+    assert len([decodificar_mensaje(t) for t in buffer.tramas()]) == cantidad
+    assert len(buffer) == 5
+
+    for _ in range(3):
+        buffer.espacio_libre()
+    assert len(buffer.datos) == tamaño
+    assert len(buffer) == 5
+
+
+def test_trama_valida_mayor_que_el_buffer_cabe():
+    buffer = BufferRecepcion(tamaño=8192)
+    # WORLD_STATE con 20 KB al azar: comprimidos no se reducen y la trama no cabe en 8 KB
+    estado = {'type': MessageType.WORLD_STATE.value, 'timestamp': 1.0, 'bloques': 1,
+              'destruidos': random.Random(1).randbytes(20000)}
+    trama = codificar_mensaje(estado)
+    assert len(buffer.datos) < len(trama) < MAX_TAMAÑO_MENSAJE
+
+    enviados = 0
+    recibidas = []
+    while enviados < len(trama):
+        libre = buffer.espacio_libre()
+        n = min(len(libre), 1000, len(trama) - enviados)
+        libre[:n] = trama[enviados:enviados + n]
+        buffer.recibido(n)
+        enviados += n
+        recibidas += [decodificar_mensaje(t) for t in buffer.tramas()]
+    assert [m['destruidos'] for m in recibidas] == [estado['destruidos']]
+    assert len(buffer.datos) <= BufferRecepcion.MAXIMO
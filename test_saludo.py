@@ -0,0 +1,55 @@
+import socket
+import selectors
+from protocolo import (MessageType, BufferRecepcion, LONGITUD, VERSION_PROTOCOLO, MAGIA_PROTOCOLO,
+                       RECHAZO_VERSION, codificar_mensaje, decodificar_mensaje)
+from servidor import ServidorJuego, ConexionCliente
+
+# Un cliente de otra versión tiene que recibir un rechazo con motivo, no silencio:
+# las tramas del saludo pasan el filtro de BufferRecepcion con cualquier versión.
+
+
+def _solicitud(version):
+    trama = bytearray(codificar_mensaje({
+        'type': MessageType.CONNECTION_REQUEST.value,
+        'timestamp': 0.0,
+        'player_id': 0,
+        'magia': MAGIA_PROTOCOLO,
+        'version': version
+    }))
+    trama[LONGITUD.size] = version      # Versión en la cabecera, como la enviaría ese cliente
+    return bytes(trama)
+
+
+def test_buffer_entrega_saludo_de_otra_version():
+    buffer = BufferRecepcion()
+    trama = _solicitud(VERSION_PROTOCOLO - 1)
+    buffer.espacio_libre()[:len(trama)] = trama
+    buffer.recibido(len(trama))
+
+    tramas = [decodificar_mensaje(t) for t in buffer.tramas()]
+    assert [m['version'] for m in tramas] == [VERSION_PROTOCOLO - 1]
+    assert not buffer.resincronizando
+
+
+def test_servidor_rechaza_version_anterior_con_motivo():
+    servidor = ServidorJuego(max_jugadores=2)
+    propio, cliente = socket.socketpair()
+    try:
+        propio.setblocking(False)
+        conexion = ConexionCliente(propio, ('127.0.0.1', 0))
+        servidor.conexiones[propio] = conexion
+        servidor.selector.register(propio, selectors.EVENT_READ, conexion)
+
+        cliente.sendall(_solicitud(VERSION_PROTOCOLO - 1))
+        servidor._leer(conexion)
+
+        cliente.settimeout(1)
+        respuesta = BufferRecepcion()
+        respuesta.recibido(cliente.recv_into(respuesta.espacio_libre()))
+        mensajes = [decodificar_mensaje(t) for t in respuesta.tramas()]
+        assert [m['type'] for m in mensajes] == [MessageType.CONNECTION_ACCEPTED.value]
+        assert mensajes[0]['rechazo'] == RECHAZO_VERSION
+        assert propio not in servidor.conexiones
+    finally:
+        cliente.close()
+        propio.close()